@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+__author__ = "ChenyangGao <https://chenyanggao.github.io>"
+__doc__ = "比较 attr_cache 中用 dict 和 AttrRecord 存储文件属性的内存占用"
+
+from argparse import ArgumentParser, RawTextHelpFormatter
+
+parser = ArgumentParser(formatter_class=RawTextHelpFormatter, description=__doc__)
+parser.add_argument("-n", "--count", default=1_000_000, type=int, help="模拟的文件数，默认值 1000000")
+parser.add_argument("-d", "--dir-size", default=1_000, type=int, help="每个目录下的文件数，默认值 1000")
+args = parser.parse_args()
+
+from gc import collect
+from time import perf_counter
+from tracemalloc import start, stop, take_snapshot
+
+from p115.component.fs import normalize_info
+from p115.component.fs_cache import AttrRecord
+
+
+def fake_info(i: int, /) -> dict:
+    "模拟 `fs_files` 接口返回的一个文件的信息"
+    return {
+        "fid": str(1_000_000_000 + i), 
+        "cid": str(i // args.dir_size), 
+        "n": f"file-{i % 100}.mkv", 
+        "s": 1 << 30, 
+        "sha": "%040X" % i, 
+        "pc": "a%016x" % i, 
+        "te": "1700000000", 
+        "tu": "1700000001", 
+        "tp": "1600000000", 
+        "to": "1700000002", 
+        "t": "1700000000", 
+        "ico": "mkv", 
+        "fl": [], 
+        "m": 0, 
+        "hdf": 0, 
+        "fdes": 0, 
+        "c": 0, 
+    }
+
+
+def build(compact: bool, /) -> dict:
+    "按照 `P115FileSystem.iterdir` 的方式构建 attr_cache"
+    attr_cache: dict[int, dict] = {}
+    fs = object()
+    for i in range(args.count):
+        attr = normalize_info(fake_info(i), fs=fs)
+        attr["path"] = f"/{attr['parent_id']}/{attr['name']}"
+        if compact:
+            attr = AttrRecord(attr) # type: ignore
+        attr_cache[attr["id"]] = {"attr": attr}
+        try:
+            attr_cache[attr["parent_id"]]["children"][attr["id"]] = attr
+        except KeyError:
+            attr_cache[attr["parent_id"]] = {"version": 0, "children": {attr["id"]: attr}}
+    return attr_cache
+
+
+def measure(compact: bool, /) -> tuple[int, float]:
+    collect()
+    start()
+    t = perf_counter()
+    cache = build(compact)
+    elapsed = perf_counter() - t
+    size = sum(stat.size for stat in take_snapshot().statistics("filename"))
+    stop()
+    del cache
+    return size, elapsed
+
+
+for label, compact in (("dict", False), ("AttrRecord", True)):
+    size, elapsed = measure(compact)
+    print(f"{label:>10}: {size / 1024 / 1024:10.2f} MB, {size / args.count:8.1f} B/item, {elapsed:.3f} s")
+
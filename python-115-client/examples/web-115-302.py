@@ -59,6 +59,8 @@ parser.add_argument("-H", "--host", default="0.0.0.0", help="ip 或 hostname，
 parser.add_argument("-p", "--port", default=80, type=int, help="端口号，默认值 80")
 parser.add_argument("-c", "--cookies", help="115 登录 cookies，优先级高于 -c/--cookies-path")
 parser.add_argument("-cp", "--cookies-path", help="存储 115 登录 cookies 的文本文件的路径，如果缺失，则从 115-cookies.txt 文件中获取，此文件可以在 1. 当前工作目录、2. 用户根目录 或者 3. 此脚本所在目录 下")
+parser.add_argument("-db", "--cache-db", help="把文件信息缓存到此 sqlite 数据库文件，重启后可以直接复用")
+parser.add_argument("-s", "--sync-interval", default=0, type=float, help="（需要 -db/--cache-db）每隔多少秒从操作记录中增量同步缓存，同步的位置保存在数据库旁边的 .cursor 文件中，默认值 0，即不同步")
 parser.add_argument("-v", "--version", action="store_true", help="输出版本号")
 args = parser.parse_args()
 if args.version:
@@ -70,7 +72,7 @@ try:
     from flask import request, redirect, render_template_string, send_file, Flask, Response
     from flask_compress import Compress
     from httpx import HTTPStatusError
-    from p115 import P115Client, P115FileSystem
+    from p115 import P115Client, P115FileSystem, P115LifeSyncer, P115SQLiteCache
     from posixpatht import escape
 except ImportError:
     from sys import executable
@@ -80,7 +82,7 @@ except ImportError:
     from flask import request, redirect, render_template_string, send_file, Flask, Response
     from flask_compress import Compress # type: ignore
     from httpx import HTTPStatusError
-    from p115 import P115Client, P115FileSystem
+    from p115 import P115Client, P115FileSystem, P115LifeSyncer, P115SQLiteCache
     from posixpatht import escape
 
 from mimetypes import guess_type
@@ -135,7 +137,18 @@ client = P115Client(cookies, app="qandroid")
 device = client.login_device()["icon"]
 if cookies_path and cookies != client.cookies:
     open(cookies_path, "w").write(client.cookies)
-fs = P115FileSystem(client, path_to_id=LRUCache(65536))
+if args.cache_db:
+    from atexit import register
+
+    cache = P115SQLiteCache(args.cache_db)
+    register(cache.close)
+    if args.sync_interval > 0:
+        fs = P115FileSystem(client, attr_cache=cache.attr_cache, path_to_id=cache.path_to_id, get_version=None)
+        P115LifeSyncer(fs, cursor_file=args.cache_db + ".cursor", interval=args.sync_interval).start()
+    else:
+        fs = P115FileSystem(client, attr_cache=cache.attr_cache, path_to_id=cache.path_to_id)
+else:
+    fs = P115FileSystem(client, path_to_id=LRUCache(65536))
 lock = Lock()
 
 KEYS = (
@@ -103,6 +103,8 @@ def main(args):
         min_depth=args.min_depth, 
         max_depth=args.max_depth, 
         topdown=True if args.depth_first else None, 
+        max_readdir_workers=args.max_workers, 
+        max_readdir_rate=args.max_rate, 
     )
 
     output_file = args.output_file
@@ -261,6 +263,8 @@ parser.add_argument("-o", "--output-file", help="保存到文件，此时命令
 parser.add_argument("-m", "--min-depth", default=0, type=int, help="最小深度，默认值 0，小于或等于 0 时不限")
 parser.add_argument("-M", "--max-depth", default=-1, type=int, help="最大深度，默认值 -1，小于 0 时不限")
 parser.add_argument("-dfs", "--depth-first", action="store_true", help="使用深度优先搜索，否则使用广度优先")
+parser.add_argument("-w", "--max-workers", default=1, type=int, help="同时拉取目录列表的最大并发数，默认值 1，大于 1 时并发地广度优先搜索（输出顺序为拉取完成的顺序）")
+parser.add_argument("-r", "--max-rate", type=float, help="每秒最多发起的目录列表请求数，默认不限")
 parser.add_argument("-v", "--version", action="store_true", help="输出版本号")
 parser.set_defaults(func=main)
 
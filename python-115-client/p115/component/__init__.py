@@ -16,10 +16,26 @@ from . import client
 __all__.extend(client.__all__)
 from .client import *
 
+from . import filehash
+__all__.extend(filehash.__all__)
+from .filehash import *
+
 from . import fs
 __all__.extend(fs.__all__)
 from .fs import *
 
+from . import fs_async
+__all__.extend(fs_async.__all__)
+from .fs_async import *
+
+from . import fs_cache
+__all__.extend(fs_cache.__all__)
+from .fs_cache import *
+
+from . import fs_sync
+__all__.extend(fs_sync.__all__)
+from .fs_sync import *
+
 from . import fs_share
 __all__.extend(fs_share.__all__)
 from .fs_share import *
@@ -36,6 +52,10 @@ from . import offline
 __all__.extend(offline.__all__)
 from .offline import *
 
+from . import ratelimit
+__all__.extend(ratelimit.__all__)
+from .ratelimit import *
+
 from . import recyclebin
 __all__.extend(recyclebin.__all__)
 from .recyclebin import *
@@ -44,6 +64,10 @@ from . import sharing
 __all__.extend(sharing.__all__)
 from .sharing import *
 
+from . import transport
+__all__.extend(transport.__all__)
+from .transport import *
+
 # TODO upload_tree 多线程和进度条，并且为每一个上传返回一个 task，可重试
 # TODO 能及时处理文件已不存在
 # TODO 为各个fs接口添加额外的请求参数
@@ -4,18 +4,26 @@
 from __future__ import annotations
 
 __author__ = "ChenyangGao <https://chenyanggao.github.io>"
-__all__ = ["check_response", "P115Client", "ExportDirStatus", "PushExtractProgress", "ExtractProgress"]
+__all__ = [
+    "check_response", "P115Client", "DownloadUrlCache", "ExportDirStatus", "PushExtractProgress", 
+    "ExtractProgress", 
+]
 
 import errno
 
-from asyncio import to_thread
+from asyncio import (
+    as_completed as async_as_completed, ensure_future, get_running_loop, shield, 
+    sleep as async_sleep, to_thread, 
+    CancelledError, Future as AsyncFuture, Semaphore, Task, 
+)
 from base64 import b64encode
 from binascii import b2a_hex
+from collections import deque, OrderedDict
 from collections.abc import (
     AsyncGenerator, AsyncIterable, AsyncIterator, Awaitable, Callable, Generator, Iterable, 
     Iterator, Mapping, Sequence, 
 )
-from concurrent.futures import Future
+from concurrent.futures import as_completed, Future, ThreadPoolExecutor
 from contextlib import asynccontextmanager, aclosing, closing
 from datetime import date, datetime
 from email.utils import formatdate
@@ -25,18 +33,19 @@ from hmac import digest as hmac_digest
 from http.cookiejar import Cookie, CookieJar
 from http.cookies import Morsel
 from inspect import iscoroutinefunction
-from itertools import chain, count, takewhile
+from itertools import chain, count
 from json import dumps, loads
+from mmap import mmap, ACCESS_READ
 from os import fsdecode, fspath, fstat, stat, PathLike
 from os import path as ospath
 from re import compile as re_compile
-from threading import Condition, Thread
+from threading import Condition, Lock, Thread
 from time import sleep, strftime, strptime, time
 from typing import (
     cast, overload, Any, Final, Literal, Never, NotRequired, Self, 
     TypeVar, TypedDict
 )
-from urllib.parse import quote, urlencode, urlsplit
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
 from uuid import uuid4
 from xml.etree.ElementTree import fromstring
 
@@ -54,7 +63,7 @@ from filewrap import (
 from hashtools import file_digest, file_digest_async
 from http_request import encode_multipart_data, encode_multipart_data_async, SupportsGeturl
 from http_response import get_content_length, get_filename, get_total_length, is_range_request
-from httpfile import HTTPFileReader
+from httpfile import AsyncHTTPFileReader, HTTPFileReader
 from httpx import AsyncClient, Client, Cookies, TimeoutException
 from httpx_request import request as httpx_request
 from iterutils import through, async_through, wrap_iter, wrap_aiter
@@ -66,6 +75,9 @@ from yarl import URL
 
 from .cipher import P115RSACipher, P115ECDHCipher, MD5_SALT
 from .exception import AuthenticationError, LoginError, MultipartUploadAbort
+from .filehash import file_sha1
+from .ratelimit import P115RequestScheduler
+from .transport import make_session, CachedResolver, SessionStats
 
 
 RequestVarT = TypeVar("RequestVarT", dict, Callable)
@@ -178,6 +190,147 @@ class UrlStr(str):
         return str(self)
 
 
+class DownloadUrlCache:
+    """下载链接的缓存，键一般为 (pickcode, user-agent, use_web_api)
+
+    - 从链接的查询参数 t 中解析过期时间，在过期前 `expire_margin` 秒就失效
+    - 对同一个键的并发请求会被合并为一次请求
+    - 用 `hits`、`misses` 和 `coalesced` 统计命中、未命中和被合并的请求数
+
+    :param maxsize: 最多缓存的链接数，超过后淘汰最久未使用的
+    :param expire_margin: 在过期前多少秒失效
+    """
+    def __init__(self, /, maxsize: int = 4096, expire_margin: float = 300):
+        self.maxsize = maxsize
+        self.expire_margin = expire_margin
+        self.data: OrderedDict[tuple, tuple[float, UrlStr]] = OrderedDict()
+        self.pending: dict[tuple, Future] = {}
+        self.async_pending: dict[tuple, AsyncFuture] = {}
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self, /) -> int:
+        return len(self.data)
+
+    def __repr__(self, /) -> str:
+        return f"{type(self).__qualname__}({self.stats})"
+
+    @staticmethod
+    def get_expire_time(url: str, /) -> None | float:
+        "从链接中解析过期时间（时间戳）"
+        for key, val in parse_qsl(urlsplit(url).query):
+            if key == "t":
+                try:
+                    return float(val)
+                except ValueError:
+                    break
+        return None
+
+    @property
+    def stats(self, /) -> dict:
+        return {"size": len(self.data), "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+    def clear(self, /):
+        with self.lock:
+            self.data.clear()
+
+    def get(self, key: tuple, /) -> None | UrlStr:
+        "获取未过期的链接，找不到则返回 None（不计入统计）"
+        with self.lock:
+            return self._get(key)
+
+    def _get(self, key: tuple, /) -> None | UrlStr:
+        data = self.data
+        try:
+            expire_time, url = data[key]
+        except KeyError:
+            return None
+        if time() + self.expire_margin >= expire_time:
+            del data[key]
+            return None
+        data.move_to_end(key)
+        return url
+
+    def set(self, key: tuple, url: UrlStr, /):
+        "缓存链接，如果没有过期时间，或者快要过期，则不缓存"
+        expire_time = self.get_expire_time(url)
+        if expire_time is None or time() + self.expire_margin >= expire_time:
+            return
+        with self.lock:
+            data = self.data
+            data[key] = (expire_time, url)
+            data.move_to_end(key)
+            while len(data) > self.maxsize:
+                data.popitem(last=False)
+
+    def fetch(self, key: tuple, get_url: Callable[[], UrlStr], /) -> UrlStr:
+        "获取链接，缓存中没有时调用 `get_url`，同一个键同时只会有一次调用"
+        with self.lock:
+            if (url := self._get(key)) is not None:
+                self.hits += 1
+                return url
+            try:
+                fu = self.pending[key]
+            except KeyError:
+                fu = self.pending[key] = Future()
+                self.misses += 1
+                is_owner = True
+            else:
+                self.coalesced += 1
+                is_owner = False
+        if not is_owner:
+            return fu.result()
+        try:
+            url = get_url()
+        except BaseException as e:
+            fu.set_exception(e)
+            raise
+        else:
+            self.set(key, url)
+            fu.set_result(url)
+            return url
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+    async def async_fetch(self, key: tuple, get_url: Callable[[], Awaitable[UrlStr]], /) -> UrlStr:
+        "获取链接，缓存中没有时调用 `get_url`，同一个键同时只会有一次调用"
+        with self.lock:
+            if (url := self._get(key)) is not None:
+                self.hits += 1
+                return url
+            try:
+                fu = self.async_pending[key]
+            except KeyError:
+                fu = self.async_pending[key] = get_running_loop().create_future()
+                self.misses += 1
+                is_owner = True
+            else:
+                self.coalesced += 1
+                is_owner = False
+        if not is_owner:
+            return await shield(fu)
+        try:
+            url = await get_url()
+        except CancelledError:
+            fu.cancel()
+            raise
+        except BaseException as e:
+            fu.set_exception(e)
+            # NOTE: 避免没有其它等待者时，报告异常未被获取
+            fu.exception()
+            raise
+        else:
+            self.set(key, url)
+            fu.set_result(url)
+            return url
+        finally:
+            with self.lock:
+                self.async_pending.pop(key, None)
+
+
 class MultipartResumeData(TypedDict):
     bucket: str
     object: str
@@ -227,7 +380,11 @@ class P115Client:
         cookies: None | str | Mapping[str, str] | Cookies | Iterable[Mapping | Cookie | Morsel] = None, 
         app: str = "web", 
         open_qrcode_on_console: bool = True, 
+        request_scheduler: None | P115RequestScheduler = None, 
     ):
+        """
+        :param request_scheduler: 请求调度器，按接口限速、控制并发并重试，如果为 None，则直接发送请求
+        """
         self.__dict__.update(
             headers = CIMultiDict({
                 "Accept": "application/json, text/plain, */*", 
@@ -236,6 +393,9 @@ class P115Client:
                 "User-Agent": "Mozilla/5.0 AppleWebKit/600 Safari/600 Chrome/124.0.0.0 115disk/" + APP_VERSION, 
             }), 
             cookies = Cookies(), 
+            request_scheduler = request_scheduler, 
+            session_options = {}, 
+            session_stats = None, 
         )
         if cookies is None:
             resp = self.login_with_qrcode(app, open_qrcode_on_console=open_qrcode_on_console)
@@ -260,7 +420,11 @@ class P115Client:
         """同步请求的 session
         """
         ns = self.__dict__
-        session = Client(verify=False)
+        session: Client
+        if ns["session_options"] or ns["session_stats"] is not None:
+            session = make_session(False, **ns["session_options"], stats=ns["session_stats"])
+        else:
+            session = Client(verify=False)
         session._headers = ns["headers"]
         session._cookies = ns["cookies"]
         return session
@@ -270,11 +434,55 @@ class P115Client:
         """异步请求的 session
         """
         ns = self.__dict__
-        session = AsyncClient(verify=False)
+        session: AsyncClient
+        if ns["session_options"] or ns["session_stats"] is not None:
+            session = make_session(True, **ns["session_options"], stats=ns["session_stats"])
+        else:
+            session = AsyncClient(verify=False)
         session._headers = ns["headers"]
         session._cookies = ns["cookies"]
         return session
 
+    def configure_session(
+        self, 
+        /, 
+        max_connections: None | int = 100, 
+        max_keepalive_connections: None | int = 20, 
+        keepalive_expiry: None | float = 5, 
+        http2: bool = False, 
+        per_host: None | Mapping[str, int] = None, 
+        dns_cache_ttl: None | float = None, 
+        stats: bool = False, 
+    ):
+        """调整 `session` 和 `async_session` 的连接池，已经创建的会话会被丢弃，下次使用时按新的配置重建
+
+        :param max_connections: 连接池的最大连接数，为 None 时不限
+        :param max_keepalive_connections: 最多保持多少个空闲连接
+        :param keepalive_expiry: 空闲连接保持的秒数
+        :param http2: 是否启用 HTTP/2 多路复用（需要安装 h2，例如 `pip install httpx[http2]`）
+        :param per_host: 为这些主机单独建立连接池，主机名 → 最大连接数，例如 {"webapi.115.com": 32, "proapi.115.com": 16}
+        :param dns_cache_ttl: DNS 缓存的秒数，为 None 时不缓存
+        :param stats: 是否统计连接池的使用情况，统计结果可以从 `session_stats` 获取
+
+        NOTE: 没有调用此方法时，会话和 httpx 的默认会话一样（包括读取环境变量中的代理设置）
+        """
+        self.__dict__["session_options"] = {
+            "max_connections": max_connections, 
+            "max_keepalive_connections": max_keepalive_connections, 
+            "keepalive_expiry": keepalive_expiry, 
+            "http2": http2, 
+            "per_host": per_host, 
+            "resolver": None if dns_cache_ttl is None else CachedResolver(dns_cache_ttl), 
+        }
+        self.__dict__["session_stats"] = SessionStats() if stats else None
+        self.close()
+
+    @cached_property
+    def download_url_cache(self, /) -> DownloadUrlCache:
+        """`download_url` 所用的下载链接缓存
+        """
+        return DownloadUrlCache()
+
     @property
     def cookiejar(self, /) -> CookieJar:
         return self.__dict__["cookies"].jar
@@ -333,15 +541,23 @@ class P115Client:
         async_: Literal[False, True] = False, 
         **request_kwargs, 
     ):
-        """帮助函数：可执行同步和异步的网络请求
+        """帮助函数：可执行同步和异步的网络请求，如果设置了 `request_scheduler`，则经由它调度
         """
-        return request(
+        call = partial(
+            request, 
             url, 
             method=method, 
             async_=async_, 
             session=self.async_session if async_ else self.session, # type: ignore
             **request_kwargs, 
         )
+        scheduler = self.request_scheduler
+        if scheduler is None:
+            return call()
+        elif async_:
+            return scheduler.request_async(call, url, method)
+        else:
+            return scheduler.request(call, url, method)
 
     ########## Login API ##########
 
@@ -1813,6 +2029,114 @@ class P115Client:
         request_kwargs.pop("parse", None)
         return self.request(api, params=payload, async_=async_, **request_kwargs)
 
+    @overload
+    def fs_files_iter(
+        self, 
+        payload: int | dict, 
+        /, 
+        total: None | int = None, 
+        max_workers: int = 1, 
+        async_: Literal[False] = False, 
+        **request_kwargs, 
+    ) -> Iterator[dict]:
+        ...
+    @overload
+    def fs_files_iter(
+        self, 
+        payload: int | dict, 
+        /, 
+        total: None | int, 
+        max_workers: int, 
+        async_: Literal[True], 
+        **request_kwargs, 
+    ) -> AsyncIterator[dict]:
+        ...
+    def fs_files_iter(
+        self, 
+        payload: int | dict = 0, 
+        /, 
+        total: None | int = None, 
+        max_workers: int = 1, 
+        async_: Literal[False, True] = False, 
+        **request_kwargs, 
+    ) -> Iterator[dict] | AsyncIterator[dict]:
+        """帮助函数：迭代器，从 `offset` 开始，逐页获取文件夹的中的文件列表（每次产出一个响应），此接口是对 `fs_files` 的封装
+        :param payload: 同 `fs_files`，其中 `limit` 即是每页大小
+        :param total: 最多获取这么多个条目，如果为 None，则直到最后
+        :param max_workers: 最大并发数。第 1 页的响应会给出 `count`，如果大于 1，则剩余的页会被并发拉取，但依然按顺序产出
+        :param async_: 是否异步
+        :param request_kwargs: 其它请求参数
+
+        NOTE: 如果在迭代过程中，文件夹的条目数发生了变化，则抛出 RuntimeError
+        """
+        if isinstance(payload, int):
+            payload = {"cid": payload}
+        payload = {"limit": 32, "offset": 0, **payload}
+        page_size = int(payload["limit"])
+        if page_size <= 0:
+            page_size = payload["limit"] = 32
+        offset = int(payload["offset"])
+        if max_workers <= 0:
+            max_workers = 1
+        def iter_payloads(count: int, /) -> Iterator[dict]:
+            stop = count if total is None else min(count, offset + total)
+            for start in range(offset + page_size, stop, page_size):
+                yield {**payload, "offset": start, "limit": min(page_size, stop - start)}
+        def check_count(resp: dict, count: int, /) -> dict:
+            check_response(resp)
+            if resp["count"] != count:
+                raise RuntimeError(f"{payload['cid']} detected count changes during iteration")
+            return resp
+        if total is not None and total < page_size:
+            payload["limit"] = max(total, 1)
+        if async_:
+            async def async_request():
+                nonlocal async_
+                async_ = cast(Literal[True], async_)
+                resp = check_response(await self.fs_files(payload, async_=async_, **request_kwargs))
+                yield resp
+                count = resp["count"]
+                if max_workers == 1:
+                    for page_payload in iter_payloads(count):
+                        yield check_count(
+                            await self.fs_files(page_payload, async_=async_, **request_kwargs), count)
+                    return
+                tasks: deque[Task] = deque()
+                try:
+                    for page_payload in iter_payloads(count):
+                        tasks.append(ensure_future(self.fs_files(page_payload, async_=async_, **request_kwargs)))
+                        if len(tasks) >= max_workers:
+                            yield check_count(await tasks.popleft(), count)
+                    while tasks:
+                        yield check_count(await tasks.popleft(), count)
+                finally:
+                    for task in tasks:
+                        task.cancel()
+            return async_request()
+        else:
+            def request():
+                resp = check_response(self.fs_files(payload, async_=async_, **request_kwargs))
+                yield resp
+                count = resp["count"]
+                if max_workers == 1:
+                    for page_payload in iter_payloads(count):
+                        yield check_count(
+                            self.fs_files(page_payload, async_=async_, **request_kwargs), count)
+                    return
+                futures: deque[Future] = deque()
+                executor = ThreadPoolExecutor(max_workers)
+                try:
+                    submit = executor.submit
+                    for page_payload in iter_payloads(count):
+                        futures.append(submit(self.fs_files, page_payload, async_=async_, **request_kwargs))
+                        if len(futures) >= max_workers:
+                            yield check_count(futures.popleft().result(), count)
+                    while futures:
+                        yield check_count(futures.popleft().result(), count)
+                finally:
+                    executor.shutdown(False, cancel_futures=True)
+            return request()
+
     @overload
     def fs_files2(
         self, 
@@ -2580,7 +2904,6 @@ class P115Client:
         request_kwargs.pop("parse", None)
         return self.request(api, params=payload, async_=async_, **request_kwargs)
 
-    # TODO 支持异步
     @overload
     def fs_export_dir_future(
         self, 
@@ -2597,7 +2920,7 @@ class P115Client:
         /,
         async_: Literal[True], 
         **request_kwargs, 
-    ) -> Awaitable[ExportDirStatus]:
+    ) -> Awaitable[dict]:
         ...
     def fs_export_dir_future(
         self, 
@@ -2605,13 +2928,24 @@ class P115Client:
         /,
         async_: Literal[False, True] = False, 
         **request_kwargs, 
-    ) -> ExportDirStatus | Awaitable[ExportDirStatus]:
+    ) -> ExportDirStatus | Awaitable[dict]:
         """执行导出目录树，新开启一个线程，用于检查完成状态
+        异步时，则返回一个协程，在事件循环中轮询，完成后返回导出结果（和 `ExportDirStatus.result()` 相同）
         payload:
             file_ids: int | str   # 有多个时，用逗号 "," 隔开
             target: str = "U_1_0" # 导出目录树到这个目录
             layer_limit: int = <default> # 层级深度，自然数
         """
+        if async_:
+            async def async_request():
+                resp = check_response(await self.fs_export_dir(payload, async_=True, **request_kwargs))
+                payload_ = {"export_id": resp["data"]["export_id"]}
+                for interval in ExportDirStatus.iter_intervals():
+                    data = check_response(await self.fs_export_dir_status(payload_, async_=True))["data"]
+                    if data:
+                        return data
+                    await async_sleep(interval)
+            return async_request()
         resp = check_response(self.fs_export_dir(payload, **request_kwargs))
         return ExportDirStatus(self, resp["data"]["export_id"])
 
@@ -3775,6 +4109,7 @@ class P115Client:
         detail: bool = False, 
         strict: bool = True, 
         use_web_api: bool = False,
+        use_cache: bool = True, 
         async_: Literal[False] = False, 
         **request_kwargs, 
     ) -> str:
@@ -3787,6 +4122,7 @@ class P115Client:
         detail: bool, 
         strict: bool, 
         use_web_api: bool,
+        use_cache: bool, 
         async_: Literal[True], 
         **request_kwargs, 
     ) -> Awaitable[str]:
@@ -3798,11 +4134,42 @@ class P115Client:
         detail: bool = False, 
         strict: bool = True, 
         use_web_api: bool = False,
+        use_cache: bool = True, 
         async_: Literal[False, True] = False, 
         **request_kwargs, 
     ) -> str | Awaitable[str]:
         """获取文件的下载链接，此接口是对 `download_url_app` 的封装
+
+        :param use_cache: 是否使用 `self.download_url_cache`，以 (pickcode, user-agent, use_web_api) 为键缓存链接直到快要过期
         """
+        if use_cache:
+            headers = request_kwargs.get("headers") or {}
+            user_agent = next(
+                (v for k, v in headers.items() if k.lower() == "user-agent"), 
+                self.headers.get("User-Agent", ""), 
+            )
+            key = (pickcode, user_agent, use_web_api)
+            cache = self.download_url_cache
+            def get_url():
+                return self.download_url(
+                    pickcode, 
+                    detail=True, 
+                    strict=False, 
+                    use_web_api=use_web_api, 
+                    use_cache=False, 
+                    async_=async_, # type: ignore
+                    **request_kwargs, 
+                )
+            def check_url(url: UrlStr) -> str:
+                if strict and not use_web_api and url["is_directory"]:
+                    raise IsADirectoryError(errno.EISDIR, f"{url['id']} is a directory")
+                return url if detail else str(url)
+            if async_:
+                async def async_request() -> str:
+                    return check_url(await cache.async_fetch(key, get_url))
+                return async_request()
+            else:
+                return check_url(cache.fetch(key, get_url))
         if use_web_api:
             resp = self.download_url_web(
                 {"pickcode": pickcode}, 
@@ -4548,6 +4915,225 @@ class P115Client:
                 **request_kwargs, 
             )
 
+    @overload
+    def _oss_multipart_upload_concurrent(
+        self, 
+        /, 
+        file: str | PathLike | Buffer, 
+        bucket: str, 
+        object: str, 
+        callback: dict, 
+        token: None | dict, 
+        upload_id: None | str, 
+        partsize: int, 
+        make_reporthook: None | Callable[[None | int], Callable[[int], Any] | Generator[int, Any, Any]] = None, 
+        max_workers: int = 4, 
+        async_: Literal[False] = False, 
+        **request_kwargs, 
+    ) -> dict:
+        ...
+    @overload
+    def _oss_multipart_upload_concurrent(
+        self, 
+        /, 
+        file: str | PathLike | Buffer, 
+        bucket: str, 
+        object: str, 
+        callback: dict, 
+        token: None | dict, 
+        upload_id: None | str, 
+        partsize: int, 
+        make_reporthook: None | Callable[[None | int], Callable[[int], Any] | Generator[int, Any, Any] | AsyncGenerator[int, Any]], 
+        max_workers: int, 
+        async_: Literal[True], 
+        **request_kwargs, 
+    ) -> Awaitable[dict]:
+        ...
+    def _oss_multipart_upload_concurrent(
+        self, 
+        /, 
+        file: str | PathLike | Buffer, 
+        bucket: str, 
+        object: str, 
+        callback: dict, 
+        token: None | dict = None, 
+        upload_id: None | str = None, 
+        partsize: int = 10 * 1 << 20, # default to: 10 MB
+        make_reporthook: None | Callable[[None | int], Callable[[int], Any] | Generator[int, Any, Any] | AsyncGenerator[int, Any]] = None, 
+        max_workers: int = 4, 
+        async_: Literal[False, True] = False, 
+        **request_kwargs, 
+    ) -> dict | Awaitable[dict]:
+        """帮助函数：分片上传本地文件或内存中的数据，最多同时上传 `max_workers` 个分片
+
+        本地文件会用 mmap 映射，每个分片都是映射内存的一个切片，不会复制数据。
+        如果提供了 `upload_id`，则罗列已经上传的分片，只上传缺少的那些分片（允许有空洞），
+        完成时按分片序号排序，中途出错则抛出 `MultipartUploadAbort`，以便续传。
+        """
+        url = self.upload_endpoint_url(bucket, object)
+
+        def open_view() -> tuple[memoryview, Callable[[], Any]]:
+            if isinstance(file, (str, PathLike)):
+                with open(file, "rb") as f:
+                    if not fstat(f.fileno()).st_size:
+                        return memoryview(b""), lambda: None
+                    # NOTE: 关闭文件后，映射依然有效
+                    mm = mmap(f.fileno(), 0, access=ACCESS_READ)
+                view = memoryview(mm)
+                def close():
+                    view.release()
+                    try:
+                        mm.close()
+                    except BufferError:
+                        pass
+                return view, close
+            view = memoryview(file)
+            if view.ndim != 1 or view.format not in ("B", "b", "c"):
+                view = view.cast("B")
+            return view, view.release
+
+        def get_part(view: memoryview, part_number: int, /) -> memoryview:
+            start = (part_number - 1) * partsize
+            return view[start:start+partsize]
+
+        def plan(view: memoryview, uploaded: Iterable[dict], /) -> tuple[dict[int, dict], list[int]]:
+            filesize = len(view)
+            nparts = max(1, -(-filesize // partsize))
+            done: dict[int, dict] = {}
+            for part in uploaded:
+                part_number = part["PartNumber"]
+                if 1 <= part_number <= nparts and part["Size"] == len(get_part(view, part_number)):
+                    done[part_number] = part
+            return done, [n for n in range(1, nparts + 1) if n not in done]
+
+        if async_:
+            async def async_request():
+                nonlocal token, upload_id
+                if not token:
+                    token = await self.upload_token(async_=True)
+                view, close = open_view()
+                try:
+                    if upload_id:
+                        done, todo = plan(view, [part async for part in self._oss_multipart_part_iter(
+                            bucket, object, url, token, upload_id, async_=True, **request_kwargs)])
+                    else:
+                        upload_id = await self._oss_multipart_upload_init(
+                            bucket, object, url, token, async_=True, **request_kwargs)
+                        done, todo = plan(view, ())
+                    multipart_resume_data = {
+                        "bucket": bucket, "object": object, "upload_id": upload_id, 
+                        "callback": callback, "partsize": partsize, "filesize": len(view), 
+                    }
+                    try:
+                        sema = Semaphore(max_workers)
+                        async def upload(part_number: int, /) -> dict:
+                            async with sema:
+                                return await self._oss_multipart_upload_part(
+                                    get_part(view, part_number), 
+                                    bucket, 
+                                    object, 
+                                    url, 
+                                    cast(dict, token), 
+                                    cast(str, upload_id), 
+                                    part_number, 
+                                    partsize=partsize, 
+                                    async_=True, 
+                                    **request_kwargs, 
+                                )
+                        tasks = [ensure_future(upload(n)) for n in todo]
+                        async def iter_parts():
+                            try:
+                                for n in sorted(done):
+                                    yield get_part(view, n)
+                                for fu in async_as_completed(tasks):
+                                    part = await fu
+                                    done[part["PartNumber"]] = part
+                                    yield get_part(view, part["PartNumber"])
+                            finally:
+                                for task in tasks:
+                                    task.cancel()
+                        if callable(make_reporthook):
+                            await async_through(progress_bytes_async_iter(iter_parts(), make_reporthook, len(view)))
+                        else:
+                            await async_through(iter_parts())
+                        return await self._oss_multipart_upload_complete(
+                            bucket, 
+                            object, 
+                            callback, 
+                            url, 
+                            token, 
+                            upload_id, 
+                            parts=[done[n] for n in sorted(done)], 
+                            async_=True, 
+                            **request_kwargs, 
+                        )
+                    except BaseException as e:
+                        raise MultipartUploadAbort(multipart_resume_data) from e
+                finally:
+                    close()
+            return async_request()
+        else:
+            if not token:
+                token = self.upload_token()
+            view, close = open_view()
+            try:
+                if upload_id:
+                    done, todo = plan(view, self._oss_multipart_part_iter(
+                        bucket, object, url, token, upload_id, **request_kwargs))
+                else:
+                    upload_id = self._oss_multipart_upload_init(
+                        bucket, object, url, token, **request_kwargs)
+                    done, todo = plan(view, ())
+                multipart_resume_data = {
+                    "bucket": bucket, "object": object, "upload_id": upload_id, 
+                    "callback": callback, "partsize": partsize, "filesize": len(view), 
+                }
+                try:
+                    executor = ThreadPoolExecutor(max_workers)
+                    try:
+                        futures = [
+                            executor.submit(
+                                self._oss_multipart_upload_part, 
+                                get_part(view, n), 
+                                bucket, 
+                                object, 
+                                url, 
+                                token, 
+                                upload_id, 
+                                n, 
+                                partsize=partsize, 
+                                **request_kwargs, 
+                            )
+                            for n in todo
+                        ]
+                        def iter_parts():
+                            for n in sorted(done):
+                                yield get_part(view, n)
+                            for fu in as_completed(futures):
+                                part = fu.result()
+                                done[part["PartNumber"]] = part
+                                yield get_part(view, part["PartNumber"])
+                        if callable(make_reporthook):
+                            through(progress_bytes_iter(iter_parts(), make_reporthook, len(view)))
+                        else:
+                            through(iter_parts())
+                    finally:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                    return self._oss_multipart_upload_complete(
+                        bucket, 
+                        object, 
+                        callback, 
+                        url, 
+                        token, 
+                        upload_id, 
+                        parts=[done[n] for n in sorted(done)], 
+                        **request_kwargs, 
+                    )
+                except BaseException as e:
+                    raise MultipartUploadAbort(multipart_resume_data) from e
+            finally:
+                close()
+
     # TODO: 返回一个task，初始化成功后，生成 {"bucket": bucket, "object": object, "upload_id": upload_id, "callback": callback, "partsize": partsize, "filesize": filesize}
     @overload
     def _oss_multipart_upload(
@@ -4563,6 +5149,7 @@ class P115Client:
         partsize: int, 
         filesize: int = -1, 
         make_reporthook: None | Callable[[None | int], Callable[[int], Any] | Generator[int, Any, Any]] = None, 
+        max_workers: int = 1, 
         async_: Literal[False] = False, 
         **request_kwargs, 
     ) -> dict:
@@ -4581,6 +5168,7 @@ class P115Client:
         partsize: int, 
         filesize: int, 
         make_reporthook: None | Callable[[None | int], Callable[[int], Any] | Generator[int, Any, Any] | AsyncGenerator[int, Any]], 
+        max_workers: int, 
         async_: Literal[True], 
         **request_kwargs, 
     ) -> Awaitable[dict]:
@@ -4598,16 +5186,35 @@ class P115Client:
         partsize: int = 10 * 1 << 20, # default to: 10 MB
         filesize: int = -1, 
         make_reporthook: None | Callable[[None | int], Callable[[int], Any] | Generator[int, Any, Any] | AsyncGenerator[int, Any]] = None, 
+        max_workers: int = 1, 
         async_: Literal[False, True] = False, 
         **request_kwargs, 
     ) -> dict | Awaitable[dict]:
-        url = self.upload_endpoint_url(bucket, object)
-        parts: list[dict] = []
+        """帮助函数：分片上传
+
+        :param max_workers: 最大并发上传的分片数，只对本地文件路径和 `Buffer` 有效，其它类型的 `file` 依然逐个分片上传
+        """
         if hasattr(file, "getbuffer"):
             try:
-                file = getattr(self, "getbuffer")()
+                file = getattr(file, "getbuffer")()
             except TypeError:
                 pass
+        if max_workers > 1 and isinstance(file, (str, PathLike, Buffer)):
+            return self._oss_multipart_upload_concurrent(
+                file, 
+                bucket, 
+                object, 
+                callback, 
+                token=token, 
+                upload_id=upload_id, 
+                partsize=partsize, 
+                make_reporthook=make_reporthook, 
+                max_workers=max_workers, 
+                async_=async_, # type: ignore
+                **request_kwargs, 
+            )
+        url = self.upload_endpoint_url(bucket, object)
+        parts: list[dict] = []
         if async_:
             async def async_request():
                 nonlocal async_, file, token, upload_id
@@ -4621,7 +5228,7 @@ class P115Client:
                         async for part in self._oss_multipart_part_iter(
                             bucket, object, url, token, upload_id, async_=async_, **request_kwargs, 
                         ):
-                            if part["Size"] != partsize:
+                            if part["Size"] != partsize or part["PartNumber"] != len(parts) + 1:
                                 break
                             parts.append(part)
                         skipsize = sum(part["Size"] for part in parts)
@@ -4757,11 +5364,12 @@ class P115Client:
                 token = self.upload_token(async_=async_)
             skipsize = 0
             if upload_id:
-                parts.extend(takewhile(
-                    lambda p: p["Size"] == partsize, 
-                    self._oss_multipart_part_iter(
-                        bucket, object, url, token, upload_id, async_=async_, **request_kwargs)
-                ))
+                for part in self._oss_multipart_part_iter(
+                    bucket, object, url, token, upload_id, async_=async_, **request_kwargs, 
+                ):
+                    if part["Size"] != partsize or part["PartNumber"] != len(parts) + 1:
+                        break
+                    parts.append(part)
                 skipsize = sum(part["Size"] for part in parts)
                 if skipsize:
                     file_skipped = False
@@ -4771,10 +5379,10 @@ class P115Client:
                         file_skipped = True
                     elif isinstance(file, (URL, SupportsGeturl)):
                         if isinstance(file, URL):
-                            url = str(file)
+                            url_ = str(file)
                         else:
-                            url = file.geturl()
-                        file = urlopen(url, headers={"Range": f"bytes={skipsize}-"})
+                            url_ = file.geturl()
+                        file = urlopen(url_, headers={"Range": f"bytes={skipsize}-"})
                         file_skipped = is_range_request(file)
                     if isinstance(file, Buffer):
                         file = memoryview(file)[skipsize:]
@@ -4804,10 +5412,10 @@ class P115Client:
                     file = open(file, "rb")
                 elif isinstance(file, (URL, SupportsGeturl)):
                     if isinstance(file, URL):
-                        url = str(file)
+                        url_ = str(file)
                     else:
-                        url = file.geturl()
-                    file = urlopen(url)
+                        url_ = file.geturl()
+                    file = urlopen(url_)
                 if isinstance(file, Buffer):
                     dataiter = bytes_to_chunk_iter(file, partsize)
                 elif isinstance(file, SupportsRead):
@@ -5389,6 +5997,7 @@ class P115Client:
         upload_directly: bool = False, 
         multipart_resume_data: None | MultipartResumeData = None, 
         make_reporthook: None | Callable[[None | int], Callable[[int], Any] | Generator[int, Any, Any]] = None, 
+        max_workers: int = 1, 
         async_: Literal[False] = False, 
         **request_kwargs, 
     ) -> dict:
@@ -5407,6 +6016,7 @@ class P115Client:
         upload_directly: bool, 
         multipart_resume_data: None | MultipartResumeData, 
         make_reporthook: None | Callable[[None | int], Callable[[int], Any] | Generator[int, Any, Any] | AsyncGenerator[int, Any]], 
+        max_workers: int, 
         async_: Literal[True], 
         **request_kwargs, 
     ) -> Awaitable[dict]:
@@ -5424,10 +6034,13 @@ class P115Client:
         upload_directly: bool = False, 
         multipart_resume_data: None | MultipartResumeData = None, 
         make_reporthook: None | Callable[[None | int], Callable[[int], Any] | Generator[int, Any, Any] | AsyncGenerator[int, Any]] = None, 
+        max_workers: int = 1, 
         async_: Literal[False, True] = False, 
         **request_kwargs, 
     ) -> dict | Awaitable[dict]:
         """文件上传接口，这是高层封装，推荐使用
+
+        :param max_workers: 分片上传时，最多同时上传的分片数（需要 `partsize > 0`，且 `file` 是本地路径或 `Buffer`）
         """
         if multipart_resume_data is not None:
             return self._oss_multipart_upload(
@@ -5439,6 +6052,7 @@ class P115Client:
                 partsize=multipart_resume_data["partsize"], 
                 filesize=multipart_resume_data.get("filesize", -1), 
                 make_reporthook=make_reporthook, # type: ignore
+                max_workers=max_workers, 
                 async_=async_, # type: ignore
                 **request_kwargs, 
             )
@@ -5500,6 +6114,7 @@ class P115Client:
                             partsize=partsize, 
                             filesize=filesize, 
                             make_reporthook=make_reporthook, 
+                            max_workers=max_workers, 
                             async_=True, 
                             **request_kwargs, 
                         )
@@ -5542,13 +6157,13 @@ class P115Client:
                             filesha1 = sha1(file).hexdigest()
                     else:
                         if not filesha1:
-                            async with ctx_async_read(path) as (file, _):
-                                _, hashobj = await file_digest_async(file, "sha1")
-                            filesha1 = hashobj.hexdigest()
+                            _, filesha1 = await to_thread(file_sha1, path)
                         async def read_range_bytes_or_hash(sign_check):
                             start, end = map(int, sign_check.split("-"))
                             async with ctx_async_read(path, start) as (_, read):
                                 return await read(end - start + 1)
+                        if partsize > 0 and max_workers > 1:
+                            return await do_upload(path)
                         async with ctx_async_read(path) as (file, _):
                             return await do_upload(file)
                 elif isinstance(file, SupportsRead):
@@ -5718,6 +6333,7 @@ class P115Client:
                         partsize=partsize, 
                         filesize=filesize, 
                         make_reporthook=make_reporthook, 
+                        max_workers=max_workers, 
                         async_=False, 
                         **request_kwargs, 
                     )
@@ -5745,14 +6361,16 @@ class P115Client:
                         filesha1 = sha1(file).hexdigest()
                 else:
                     if not filesha1:
-                        _, hashobj = file_digest(open(path, "rb"), "sha1")
-                        filesha1 = hashobj.hexdigest()
+                        _, filesha1 = file_sha1(path)
                     def read_range_bytes_or_hash(sign_check: str):
                         start, end = map(int, sign_check.split("-"))
                         with open(path, "rb") as file:
                             file.seek(start)
                             return sha1(file.read(end - start + 1)).hexdigest()
-                    file = open(path, "rb")
+                    if partsize > 0 and max_workers > 1:
+                        file = path
+                    else:
+                        file = open(path, "rb")
             elif isinstance(file, SupportsRead):
                 file_read: Callable[..., bytes] = getattr(file, "read")
                 file_seek = getattr(file, "seek", None)
@@ -7566,7 +8184,6 @@ class P115Client:
 
     ########## Other Encapsulations ##########
 
-    # TODO 支持异步
     @overload
     def open(
         self, 
@@ -7582,31 +8199,40 @@ class P115Client:
     def open(
         self, 
         /, 
-        url: str | Callable[[], str], 
+        url: str | Callable[[], str] | Callable[[], Awaitable[str]], 
         headers: None | Mapping, 
         start: int, 
         seek_threshold: int,
         async_: Literal[True], 
-    ) -> Awaitable[HTTPFileReader]:
+    ) -> Awaitable[AsyncHTTPFileReader]:
         ...
     def open(
         self, 
         /, 
-        url: str | Callable[[], str], 
+        url: str | Callable[[], str] | Callable[[], Awaitable[str]], 
         headers: None | Mapping = None, 
         start: int = 0, 
         seek_threshold: int = 1 << 20, 
         async_: Literal[False, True] = False, 
-    ) -> HTTPFileReader | Awaitable[HTTPFileReader]:
+    ) -> HTTPFileReader | Awaitable[AsyncHTTPFileReader]:
         """打开下载链接，可以从网盘、网盘上的压缩包内、分享链接中获取：
             - P115Client.download_url
             - P115Client.share_download_url
             - P115Client.extract_download_url
+
+        异步时返回 `AsyncHTTPFileReader`，使用 `self.async_session` 流式读取，
+        `url` 也可以是返回 awaitable 的函数，断线重连时会重新调用它
         """
         if headers is None:
             headers = self.headers
         if async_:
-            raise OSError(errno.ENOSYS, "asynchronous mode not implemented")
+            return AsyncHTTPFileReader.new(
+                url, 
+                headers=headers, 
+                start=start, 
+                seek_threshold=seek_threshold, 
+                session=self.async_session, 
+            )
         else:
             return HTTPFileReader(
                 url, 
@@ -7919,14 +8545,28 @@ class ExportDirStatus(Future):
     def stop(self, /):
         with self._condition:
             if self._state in ["RUNNING", "PENDING"]:
-                self._state = "CANCELLED"
+                # NOTE: `set_exception` 要求状态还未结束，所以直接设置异常（状态变为 FINISHED，轮询随之结束）
                 self.set_exception(OSError(errno.ECANCELED, "canceled"))
 
+    @staticmethod
+    def iter_intervals(
+        initial: float = 0.5, 
+        maximum: float = 5, 
+        factor: float = 1.5, 
+    ) -> Iterator[float]:
+        "轮询的间隔时间，从 `initial` 开始按 `factor` 倍增长，直到 `maximum`"
+        interval = initial
+        while True:
+            yield interval
+            interval = min(interval * factor, maximum)
+
     def _run_check(self, client, export_id: int | str, /):
         check = check_response(client.fs_export_dir_status)
         payload = {"export_id": export_id}
         def update_progress():
-            while self.running():
+            for interval in self.iter_intervals():
+                if not self.running():
+                    return
                 try:
                     data = check(payload)["data"]
                     if data:
@@ -7936,8 +8576,8 @@ class ExportDirStatus(Future):
                 except BaseException as e:
                     self.set_exception(e)
                     return
-                sleep(1)
-        Thread(target=update_progress).start()
+                sleep(interval)
+        Thread(target=update_progress, daemon=True).start()
 
 
 class PushExtractProgress(Future):
@@ -7959,7 +8599,7 @@ class PushExtractProgress(Future):
     def stop(self, /):
         with self._condition:
             if self._state in ["RUNNING", "PENDING"]:
-                self._state = "CANCELLED"
+                # NOTE: `set_exception` 要求状态还未结束，所以直接设置异常（状态变为 FINISHED，轮询随之结束）
                 self.set_exception(OSError(errno.ECANCELED, "canceled"))
 
     def _run_check(self, client, pickcode: str, /):
@@ -8009,7 +8649,7 @@ class ExtractProgress(Future):
     def stop(self, /):
         with self._condition:
             if self._state in ["RUNNING", "PENDING"]:
-                self._state = "CANCELLED"
+                # NOTE: `set_exception` 要求状态还未结束，所以直接设置异常（状态变为 FINISHED，轮询随之结束）
                 self.set_exception(OSError(errno.ECANCELED, "canceled"))
 
     def _run_check(self, client, extract_id: int | str, /):
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+from __future__ import annotations
+
+__author__ = "ChenyangGao <https://chenyanggao.github.io>"
+__all__ = ["file_sha1", "iter_file_sha1", "P115HashCache"]
+
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from hashlib import sha1
+from mmap import mmap, ACCESS_READ
+from os import fsdecode, fstat, stat, stat_result, PathLike
+from sqlite3 import connect
+from threading import Lock
+
+
+#: 空文件的 sha1
+EMPTY_SHA1 = "DA39A3EE5E6B4B0D3255BFEF95601890AFD80709"
+
+
+def file_sha1(
+    path: str | PathLike, 
+    /, 
+    chunksize: int = 1 << 23, 
+) -> tuple[int, str]:
+    """用 mmap 一次遍历计算文件的 sha1，返回 (文件大小, 大写的 sha1)
+
+    每次把映射内存的一个切片交给 `hashlib`，不会复制数据，而且 `hashlib` 在计算时会释放 GIL
+    """
+    with open(path, "rb") as f:
+        size = fstat(f.fileno()).st_size
+        if not size:
+            return 0, EMPTY_SHA1
+        hashobj = sha1()
+        try:
+            mm = mmap(f.fileno(), 0, access=ACCESS_READ)
+        except (OSError, ValueError):
+            # NOTE: 某些特殊文件不支持 mmap，就退回到逐块读取
+            while chunk := f.read(chunksize):
+                hashobj.update(chunk)
+        else:
+            with mm:
+                view = memoryview(mm)
+                try:
+                    for start in range(0, size, chunksize):
+                        hashobj.update(view[start:start+chunksize])
+                finally:
+                    view.release()
+    return size, hashobj.hexdigest().upper()
+
+
+def _file_sha1_worker(path: str, /) -> tuple[str, None | stat_result, int, None | str]:
+    "在子进程中计算 sha1，出错时 sha1 返回 None，交由调用方（例如上传时）再做处理"
+    try:
+        st = stat(path)
+        size, hexdigest = file_sha1(path)
+        return path, st, size, hexdigest
+    except OSError:
+        return path, None, -1, None
+
+
+class P115HashCache:
+    """持久化的文件 sha1 缓存，键是 (path, size, mtime_ns, inode)，保存在 SQLite 数据库中
+
+    文件的大小、修改时间或 inode 改变后，缓存自动失效
+    """
+
+    def __init__(self, /, dbfile: str | PathLike = ":memory:"):
+        con = self.con = connect(dbfile, check_same_thread=False)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("""\
+CREATE TABLE IF NOT EXISTS sha1 (
+    path TEXT PRIMARY KEY, 
+    size INTEGER NOT NULL, 
+    mtime_ns INTEGER NOT NULL, 
+    inode INTEGER NOT NULL, 
+    sha1 TEXT NOT NULL
+)""")
+        con.commit()
+        self.lock = Lock()
+
+    def __del__(self, /):
+        self.close()
+
+    def __enter__(self, /):
+        return self
+
+    def __exit__(self, /, *exc_info):
+        self.close()
+
+    def close(self, /):
+        try:
+            con = self.__dict__.pop("con")
+        except KeyError:
+            return
+        with self.lock:
+            con.commit()
+            con.close()
+
+    def get(
+        self, 
+        path: str | PathLike, 
+        /, 
+        st: None | stat_result = None, 
+    ) -> None | str:
+        "取出缓存的 sha1，如果没有或已经失效，则返回 None"
+        path = fsdecode(path)
+        if st is None:
+            st = stat(path)
+        with self.lock:
+            row = self.con.execute(
+                "SELECT sha1 FROM sha1 WHERE path=? AND size=? AND mtime_ns=? AND inode=?", 
+                (path, st.st_size, st.st_mtime_ns, st.st_ino), 
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def set(
+        self, 
+        path: str | PathLike, 
+        /, 
+        sha1: str, 
+        st: None | stat_result = None, 
+        commit: bool = True, 
+    ):
+        "缓存 sha1，`st` 应该是计算 sha1 之前获取的文件状态"
+        path = fsdecode(path)
+        if st is None:
+            st = stat(path)
+        with self.lock:
+            self.con.execute(
+                "REPLACE INTO sha1 (path, size, mtime_ns, inode, sha1) VALUES (?, ?, ?, ?, ?)", 
+                (path, st.st_size, st.st_mtime_ns, st.st_ino, sha1), 
+            )
+            if commit:
+                self.con.commit()
+
+    def commit(self, /):
+        with self.lock:
+            self.con.commit()
+
+    def file_sha1(self, path: str | PathLike, /) -> tuple[int, str]:
+        "和 `file_sha1` 相同，但优先使用缓存"
+        st = stat(path)
+        if hexdigest := self.get(path, st):
+            return st.st_size, hexdigest
+        size, hexdigest = file_sha1(path)
+        self.set(path, hexdigest, st)
+        return size, hexdigest
+
+
+def iter_file_sha1(
+    paths: Iterable[str | PathLike], 
+    /, 
+    max_workers: None | int = None, 
+    executor: None | Executor = None, 
+    cache: None | P115HashCache = None, 
+) -> Iterator[tuple[str, int, None | str]]:
+    """并行计算多个文件的 sha1，产生 (path, size, sha1)（命中缓存的最先产生，其余按输入顺序），出错的文件 size 为 -1，sha1 为 None
+
+    :param paths: 文件路径
+    :param max_workers: 进程池的最大进程数，如果为 None，则取决于 CPU 核数，仅在未提供 `executor` 时使用
+    :param executor: 执行计算的池，如果为 None，则新建一个进程池（用完后关闭）
+    :param cache: sha1 缓存，命中的文件不再计算，新计算的结果会写入缓存
+    """
+    pending: list[str] = []
+    for path in map(fsdecode, paths):
+        if cache is not None:
+            try:
+                st = stat(path)
+                if hexdigest := cache.get(path, st):
+                    yield path, st.st_size, hexdigest
+                    continue
+            except OSError:
+                pass
+        pending.append(path)
+    if not pending:
+        return
+    shutdown = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers)
+    try:
+        chunksize = max(1, min(64, len(pending) // 64))
+        for path, st, size, hexdigest in executor.map(_file_sha1_worker, pending, chunksize=chunksize):
+            if cache is not None and st is not None and hexdigest:
+                cache.set(path, hexdigest, st, commit=False)
+            yield path, size, hexdigest
+    finally:
+        if cache is not None:
+            cache.commit()
+        if shutdown:
+            executor.shutdown(cancel_futures=True)
@@ -12,18 +12,23 @@ from collections import deque, ChainMap
 from collections.abc import (
     Callable, Iterable, Iterator, Mapping, MutableMapping, Sequence, 
 )
+from concurrent.futures import wait, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED
+from contextlib import closing
 from datetime import datetime
 from io import BytesIO, TextIOWrapper
-from itertools import islice
+from functools import partial
+from itertools import chain, count, islice
 from json import JSONDecodeError
 from os import (
-    path as ospath, fsdecode, fspath, makedirs, remove, rmdir, scandir, stat_result, PathLike
+    path as ospath, fsdecode, fspath, makedirs, remove, rmdir, scandir, stat_result, DirEntry, PathLike
 )
 from pathlib import Path
 from posixpath import join as joinpath, splitext
+from queue import SimpleQueue
 from shutil import SameFileError
 from stat import S_IFDIR, S_IFREG
-from typing import cast, Literal, Optional, Self
+from time import perf_counter, sleep
+from typing import cast, Any, Literal, Optional, Self
 from uuid import uuid4
 from warnings import warn
 from yarl import URL
@@ -33,6 +38,8 @@ from http_request import SupportsGeturl
 from posixpatht import basename, commonpath, dirname, escape, joins, normpath, splits, unescape
 
 from .client import check_response, P115Client
+from .filehash import file_sha1, iter_file_sha1, P115HashCache
+from .fs_cache import as_attr_dict, AttrRecord, PathToIdIndex, SQLiteAttrCache, SQLitePathToId
 from .fs_base import AttrDict, IDOrPathType, P115PathBase, P115FileSystemBase
 
 
@@ -101,6 +108,22 @@ def normalize_info(
     return info2
 
 
+def parse_export_dir_iter(lines: Iterable[str], /) -> Iterator[tuple[int, str]]:
+    """解析 `fs_export_dir` 导出的目录树文件，产生 (深度, 名字)，深度从 0 开始（即导出的目录本身）
+
+    文件中每一行的格式形如（每一级缩进是 "|  "）：
+
+        |——目录
+        |  |——子目录
+        |  |  |——文件
+    """
+    for line in lines:
+        line = line.rstrip("\r\n")
+        i = line.find("|——")
+        if i >= 0:
+            yield i // 3, line[i+3:]
+
+
 class P115Path(P115PathBase):
     fs: P115FileSystem
 
@@ -239,6 +262,10 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
     attr_cache: Optional[MutableMapping[int, dict]]
     path_to_id: Optional[MutableMapping[str, int]]
     get_version: Optional[Callable]
+    compact_attr: bool
+    name_index: Optional[MutableMapping[int, tuple[Any, dict[str, AttrDict]]]]
+    # NOTE: 根据路径查找时，如果目录的列表没有被缓存，且其中的项目数大于此值，则改用搜索来查找名字（为 0 时不启用）
+    search_threshold: int = 0
     path_class = P115Path
 
     def __init__(
@@ -249,12 +276,16 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
         attr_cache: Optional[MutableMapping[int, dict]] = None, 
         path_to_id: Optional[MutableMapping[str, int]] = None, 
         get_version: Optional[Callable] = lambda attr: attr.get("mtime", 0), 
+        compact_attr: bool = False, 
     ):
+        """
+        :param compact_attr: 是否在 `attr_cache` 中用紧凑的 `AttrRecord` 代替 dict 存储文件属性（节省内存，但对外返回时会复制为 dict）
+        """
         if isinstance(client, str):
             client = P115Client(client)
-        if attr_cache is not None:
-            attr_cache = {}
         if type(path_to_id) is dict:
+            path_to_id = PathToIdIndex(path_to_id)
+        if isinstance(path_to_id, (PathToIdIndex, SQLitePathToId)):
             path_to_id["/"] = 0
         elif path_to_id is not None:
             path_to_id = ChainMap(path_to_id, {"/": 0})
@@ -266,7 +297,11 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
             path_to_id = path_to_id, 
             attr_cache = attr_cache, 
             get_version = get_version, 
+            compact_attr = compact_attr, 
+            name_index = None if attr_cache is None else {}, 
         )
+        if isinstance(attr_cache, SQLiteAttrCache) and attr_cache.fs is None:
+            attr_cache.fs = self
 
     def __delitem__(self, id_or_path: IDOrPathType, /):
         self.rmtree(id_or_path)
@@ -413,10 +448,11 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                 Buffer | SupportsRead[Buffer] | Iterable[Buffer] ), 
         name: str, 
         pid: None | int = None, 
+        filesha1: None | str = None, 
     ) -> AttrDict:
         if pid is None:
             pid = self.id
-        data = check_response(self.client.upload_file(file, name, pid))["data"]
+        data = check_response(self.client.upload_file(file, name, pid, filesha1=filesha1))["data"]
         if "file_id" in data:
             file_id = int(data["file_id"])
             try:
@@ -438,14 +474,18 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
             return
         id = attr["id"]
         pid = attr["parent_id"]
+        name_index = self.name_index
         if id:
             try:
                 attr_cache[pid]["children"].pop(id, None)
             except:
                 pass
+            if name_index is not None:
+                name_index.pop(pid, None)
         if attr["is_directory"]:
             path_to_id = self.path_to_id
-            if path_to_id is None:
+            prefix_indexed = isinstance(path_to_id, (PathToIdIndex, SQLitePathToId))
+            if path_to_id is None or prefix_indexed:
                 pop_path = None
             else:
                 def pop_path(path):
@@ -458,6 +498,8 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
             get, put = dq.popleft, dq.append
             while dq:
                 id = get()
+                if name_index is not None:
+                    name_index.pop(id, None)
                 try:
                     cache = attr_cache[id]
                     del attr_cache[id]
@@ -469,7 +511,9 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                             pop_path(subattr["path"])
                         if subattr["is_directory"]:
                             put(subid)
-            if path_to_id is not None and pop_path is not None:
+            if prefix_indexed:
+                path_to_id.pop_prefix(attr["path"]) # type: ignore
+            elif path_to_id is not None and pop_path is not None:
                 dirname = attr["path"]
                 pop_path(dirname)
                 dirname += "/"
@@ -483,6 +527,9 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
         id = attr["id"]
         opid = attr["parent_id"]
         npid = new_attr["parent_id"]
+        if (name_index := self.name_index) is not None:
+            name_index.pop(opid, None)
+            name_index.pop(npid, None)
         if id and opid != npid:
             try:
                 attr_cache[opid]["children"].pop(id, None)
@@ -505,10 +552,17 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
             startswith = str.startswith
             old_path = attr["path"]
             new_path = new_attr["path"]
-            if pop_path is not None:
-                pop_path(old_path)
-            if path_to_id is not None:
-                path_to_id[new_path] = id
+            prefix_indexed = isinstance(path_to_id, (PathToIdIndex, SQLitePathToId))
+            if prefix_indexed:
+                path_to_id.move_prefix(old_path, new_path) # type: ignore
+                path_to_id[new_path] = id # type: ignore
+                pop_path = None
+                path_to_id = None
+            else:
+                if pop_path is not None:
+                    pop_path(old_path)
+                if path_to_id is not None:
+                    path_to_id[new_path] = id
             old_path += "/"
             new_path += "/"
             len_old_path = len(old_path)
@@ -536,6 +590,136 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                 for k in tuple(k for k in path_to_id if startswith(k, old_path)):
                     pop_path(k)
 
+    def _batch_run(
+        self, 
+        /, 
+        method: Literal["copy", "delete", "move"], 
+        jobs: Iterable[tuple[None | Mapping, Sequence[Mapping]]], 
+        max_workers: int = 1, 
+        batch_size: int = 50_000, 
+    ):
+        """批量执行 `fs_batch_copy`、`fs_batch_delete` 或 `fs_batch_move`，完成后批量更新缓存
+
+        :param method: 操作名，"copy"、"delete" 或 "move"
+        :param jobs: 每项是 (目标目录的信息, 要操作的文件或目录的信息列表)，"delete" 时目标目录为 None
+        :param max_workers: 最多同时执行的批数
+        :param batch_size: 每批最多的项数
+
+        如果因为操作的文件数超过 5 万（包括目录中的文件）而失败，就把这一批拆成两半重试；
+        如果只剩 1 个目录，就展开这个目录：先（在目标目录中新建同名目录后）对其中的子项执行相同操作，再删除或保留这个目录。
+        如果服务器提示前一个操作尚未完成，则等待后重试。
+        """
+        def is_too_many(e: OSError, /) -> bool:
+            resp = e.args[-1] if e.args else None
+            return isinstance(resp, dict) and resp.get("errno") in (91004, 990023)
+
+        def run(chunk: Sequence[Mapping], pid: int, method: str = method, /):
+            ids = [attr["id"] for attr in chunk]
+            for i in count():
+                try:
+                    if method == "copy":
+                        return self.fs_batch_copy(ids, pid)
+                    elif method == "move":
+                        return self.fs_batch_move(ids, pid)
+                    else:
+                        return self.fs_batch_delete(ids)
+                except OSError as e:
+                    # NOTE: 990009，前一个操作尚未执行完成
+                    if e.errno != errno.EBUSY or i >= 10:
+                        raise
+                    sleep(min(0.5 * 2 ** i, 10))
+
+        def update_cache(dst_attr: None | Mapping, chunk: Sequence[Mapping], /):
+            if method == "delete":
+                for attr in chunk:
+                    self._clear_cache(cast(dict, attr))
+            else:
+                dst_attr = cast(Mapping, dst_attr)
+                if (name_index := self.name_index) is not None:
+                    name_index.pop(dst_attr["id"], None)
+                if method == "move":
+                    pid = dst_attr["id"]
+                    dirname = dst_attr["path"]
+                    for attr in chunk:
+                        new_attr = {**attr, "parent_id": pid, "path": joinpath(dirname, escape(attr["name"]))}
+                        self._update_cache_path(cast(dict, attr), new_attr)
+
+        def expand(dst_attr: None | Mapping, attr: Mapping, /):
+            children = self.listdir_attr(attr["id"])
+            if method == "delete":
+                self._batch_run(method, [(None, children)], max_workers, batch_size)
+            else:
+                dst_attr = cast(Mapping, dst_attr)
+                subdir_attr = self.makedirs([attr["name"]], pid=dst_attr["id"], exist_ok=True)
+                self._batch_run(method, [(subdir_attr, children)], max_workers, batch_size)
+                if (name_index := self.name_index) is not None:
+                    name_index.pop(dst_attr["id"], None)
+            if method != "copy":
+                run([attr], 0, "delete")
+                self._clear_cache(cast(dict, attr))
+
+        queue: deque[tuple[None | Mapping, Sequence[Mapping]]] = deque(
+            (dst_attr, attrs[i:i+batch_size]) 
+            for dst_attr, attrs in jobs 
+            for i in range(0, len(attrs), batch_size)
+        )
+        if not queue:
+            return
+        with ThreadPoolExecutor(max(1, max_workers)) as executor:
+            running: dict[Future, tuple[None | Mapping, Sequence[Mapping]]] = {}
+            while queue or running:
+                while queue and len(running) < max_workers:
+                    dst_attr, chunk = queue.popleft()
+                    pid = 0 if dst_attr is None else dst_attr["id"]
+                    running[executor.submit(run, chunk, pid)] = (dst_attr, chunk)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fu in done:
+                    dst_attr, chunk = running.pop(fu)
+                    try:
+                        fu.result()
+                    except OSError as e:
+                        if not is_too_many(e):
+                            raise
+                        if len(chunk) > 1:
+                            half = len(chunk) // 2
+                            queue.append((dst_attr, chunk[:half]))
+                            queue.append((dst_attr, chunk[half:]))
+                        elif chunk[0]["is_directory"]:
+                            expand(dst_attr, chunk[0])
+                        else:
+                            raise
+                    else:
+                        update_cache(dst_attr, chunk)
+
+    def _normalize_listed_attr(self, info: Mapping, dirname: str, /) -> AttrDict:
+        "规范化 `fs_files` 罗列出的一个条目，并写入 `path_to_id` 和 `attr_cache`"
+        path_to_id = self.path_to_id
+        attr_cache = self.attr_cache
+        attr = normalize_info(info, fs=self)
+        path = attr["path"] = joinpath(dirname, escape(attr["name"]))
+        if attr_cache is not None and self.compact_attr:
+            attr = AttrRecord(attr)
+        if path_to_id is not None:
+            path_to_id[path] = attr["id"]
+        if attr_cache is not None:
+            try:
+                id_attrs = attr_cache[attr["id"]]
+            except LookupError:
+                attr_cache[attr["id"]] = {"attr": attr}
+            else:
+                try:
+                    old_attr = id_attrs["attr"]
+                except LookupError:
+                    id_attrs["attr"] = attr
+                else:
+                    if path != old_attr["path"] and path_to_id is not None:
+                        try:
+                            del path_to_id[old_attr["path"]]
+                        except LookupError:
+                            pass
+                    old_attr.update(attr)
+        return attr
+
     def _attr(self, id: int, /)  -> AttrDict:
         if id == 0:
             last_update = datetime.now()
@@ -558,12 +742,14 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
         else:
             attrs = attr_cache.get(id)
         if attrs and "attr" in attrs and get_version is None:
-            return attrs["attr"]
+            return as_attr_dict(attrs["attr"])
         try:
             data = self.fs_info(id)["data"][0]
         except OSError as e:
             raise FileNotFoundError(errno.ENOENT, f"no such id: {id!r}") from e
         attr = normalize_info(data, fs=self)
+        if attr_cache is not None and self.compact_attr:
+            attr = AttrRecord(attr)
         pid = attr["parent_id"]
         attr_old = None
         if attr_cache is not None:
@@ -605,7 +791,7 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                         del path_to_id[attr_old["path"]]
                     except LookupError:
                         pass
-        return attr
+        return as_attr_dict(attr)
 
     def _attr_path(
         self, 
@@ -640,18 +826,62 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
             except:
                 pass
         attr = self._attr(pid)
+        name_index = self.name_index
+        if name_index is None:
+            name_index = {}
         for name in patht[len(self.get_patht(attr["path"])):]:
-            if not attr["is_directory"]:
-                raise NotADirectoryError(
-                    errno.ENOTDIR, f"`pid` does not point to a directory: {pid!r}")
-            for attr in self.iterdir(pid):
-                if attr["name"] == name:
-                    pid = cast(int, attr["id"])
-                    break
-            else:
-                raise FileNotFoundError(errno.ENOENT, f"no such file {name!r} (in {pid!r})")
+            attr = self._dir_lookup(attr, name, name_index)
         return attr
 
+    def _dir_lookup(
+        self, 
+        dir_attr: AttrDict, 
+        name: str, 
+        /, 
+        name_index: MutableMapping[int, tuple[Any, dict[str, AttrDict]]], 
+        search_threshold: None | int = None, 
+    ) -> AttrDict:
+        """在目录中查找名字，会缓存目录的 名字 → 属性 的索引（目录的版本变化后失效）
+
+        :param dir_attr: 目录的属性
+        :param name: 名字
+        :param name_index: 存放索引的字典，目录 id → (版本, 索引)
+        :param search_threshold: 如果目录的列表没有被缓存，且其中的项目数大于此值，则改用搜索来查找（为 0 时不启用），为 None 时使用 `self.search_threshold`
+        """
+        id = dir_attr["id"]
+        if not dir_attr["is_directory"]:
+            raise NotADirectoryError(
+                errno.ENOTDIR, f"{dir_attr['path']!r} (id={id!r}) is not a directory")
+        get_version = self.get_version
+        version = None if get_version is None else get_version(dir_attr)
+        if id in name_index:
+            index_version, index = name_index[id]
+            if index_version == version:
+                attr = index.get(name)
+                if attr is not None and attr["name"] == name:
+                    return attr
+        if search_threshold is None:
+            search_threshold = self.search_threshold
+        if search_threshold > 0:
+            attr_cache = self.attr_cache
+            attrs = None if attr_cache is None else attr_cache.get(id)
+            listed = attrs is not None and "version" in attrs and attrs["version"] == version
+            if not listed and self.dirlen(id) > search_threshold:
+                path_to_id = self.path_to_id
+                for path in self.search(dir_attr, search_value=name):
+                    attr = path.__dict__
+                    if attr["parent_id"] == id and attr["name"] == name:
+                        path = attr["path"] = joinpath(dir_attr["path"], escape(name))
+                        if path_to_id is not None:
+                            path_to_id[path] = attr["id"]
+                        return attr
+        index = {attr["name"]: attr for attr in self.iterdir(dir_attr)}
+        name_index[id] = (version, index)
+        try:
+            return index[name]
+        except KeyError:
+            raise FileNotFoundError(errno.ENOENT, f"no such file {name!r} (in {id!r})")
+
     def _dir_get_ancestors(self, id: int, /) -> list[dict]:
         ls = [{"name": "", "id": 0, "parent_id": 0, "is_directory": True}]
         if id:
@@ -677,6 +907,46 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
         else:
             return self._attr_path(id_or_path, pid)
 
+    def attr_many(
+        self, 
+        paths: Iterable[str | PathLike[str] | Sequence[str]], 
+        /, 
+        pid: None | int = None, 
+        search_threshold: None | int = None, 
+    ) -> list[None | AttrDict]:
+        """批量获取路径对应的属性，共同的祖先目录只会被查找一次，找不到的路径对应 None
+
+        :param paths: 一组路径
+        :param pid: 相对路径所在的目录 id
+        :param search_threshold: 如果目录的列表没有被缓存，且其中的项目数大于此值，则改用搜索来查找（为 0 时不启用），为 None 时使用 `self.search_threshold`
+        """
+        name_index = self.name_index
+        if name_index is None:
+            name_index = {}
+        resolved: dict[tuple[str, ...], None | AttrDict] = {("",): self._attr(0)}
+        result: list[None | AttrDict] = []
+        add_result = result.append
+        for path in paths:
+            try:
+                patht = tuple(self.get_patht(path, pid))
+            except OSError:
+                add_result(None)
+                continue
+            i = len(patht)
+            while patht[:i] not in resolved:
+                i -= 1
+            attr = resolved[patht[:i]]
+            while attr is not None and i < len(patht):
+                try:
+                    attr = self._dir_lookup(
+                        attr, patht[i], name_index, search_threshold=search_threshold)
+                except (FileNotFoundError, NotADirectoryError):
+                    attr = None
+                i += 1
+                resolved[patht[:i]] = attr
+            add_result(attr)
+        return result
+
     def iterdir(
         self, 
         id_or_path: IDOrPathType = "", 
@@ -686,9 +956,11 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
         stop: None | int = None, 
         page_size: int = 1_000, 
         refresh: bool = False, 
+        max_workers: int = 1, 
         **payload, 
     ) -> Iterator[AttrDict]:
         """迭代获取目录内直属的文件或目录的信息
+        :param max_workers: 拉取分页时的最大并发数，如果大于 1，则在第 1 页返回后，剩余的页会被并发拉取（但依然按顺序产出）
         payload:
             - asc: 0 | 1 = <default> # 是否升序排列
             - code: int | str = <default>
@@ -732,6 +1004,7 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
         path_to_id = self.path_to_id
         attr_cache = self.attr_cache
         get_version = self.get_version
+        compact_attr = attr_cache is not None and self.compact_attr
         version = None
         if attr_cache is None and isinstance(id_or_path, int):
             id = id_or_path
@@ -768,32 +1041,9 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
             "version" not in pid_attrs or
             version != pid_attrs["version"]
         ):
-            def normalize_attr(attr, dirname, /, **extra):
-                attr = normalize_info(attr, **extra)
-                path = attr["path"] = joinpath(dirname, escape(attr["name"]))
-                if path_to_id is not None:
-                    path_to_id[path] = attr["id"]
-                if attr_cache is not None:
-                    try:
-                        id_attrs = attr_cache[attr["id"]]
-                    except LookupError:
-                        attr_cache[attr["id"]] = {"attr": attr}
-                    else:
-                        try:
-                            old_attr = id_attrs["attr"]
-                        except LookupError:
-                            id_attrs["attr"] = attr
-                        else:
-                            if path != old_attr["path"] and path_to_id is not None:
-                                try:
-                                    del path_to_id[old_attr["path"]]
-                                except LookupError:
-                                    pass
-                            old_attr.update(attr)
-                return attr
             def iterdir(fetch_all: bool = True) -> Iterator[dict]:
                 nonlocal start, stop
-                get_files = self.fs_files
+                total: None | int = None
                 if fetch_all:
                     payload["offset"] = 0
                 else:
@@ -816,9 +1066,6 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                             return
                         total = stop - start
                     payload["offset"] = start
-                    if stop is not None:
-                        if total < page_size:
-                            payload["limit"] = total
                     set_order_payload = {}
                     if "o" in payload:
                         set_order_payload["user_order"] = payload["o"]
@@ -829,28 +1076,19 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                         if "fc_mix" in payload:
                             set_order_payload["fc_mix"] = payload["fc_mix"]
                         self.client.fs_files_order(set_order_payload)
-                resp = get_files(payload)
-                dirname = joins(("", *(a["name"] for a in resp["path"][1:])))
-                if path_to_id is not None:
-                    path_to_id[dirname] = id
-                count = resp["count"]
-                if fetch_all:
-                    total = count
-                elif start >= count:
-                    return
-                elif stop is None or stop > count:
-                    total = count - start
-                for attr in resp["data"]:
-                    yield normalize_attr(attr, dirname, fs=self)
-                if total <= page_size:
-                    return
-                for _ in range((total - 1) // page_size):
-                    payload["offset"] += page_size
-                    resp = get_files(payload)
-                    if resp["count"] != count:
-                        raise RuntimeError(f"{id} detected count changes during iteration")
-                    for attr in resp["data"]:
-                        yield normalize_attr(attr, dirname, fs=self)
+                pages = self.client.fs_files_iter(payload, total=total, max_workers=max_workers)
+                with closing(pages):
+                    resp = next(pages)
+                    if int(resp["path"][-1]["cid"]) != id:
+                        raise NotADirectoryError(errno.ENOTDIR, f"{id!r} is not a directory")
+                    dirname = joins(("", *(a["name"] for a in resp["path"][1:])))
+                    if path_to_id is not None:
+                        path_to_id[dirname] = id
+                    if not fetch_all and start >= resp["count"]:
+                        return
+                    for resp in chain((resp,), pages):
+                        for attr in resp["data"]:
+                            yield self._normalize_listed_attr(attr, dirname)
             if attr_cache is None:
                 return iterdir(False)
             else:
@@ -885,10 +1123,13 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
             case "user_otime":
                 key = lambda attr: attr["open_time"]
             case _:
+                if compact_attr:
+                    return map(as_attr_dict, islice(children.values(), start, stop))
                 return islice(children.values(), start, stop)
-        return iter(sorted(
-            children.values(), key=key, reverse=payload.get("asc", True), 
-        )[start:stop])
+        attrs = sorted(children.values(), key=key, reverse=payload.get("asc", True))[start:stop]
+        if compact_attr:
+            return map(as_attr_dict, attrs)
+        return iter(attrs)
 
     def copy(
         self, 
@@ -993,8 +1234,6 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                 onerror(e)
             return None
 
-    # TODO: 使用 fs_batch_* 方法，尽量加快执行速度，但是如果任务数过大（大于 5 万）而报错，则尝试对任务进行拆分
-    # TODO: 删除、还原、复制、移动等操作均遵此例，也就是尽量用 batch 方法
     def copytree(
         self, 
         /, 
@@ -1003,8 +1242,23 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
         pid: None | int = None, 
         overwrite: bool = False, 
         onerror: None | bool | Callable[[OSError], bool] = True, 
+        max_workers: int = 1, 
     ) -> None | AttrDict:
-        "复制路径"
+        """复制路径
+
+        先比较源目录和目标目录，制定计划：和目标没有冲突的项，每个目标目录只需要一次 `fs_batch_copy`；
+        同名目录则继续比较下去，同名文件在 `overwrite` 为真时先批量删除。然后用 `_batch_run` 执行计划。
+
+        :param max_workers: 最多同时执行的批数
+        """
+        def handle_error(e: OSError, /):
+            if onerror is True:
+                raise e
+            elif onerror is False or onerror is None:
+                pass
+            else:
+                onerror(e)
+
         try:
             src_attr = self.attr(src_path, pid)
             if not src_attr["is_directory"]:
@@ -1039,7 +1293,7 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                 except (OSError, JSONDecodeError):
                     pass
                 dst_attr = self.makedirs([dst_name], pid=dst_id, exist_ok=True)
-                dst_id = dst_pattr["id"]
+                dst_id = dst_attr["id"]
                 dst_attrs_map = {}
             else:
                 dst_path = dst_attr["path"]
@@ -1068,24 +1322,55 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                 onerror(e)
             return None
 
-        src_files: list[int] = []
-        payload: dict = dict(pid=dst_id, overwrite=overwrite, onerror=onerror)
-        for attr in src_attrs:
-            payload["src_path"] = attr
-            if attr["name"] in dst_attrs_map:
-                payload["dst_path"] = dst_attrs_map[attr["name"]]
-                if attr["is_directory"]:
-                    self.copytree(**payload)
+        deletes: list[Mapping] = []
+        copies: dict[int, tuple[Mapping, list[Mapping]]] = {}
+        stack: list[tuple[Sequence[Mapping], Mapping, dict[str, Mapping]]] = [(src_attrs, dst_attr, dst_attrs_map)]
+        while stack:
+            src_attrs, dst_dir_attr, dst_attrs_map = stack.pop()
+            for attr in src_attrs:
+                exist_attr = dst_attrs_map.get(attr["name"])
+                if exist_attr is None:
+                    pass
+                elif attr["is_directory"]:
+                    if exist_attr["is_directory"]:
+                        try:
+                            stack.append((
+                                self.listdir_attr(attr["id"]), 
+                                exist_attr, 
+                                {a["name"]: a for a in self.listdir_attr(exist_attr["id"])}, 
+                            ))
+                        except OSError as e:
+                            handle_error(e)
+                    else:
+                        handle_error(NotADirectoryError(
+                            errno.ENOTDIR, 
+                            f"destination path {exist_attr['path']!r} is not directory", 
+                        ))
+                    continue
+                elif exist_attr["is_directory"]:
+                    handle_error(IsADirectoryError(
+                        errno.EISDIR, 
+                        f"destination is a directory: {attr['path']!r} -> {exist_attr['path']!r}", 
+                    ))
+                    continue
+                elif overwrite:
+                    deletes.append(exist_attr)
                 else:
-                    self.copy(**payload)
-            elif attr["is_directory"]:
-                payload["dst_path"] = [attr["name"]]
-                self.copytree(**payload)
-            else:
-                src_files.append(attr["id"])
-        if src_files:
-            for i in range(0, len(src_files), 50_000):
-                self.fs_batch_copy(src_files[i:i+50_000], dst_id)
+                    handle_error(FileExistsError(
+                        errno.EEXIST, 
+                        f"destination already exists: {attr['path']!r} -> {exist_attr['path']!r}", 
+                    ))
+                    continue
+                try:
+                    copies[dst_dir_attr["id"]][1].append(attr)
+                except KeyError:
+                    copies[dst_dir_attr["id"]] = (dst_dir_attr, [attr])
+        try:
+            self._batch_run("delete", [(None, deletes)], max_workers=max_workers)
+            self._batch_run("copy", copies.values(), max_workers=max_workers)
+        except OSError as e:
+            handle_error(e)
+            return None
         return dst_attr
 
     def desc(
@@ -1165,6 +1450,53 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
             headers=headers, 
         )
 
+    def get_url_batch(
+        self, 
+        attrs: Iterable[Mapping], 
+        /, 
+        headers: Optional[Mapping] = None, 
+        batch_size: int = 50, 
+    ) -> dict[int, str]:
+        """批量获取下载链接，返回 文件 id → 下载链接 的字典，获取失败的文件不在其中
+
+        把多个 pickcode 用逗号连接，一次请求 `download_url_app` 获取多个链接，
+        违规的小文件（需要网页接口）和响应中缺失的文件，再逐个调用 `get_url`
+        """
+        urls: dict[int, str] = {}
+        pending: list[Mapping] = []
+        singles: list[Mapping] = []
+        for attr in attrs:
+            if attr["is_directory"]:
+                continue
+            if attr.get("violated", False) and attr["size"] < 1024 * 1024 * 115:
+                singles.append(attr)
+            else:
+                pending.append(attr)
+        request_kwargs: dict = {} if headers is None else {"headers": headers}
+        for i in range(0, len(pending), batch_size):
+            batch = pending[i:i+batch_size]
+            try:
+                resp = check_response(self.client.download_url_app(
+                    {"pickcode": ",".join(attr["pickcode"] for attr in batch)}, 
+                    **request_kwargs, 
+                ))
+            except OSError:
+                singles.extend(batch)
+                continue
+            data = resp.get("data") or {}
+            for attr in batch:
+                info = data.get(str(attr["id"]))
+                if info and info.get("url"):
+                    urls[attr["id"]] = info["url"]["url"]
+                else:
+                    singles.append(attr)
+        for attr in singles:
+            try:
+                urls[attr["id"]] = self.get_url(attr["id"], headers=headers)
+            except OSError:
+                pass
+        return urls
+
     def get_url_from_pickcode(
         self, 
         /, 
@@ -1258,6 +1590,65 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                 break
             payload["offset"] += page_size # type: ignore
 
+    def _iter_snapshot(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        timeout: None | float = None, 
+        delete: bool = True, 
+    ) -> Iterator[tuple[str, str, str]]:
+        "导出目录树，一边下载一边解析，产生 (上级目录的路径, 名字, 路径)"
+        attr = self.attr(id_or_path, pid)
+        if not attr["is_directory"]:
+            raise NotADirectoryError(
+                errno.ENOTDIR, 
+                f"{attr['path']!r} (id={attr['id']!r}) is not a directory", 
+            )
+        future = self.client.fs_export_dir_future(attr["id"])
+        try:
+            data = future.result(timeout)
+        finally:
+            if not future.done():
+                future.stop()
+        export_file_id = int(data["file_id"])
+        try:
+            with cast(TextIOWrapper, self.open(export_file_id, encoding="utf-16")) as file:
+                stack: list[str] = [attr["path"]]
+                for depth, name in parse_export_dir_iter(file):
+                    # NOTE: 深度为 0 的是导出的目录本身
+                    if depth <= 0 or depth > len(stack):
+                        continue
+                    del stack[depth:]
+                    dir_ = stack[-1]
+                    path = joinpath(dir_, escape(name))
+                    stack.append(path)
+                    yield dir_, name, path
+        finally:
+            if delete:
+                try:
+                    self.fs_delete(export_file_id)
+                except OSError:
+                    pass
+
+    def iter_snapshot(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        timeout: None | float = None, 
+        delete: bool = True, 
+    ) -> Iterator[str]:
+        """用 `fs_export_dir` 让服务器导出整个目录树，然后一边下载一边解析，产生其中每一项的路径（不含这个目录本身）
+
+        NOTE: 导出的文件中只有名字，没有 id 和类型：有子项的一定是目录，没有子项的可能是文件或空目录
+
+        :param timeout: 等待导出完成的最长秒数，如果为 None，则一直等待
+        :param delete: 解析后是否删除服务器上导出的文件
+        """
+        for _, _, path in self._iter_snapshot(id_or_path, pid, timeout=timeout, delete=delete):
+            yield path
+
     def labels(
         self, 
         id_or_path: IDOrPathType = "", 
@@ -1267,6 +1658,25 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
         "获取路径的标签"
         return self.attr(id_or_path, pid)["labels"]
 
+    def load_snapshot(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        timeout: None | float = None, 
+        delete: bool = True, 
+    ) -> dict[str, list[str]]:
+        """导出目录树并一次性解析，返回 {目录路径: [子项的名字, ...]}，可以用于离线罗列和判断路径是否存在，
+        对于很大的目录树，这比递归地调用 `iterdir` 要快得多，参数见 `iter_snapshot`
+        """
+        tree: dict[str, list[str]] = {}
+        for dir_, name, _ in self._iter_snapshot(id_or_path, pid, timeout=timeout, delete=delete):
+            try:
+                tree[dir_].append(name)
+            except KeyError:
+                tree[dir_] = [name]
+        return tree
+
     def makedirs(
         self, 
         path: IDOrPathType, 
@@ -1411,9 +1821,36 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
             f"destination already exists: {src_path!r} -> {dst_path!r}", 
         )
 
-    # TODO: 由于 115 网盘不支持删除里面有超过 5 万个文件等目录，因此执行失败时需要拆分任务
-    # TODO: 就算删除和还原执行返回成功，后台可能依然在执行，需要等待几秒钟，前一批完成再执行下一批
-    #       {'state': False, 'error': '删除[...]操作尚未执行完成，请稍后再试！', 'errno': 990009, 'errtype': 'war'}
+    def move_many(
+        self, 
+        /, 
+        src_paths: Iterable[IDOrPathType], 
+        dst_path: IDOrPathType, 
+        pid: None | int = None, 
+        max_workers: int = 1, 
+    ) -> list[AttrDict]:
+        "批量移动到目录中（保留名字），每 5 万个一批，已经在此目录中的会被跳过，返回被移动项（移动前）的信息"
+        dst_attr = self.attr(dst_path, pid)
+        if not dst_attr["is_directory"]:
+            raise NotADirectoryError(
+                errno.ENOTDIR, 
+                f"{dst_attr['path']!r} (id={dst_attr['id']!r}) is not a directory", 
+            )
+        dst_id = dst_attr["id"]
+        ancestor_ids = {a["id"] for a in self.get_ancestors(dst_id)}
+        attrs: list[AttrDict] = []
+        for path in src_paths:
+            attr = self.attr(path, pid)
+            if attr["id"] in ancestor_ids:
+                raise PermissionError(
+                    errno.EPERM, 
+                    f"move a path to its subordinate path is not allowed: {attr['path']!r} -> {dst_attr['path']!r}"
+                )
+            if attr["parent_id"] != dst_id:
+                attrs.append(attr)
+        self._batch_run("move", [(dst_attr, attrs)], max_workers=max_workers)
+        return attrs
+
     def remove(
         self, 
         id_or_path: IDOrPathType, 
@@ -1431,13 +1868,33 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                     f"{attr['path']!r} (id={id!r}) is a directory", 
                 )
             if id == 0:
-                for subattr in self.iterdir(0):
-                    self.remove(subattr, recursive=True)
+                self._batch_run("delete", [(None, self.listdir_attr(0))])
                 return attr
-        self.fs_delete(id)
-        self._clear_cache(attr)
+        # NOTE: 如果目录中超过 5 万个文件，`_batch_run` 会拆分任务
+        self._batch_run("delete", [(None, [attr])])
         return attr
 
+    def remove_many(
+        self, 
+        paths: Iterable[IDOrPathType], 
+        /, 
+        pid: None | int = None, 
+        recursive: bool = False, 
+        max_workers: int = 1, 
+    ) -> list[AttrDict]:
+        "批量删除文件（如果 `recursive` 为真，也可以删除目录），每 5 万个一批，返回被删除项的信息"
+        attrs = [self.attr(path, pid) for path in paths]
+        for attr in attrs:
+            if attr["id"] == 0:
+                raise PermissionError(errno.EPERM, "remove the root directory is not allowed")
+            elif attr["is_directory"] and not recursive:
+                raise IsADirectoryError(
+                    errno.EISDIR, 
+                    f"{attr['path']!r} (id={attr['id']!r}) is a directory", 
+                )
+        self._batch_run("delete", [(None, attrs)], max_workers=max_workers)
+        return attrs
+
     def removedirs(
         self, 
         id_or_path: IDOrPathType, 
@@ -1583,6 +2040,25 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                 raise
         return self.attr(src_id)
 
+    def rename_many(
+        self, 
+        pairs: Iterable[tuple[IDOrPathType, str]], 
+        /, 
+        pid: None | int = None, 
+        batch_size: int = 50_000, 
+    ) -> dict[int, str]:
+        "批量改名（只改名字，不移动），每 5 万个一批，返回 {id: 实际的新名字}"
+        items: list[tuple[AttrDict, str]] = [(self.attr(path, pid), name) for path, name in pairs]
+        names: dict[int, str] = {}
+        for i in range(0, len(items), batch_size):
+            chunk = items[i:i+batch_size]
+            resp = self.fs_batch_rename((attr["id"], name) for attr, name in chunk)
+            data = resp.get("data") or {}
+            for attr, name in chunk:
+                names[attr["id"]] = data.get(str(attr["id"]), name)
+                self._clear_cache(attr)
+        return names
+
     def renames(
         self, 
         /, 
@@ -1793,8 +2269,9 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
         pid: None | int = None, 
         overwrite: bool = False, 
         remove_done: bool = False, 
+        filesha1: None | str = None, 
     ) -> AttrDict:
-        "上传文件"
+        "上传文件，如果已知文件的 sha1，可以通过 `filesha1` 传入，以免再次计算"
         name: str = ""
         if not path:
             pid = self.id if pid is None else self.get_id(pid)
@@ -1833,7 +2310,7 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                 else:
                     raise FileExistsError(errno.EEXIST, f"remote path {attr['path']!r} already exists")
 
-        resp = self._upload(file, name, pid)
+        resp = self._upload(file, name, pid, filesha1=filesha1)
         if remove_done and isinstance(file, (str, PathLike)):
             try:
                 remove(file)
@@ -1855,8 +2332,36 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
         remove_done: bool = False, 
         predicate: None | Callable[[Path], bool] = None, 
         onerror: None | bool | Callable[[OSError], bool] = True, 
+        max_hash_workers: int = 1, 
+        hash_executor: None | Executor = None, 
+        hash_cache: None | P115HashCache = None, 
+        max_workers: int = 1, 
+        report: None | Callable[[dict], Any] = None, 
     ) -> Iterator[AttrDict]:
-        "上传到路径"
+        """上传到路径
+
+        :param max_hash_workers: 计算 sha1 的进程数，如果大于 1，则用进程池并行计算每个目录中所有文件的 sha1
+        :param hash_executor: 计算 sha1 的池，提供后会忽略 `max_hash_workers`，递归时复用
+        :param hash_cache: sha1 缓存，重新上传时，没有变化的文件不必再次计算 sha1
+        :param max_workers: 如果大于 1，则使用流水线模式，见 `_upload_tree_concurrent`
+        :param report: 流水线模式下，每完成一个文件，就用统计信息调用一次，见 `_upload_tree_concurrent`
+        """
+        if hash_executor is None and max_hash_workers > 1:
+            with ProcessPoolExecutor(max_hash_workers) as hash_executor:
+                return (yield from self.upload_tree(
+                    local_path, 
+                    path, 
+                    pid=pid, 
+                    no_root=no_root, 
+                    overwrite=overwrite, 
+                    remove_done=remove_done, 
+                    predicate=predicate, 
+                    onerror=onerror, 
+                    hash_executor=hash_executor, 
+                    hash_cache=hash_cache, 
+                    max_workers=max_workers, 
+                    report=report, 
+                ))
         remote_path_attr_map: None | dict[str, dict] = None
         try:
             attr = self.attr(path, pid)
@@ -1890,6 +2395,7 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                         pid=pid, 
                         overwrite=overwrite, 
                         remove_done=remove_done, 
+                        filesha1=None if hash_cache is None else hash_cache.file_sha1(local_path)[1], 
                     )
                 except OSError as e:
                     if onerror is True:
@@ -1918,6 +2424,29 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                 onerror(e)
             return
 
+        if max_workers > 1:
+            return (yield from self._upload_tree_concurrent(
+                local_path, 
+                pid, 
+                remote_path_attr_map, 
+                overwrite=overwrite, 
+                remove_done=remove_done, 
+                predicate=predicate, 
+                onerror=onerror, 
+                max_workers=max_workers, 
+                hash_executor=hash_executor, 
+                hash_cache=hash_cache, 
+                report=report, 
+            ))
+        filesha1s: dict[str, None | str] = {}
+        if hash_executor is not None or hash_cache is not None:
+            filesha1s = {
+                path: filesha1 for path, _, filesha1 in iter_file_sha1(
+                    (entry.path for entry in subpaths if not entry.is_dir()), 
+                    executor=hash_executor, 
+                    cache=hash_cache, 
+                )
+            }
         for entry in subpaths:
             name = entry.name
             isdir = entry.is_dir()
@@ -1946,6 +2475,8 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                         overwrite=overwrite, 
                         remove_done=remove_done, 
                         onerror=onerror, 
+                        hash_executor=hash_executor, 
+                        hash_cache=hash_cache, 
                     )
                 else:
                     yield from self.upload_tree(
@@ -1955,6 +2486,8 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                         overwrite=overwrite, 
                         remove_done=remove_done, 
                         onerror=onerror, 
+                        hash_executor=hash_executor, 
+                        hash_cache=hash_cache, 
                     )
                 if remove_done:
                     try:
@@ -1970,6 +2503,7 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                             pid=pid, 
                             overwrite=overwrite, 
                             remove_done=remove_done, 
+                            filesha1=filesha1s.get(entry.path), 
                         )
                     else:
                         yield self.upload(
@@ -1977,6 +2511,7 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                             remote_path_attr, 
                             overwrite=overwrite, 
                             remove_done=remove_done, 
+                            filesha1=filesha1s.get(entry.path), 
                         )
                 except OSError as e:
                     if onerror is True:
@@ -1986,6 +2521,209 @@ class P115FileSystem(P115FileSystemBase[P115Path]):
                     else:
                         onerror(e)
 
+    def _upload_tree_concurrent(
+        self, 
+        /, 
+        local_path: str, 
+        pid: int, 
+        remote_children: dict[str, dict], 
+        overwrite: bool = False, 
+        remove_done: bool = False, 
+        predicate: None | Callable[[Path], bool] = None, 
+        onerror: None | bool | Callable[[OSError], bool] = True, 
+        max_workers: int = 8, 
+        hash_executor: None | Executor = None, 
+        hash_cache: None | P115HashCache = None, 
+        report: None | Callable[[dict], Any] = None, 
+    ) -> Iterator[AttrDict]:
+        """`upload_tree` 的流水线模式，分 3 步：
+
+            1. 逐层扫描本地目录，同时用 `fs_mkdir` 并行创建远程目录，得到 本地目录 → 远程 id 的映射
+            2. 所有文件先进入秒传通道（`upload_file_init`），秒传成功的就不必再上传
+            3. 秒传失败的文件进入上传池，最多同时上传 `max_workers` 个
+
+        某个远程目录中的文件全部完成后，才罗列一次这个目录，然后产生其中已上传文件的信息，而不是每个文件都单独查询一次。
+        每完成一个文件，都会用如下统计信息调用 `report`：
+
+            {
+                "files_total": int, # 文件总数
+                "files_done": int,  # 已完成的文件数（包括失败的）
+                "files_rapid": int, # 秒传成功的文件数
+                "files_error": int, # 失败的文件数
+                "bytes_total": int, # 总字节数
+                "bytes_done": int,  # 已完成的字节数
+                "elapsed": float,   # 已用时间（秒）
+                "speed": float,     # 平均速度（字节/秒）
+            }
+        """
+        client = self.client
+
+        def handle_error(e: OSError, /):
+            if onerror is True:
+                raise e
+            elif onerror is False or onerror is None:
+                pass
+            else:
+                onerror(e)
+
+        def scan(top: str, /) -> tuple[list[DirEntry], list[DirEntry]]:
+            dirs: list[DirEntry] = []
+            files: list[DirEntry] = []
+            for entry in scandir(top):
+                if predicate is None or predicate(Path(entry)):
+                    if entry.is_dir():
+                        dirs.append(entry)
+                    else:
+                        files.append(entry)
+            return dirs, files
+
+        def ensure_dir(name: str, pid: int, children: dict[str, dict], /) -> tuple[int, dict[str, dict]]:
+            attr = children.get(name)
+            if attr is None:
+                return int(self.fs_mkdir(name, pid)["cid"]), {}
+            if not attr["is_directory"]:
+                raise FileExistsError(errno.EEXIST, f"remote path {attr['path']!r} already exists")
+            return attr["id"], {a["name"]: a for a in self.iterdir(attr["id"])}
+
+        # NOTE: 第 1 步，逐层扫描并创建目录骨架
+        files: list[tuple[DirEntry, int, None | dict]] = []
+        local_dirs: list[str] = []
+        level: list[tuple[str, int, dict[str, dict]]] = [(local_path, pid, remote_children)]
+        with ThreadPoolExecutor(max_workers) as executor:
+            while level:
+                scanned = [(item, executor.submit(scan, item[0])) for item in level]
+                mkdir_futures: list[tuple[DirEntry, Future]] = []
+                for (_, top_id, children), fu in scanned:
+                    try:
+                        dirs, files_ = fu.result()
+                    except OSError as e:
+                        handle_error(e)
+                        continue
+                    files.extend((entry, top_id, children.get(entry.name)) for entry in files_)
+                    mkdir_futures.extend(
+                        (entry, executor.submit(ensure_dir, entry.name, top_id, children)) 
+                        for entry in dirs
+                    )
+                level = []
+                for entry, fu in mkdir_futures:
+                    try:
+                        id, children = fu.result()
+                    except OSError as e:
+                        handle_error(e)
+                        continue
+                    level.append((entry.path, id, children))
+                    local_dirs.append(entry.path)
+
+        filesha1s: dict[str, tuple[int, None | str]] = {}
+        if hash_executor is not None or hash_cache is not None:
+            filesha1s = {
+                path: (size, filesha1) for path, size, filesha1 in iter_file_sha1(
+                    (entry.path for entry, *_ in files), 
+                    executor=hash_executor, 
+                    cache=hash_cache, 
+                )
+            }
+
+        def read_range_bytes_or_hash(path: str, sign_check: str, /) -> bytes:
+            start, end = map(int, sign_check.split("-"))
+            with open(path, "rb") as f:
+                f.seek(start)
+                return f.read(end - start + 1)
+
+        def upload(path: str, name: str, pid: int, filesize: int, filesha1: str, /):
+            check_response(client.upload_file(path, name, pid, filesize=filesize, filesha1=filesha1))
+            results.put((path, False, None))
+
+        def rapid_upload(path: str, name: str, pid: int, attr: None | dict, /):
+            if attr is not None:
+                if attr["is_directory"] or not overwrite:
+                    raise FileExistsError(errno.EEXIST, f"remote path {attr['path']!r} already exists")
+                self.remove(attr)
+            filesize, filesha1 = filesha1s.get(path) or (-1, None)
+            if filesize < 0 or not filesha1:
+                filesize, filesha1 = file_sha1(path)
+            resp = client.upload_file_init(
+                name, 
+                filesize, 
+                filesha1, 
+                partial(read_range_bytes_or_hash, path), 
+                pid=pid, 
+            )
+            if resp["status"] == 2 and resp.get("statuscode", 0) == 0:
+                results.put((path, True, None))
+            else:
+                upload_executor.submit(wrap, upload, path, name, pid, filesize, filesha1)
+
+        def wrap(func: Callable, path: str, /, *args):
+            try:
+                func(path, *args)
+            except BaseException as e:
+                results.put((path, False, e))
+
+        # NOTE: 第 2、3 步，秒传通道和上传池
+        results: SimpleQueue[tuple[str, bool, None | BaseException]] = SimpleQueue()
+        pending: dict[int, int] = {}
+        done_names: dict[int, list[str]] = {}
+        file_info: dict[str, tuple[int, str, int]] = {}
+        stats = {
+            "files_total": len(files), "files_done": 0, "files_rapid": 0, "files_error": 0, 
+            "bytes_total": 0, "bytes_done": 0, "elapsed": 0.0, "speed": 0.0, 
+        }
+        for entry, top_id, _ in files:
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                size = 0
+            file_info[entry.path] = (top_id, entry.name, size)
+            pending[top_id] = pending.get(top_id, 0) + 1
+            stats["bytes_total"] += size
+        start_t = perf_counter()
+        rapid_executor = ThreadPoolExecutor(max_workers)
+        upload_executor = ThreadPoolExecutor(max_workers)
+        try:
+            for entry, top_id, attr in files:
+                rapid_executor.submit(wrap, rapid_upload, entry.path, entry.name, top_id, attr)
+            for _ in range(len(files)):
+                path, rapid, exc = results.get()
+                top_id, name, size = file_info[path]
+                stats["files_done"] += 1
+                stats["bytes_done"] += size
+                if exc is None:
+                    stats["files_rapid"] += rapid
+                    done_names.setdefault(top_id, []).append(name)
+                    if remove_done:
+                        try:
+                            remove(path)
+                        except OSError:
+                            pass
+                else:
+                    stats["files_error"] += 1
+                elapsed = stats["elapsed"] = perf_counter() - start_t
+                stats["speed"] = stats["bytes_done"] / elapsed if elapsed else 0.0
+                if report is not None:
+                    report(stats)
+                if exc is not None:
+                    if not isinstance(exc, OSError):
+                        raise exc
+                    handle_error(exc)
+                pending[top_id] -= 1
+                if not pending[top_id] and (names := done_names.pop(top_id, None)):
+                    # NOTE: 目录中的文件全部完成，罗列一次，取得已上传文件的信息
+                    names_set = set(names)
+                    for attr in self.iterdir(top_id):
+                        if attr["name"] in names_set and not attr["is_directory"]:
+                            names_set.discard(attr["name"])
+                            yield attr
+        finally:
+            rapid_executor.shutdown(wait=False, cancel_futures=True)
+            upload_executor.shutdown(wait=False, cancel_futures=True)
+        if remove_done:
+            for path in reversed(local_dirs):
+                try:
+                    rmdir(path)
+                except OSError:
+                    pass
+
     unlink = remove
 
     def write_bytes(
@@ -0,0 +1,735 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+from __future__ import annotations
+
+__author__ = "ChenyangGao <https://chenyanggao.github.io>"
+__all__ = ["AsyncP115FileSystem"]
+
+import errno
+
+from asyncio import ensure_future, gather, shield, to_thread, Semaphore as AsyncSemaphore, Task
+from collections.abc import AsyncIterator, Iterable, Mapping, MutableMapping, Sequence
+from contextlib import aclosing
+from functools import cached_property
+from os import path as ospath, fsdecode, fspath, remove, PathLike
+from posixpath import join as joinpath
+from re import compile as re_compile, escape as re_escape
+from typing import cast, Any, Literal, Optional
+
+from filewrap import Buffer, SupportsRead, SupportsWrite
+from glob_pattern import translate_iter
+from http_request import SupportsGeturl
+from httpfile import AsyncHTTPFileReader
+from posixpatht import escape, joins
+from yarl import URL
+
+from .client import check_response
+from .fs import normalize_info, P115FileSystem, P115Path
+from .fs_base import AttrDict, IDOrPathType
+from .fs_cache import as_attr_dict, AttrRecord
+
+
+class AsyncP115FileSystem(P115FileSystem):
+    """原生异步的 115 文件系统，所有 `*_async` 方法都直接使用 `P115Client` 的异步接口（`async_session`），不占用线程
+
+    和 `P115FileSystem` 共用同样的缓存结构（`attr_cache`、`path_to_id` 和 `name_index`），因此同步和异步的方法可以混用。
+    同一个目录的并发罗列（没有额外的 payload 时）会被合并为一次请求，适合在一个事件循环中同时处理大量查找。
+    """
+
+    @cached_property
+    def _listing_tasks(self, /) -> dict[int, Task]:
+        "正在进行的目录罗列，目录 id → 任务"
+        return {}
+
+    async def fs_files_async(
+        self, 
+        /, 
+        payload: None | int | dict = None, 
+    ) -> AttrDict:
+        if payload is None:
+            payload = self.id
+        if isinstance(payload, int):
+            payload = {"cid": payload}
+        id = int(payload["cid"])
+        resp = check_response(await self.client.fs_files(payload, async_=True))
+        if int(resp["path"][-1]["cid"]) != id:
+            raise NotADirectoryError(errno.ENOTDIR, f"{id!r} is not a directory")
+        return resp
+
+    async def fs_info_async(self, id: int, /) -> AttrDict:
+        result = await self.client.fs_info({"file_id": id}, async_=True)
+        if result["state"]:
+            return result
+        match result["code"]:
+            case 20018:
+                raise FileNotFoundError(result)
+            case 990002:
+                raise OSError(errno.EINVAL, result)
+            case _:
+                raise OSError(errno.EIO, result)
+
+    async def fs_search_async(self, payload: str | dict, /) -> AttrDict:
+        if isinstance(payload, str):
+            payload = {"cid": self.id, "search_value": payload}
+        return check_response(await self.client.fs_search(payload, async_=True))
+
+    async def _dir_get_ancestors_async(self, id: int, /) -> list[dict]:
+        ls = [{"name": "", "id": 0, "parent_id": 0, "is_directory": True}]
+        if id:
+            resp = await self.fs_files_async({"cid": id, "limit": 1})
+            ls.extend(
+                {"name": p["name"], "id": int(p["cid"]), "parent_id": int(p["pid"]), "is_directory": True}
+                for p in resp["path"][1:]
+            )
+        return ls
+
+    async def _attr_async(self, id: int, /) -> AttrDict:
+        if id == 0:
+            return self._attr(0)
+        attr_cache = self.attr_cache
+        get_version = self.get_version
+        if attr_cache is None:
+            attrs = None
+        else:
+            attrs = attr_cache.get(id)
+        if attrs and "attr" in attrs and get_version is None:
+            return as_attr_dict(attrs["attr"])
+        try:
+            data = (await self.fs_info_async(id))["data"][0]
+        except OSError as e:
+            raise FileNotFoundError(errno.ENOENT, f"no such id: {id!r}") from e
+        attr = normalize_info(data, fs=self)
+        if attr_cache is not None and self.compact_attr:
+            attr = AttrRecord(attr)
+        pid = attr["parent_id"]
+        attr_old = None
+        if attr_cache is not None:
+            version = None if get_version is None else get_version(attr)
+            if attrs is None or "attr" not in attrs:
+                if attrs is None:
+                    attr_cache[id] = {"attr": attr}
+                else:
+                    attrs["attr"] = attr
+                try:
+                    pid_attrs = attr_cache[pid]
+                except LookupError:
+                    pid_attrs = attr_cache[pid] = {}
+                try:
+                    children = pid_attrs["children"]
+                except LookupError:
+                    children = pid_attrs["children"] = {}
+                children[id] = attr
+            else:
+                attr_old = attrs["attr"]
+                if version != attrs.get("version"):
+                    attrs.pop("version", None)
+                attr_old.update(attr)
+                attr = attr_old
+        if "path" not in attr:
+            if pid:
+                ancestors = await self._dir_get_ancestors_async(pid)
+                path = attr["path"] = joins((*(a["name"] for a in ancestors), attr["name"]))
+            else:
+                path = attr["path"] = "/" + escape(attr["name"])
+            path_to_id = self.path_to_id
+            if path_to_id is not None:
+                path_to_id[path] = id
+                if attr_old and path != attr_old["path"]:
+                    try:
+                        del path_to_id[attr_old["path"]]
+                    except LookupError:
+                        pass
+        return as_attr_dict(attr)
+
+    async def _attr_path_async(
+        self, 
+        path: str | PathLike[str] | Sequence[str], 
+        /, 
+        pid: None | int = None, 
+    ) -> AttrDict:
+        if isinstance(path, PathLike):
+            path = fspath(path)
+        if isinstance(path, str):
+            if path.startswith("/"):
+                pid = 0
+        elif path and path[0] == "":
+            pid = 0
+        if pid is None:
+            pid = self.id
+        attr = await self._attr_async(pid)
+        if not path or path == ".":
+            return attr
+        # NOTE: 先异步取得 `pid` 的属性，以免 `get_patht` 同步地请求
+        if isinstance(path, str):
+            patht = self.get_patht(joinpath(attr["path"], path))
+        elif path[0] == "":
+            patht = self.get_patht(path)
+        else:
+            patht = [*self.get_patht(attr), *path]
+        fullpath = joins(patht)
+        path_to_id = self.path_to_id
+        if path_to_id is not None and fullpath in path_to_id:
+            id = path_to_id[fullpath]
+            try:
+                attr = await self._attr_async(id)
+                if attr["path"] == fullpath:
+                    return attr
+            except FileNotFoundError:
+                pass
+            try:
+                del path_to_id[fullpath]
+            except:
+                pass
+        dir_patht = self.get_patht(attr)
+        if patht[:len(dir_patht)] != dir_patht:
+            attr = await self._attr_async(0)
+            dir_patht = [""]
+        name_index = self.name_index
+        if name_index is None:
+            name_index = {}
+        for name in patht[len(dir_patht):]:
+            attr = await self._dir_lookup_async(attr, name, name_index)
+        return attr
+
+    async def _dir_lookup_async(
+        self, 
+        dir_attr: AttrDict, 
+        name: str, 
+        /, 
+        name_index: MutableMapping[int, tuple[Any, dict[str, AttrDict]]], 
+        search_threshold: None | int = None, 
+    ) -> AttrDict:
+        "和 `_dir_lookup` 相同，但是异步的"
+        id = dir_attr["id"]
+        if not dir_attr["is_directory"]:
+            raise NotADirectoryError(
+                errno.ENOTDIR, f"{dir_attr['path']!r} (id={id!r}) is not a directory")
+        get_version = self.get_version
+        version = None if get_version is None else get_version(dir_attr)
+        if id in name_index:
+            index_version, index = name_index[id]
+            if index_version == version:
+                attr = index.get(name)
+                if attr is not None and attr["name"] == name:
+                    return attr
+        if search_threshold is None:
+            search_threshold = self.search_threshold
+        if search_threshold > 0:
+            attr_cache = self.attr_cache
+            attrs = None if attr_cache is None else attr_cache.get(id)
+            listed = attrs is not None and "version" in attrs and attrs["version"] == version
+            if not listed and await self.dirlen_async(id) > search_threshold:
+                path_to_id = self.path_to_id
+                async for path in self.search_async(dir_attr, search_value=name):
+                    attr = path.__dict__
+                    if attr["parent_id"] == id and attr["name"] == name:
+                        path = attr["path"] = joinpath(dir_attr["path"], escape(name))
+                        if path_to_id is not None:
+                            path_to_id[path] = attr["id"]
+                        return attr
+        index = {attr["name"]: attr for attr in await self.listdir_attr_async(dir_attr)}
+        name_index[id] = (version, index)
+        try:
+            return index[name]
+        except KeyError:
+            raise FileNotFoundError(errno.ENOENT, f"no such file {name!r} (in {id!r})")
+
+    async def attr_async(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+    ) -> AttrDict:
+        "异步获取属性"
+        if isinstance(id_or_path, P115Path):
+            return id_or_path.__dict__
+        elif isinstance(id_or_path, dict):
+            return id_or_path
+        elif isinstance(id_or_path, int):
+            return await self._attr_async(id_or_path)
+        else:
+            return await self._attr_path_async(id_or_path, pid)
+
+    async def as_path_async(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+    ) -> P115Path:
+        if isinstance(id_or_path, P115Path):
+            return id_or_path
+        attr = await self.attr_async(id_or_path, pid)
+        attr["fs"] = self
+        return P115Path(attr)
+
+    async def dirlen_async(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+    ) -> int:
+        "文件夹中的项目数（直属的文件和目录计数）"
+        if isinstance(id_or_path, int):
+            id = id_or_path
+        else:
+            id = (await self.attr_async(id_or_path, pid))["id"]
+        return (await self.fs_files_async({"cid": id, "limit": 1}))["count"]
+
+    async def _fetch_dir_async(
+        self, 
+        attr: AttrDict, 
+        /, 
+        page_size: int = 1_000, 
+        max_workers: int = 1, 
+        **payload, 
+    ) -> list[AttrDict]:
+        """拉取目录的全部列表，没有额外的 payload 时，结果会写入 `attr_cache`
+        """
+        id = attr["id"]
+        get_version = self.get_version
+        version = None if get_version is None else get_version(attr)
+        path_to_id = self.path_to_id
+        attr_cache = None if payload else self.attr_cache
+        payload["cid"] = id
+        payload["limit"] = page_size
+        payload["offset"] = 0
+        ls: list[AttrDict] = []
+        dirname = ""
+        pages = self.client.fs_files_iter(payload, max_workers=max_workers, async_=True)
+        async with aclosing(pages):
+            async for resp in pages:
+                if not dirname:
+                    if int(resp["path"][-1]["cid"]) != id:
+                        raise NotADirectoryError(errno.ENOTDIR, f"{id!r} is not a directory")
+                    dirname = joins(("", *(a["name"] for a in resp["path"][1:])))
+                    if path_to_id is not None:
+                        path_to_id[dirname] = id
+                for info in resp["data"]:
+                    ls.append(self._normalize_listed_attr(info, dirname))
+        if attr_cache is not None:
+            attr_cache[id] = {"version": version, "attr": attr, "children": {a["id"]: a for a in ls}}
+        return ls
+
+    async def iterdir_async(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        page_size: int = 1_000, 
+        refresh: bool = False, 
+        max_workers: int = 1, 
+        **payload, 
+    ) -> AsyncIterator[AttrDict]:
+        """异步迭代获取目录内直属的文件或目录的信息
+
+        :param max_workers: 拉取分页时的最大并发数
+        :param payload: 同 `iterdir`，如果提供，则总是重新拉取，而且结果不会作为目录的列表缓存
+
+        NOTE: 同一个目录的并发罗列（没有 payload 时）会被合并为一次请求
+        """
+        for attr in await self.listdir_attr_async(
+            id_or_path, 
+            pid, 
+            page_size=page_size, 
+            refresh=refresh, 
+            max_workers=max_workers, 
+            **payload, 
+        ):
+            yield attr
+
+    async def listdir_attr_async(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        page_size: int = 1_000, 
+        refresh: bool = False, 
+        max_workers: int = 1, 
+        **payload, 
+    ) -> list[AttrDict]:
+        "异步罗列目录，参数同 `iterdir_async`"
+        if page_size <= 0:
+            page_size = 1_000
+        attr: None | AttrDict = None
+        if not refresh:
+            if isinstance(id_or_path, dict):
+                attr = id_or_path
+            elif isinstance(id_or_path, P115Path):
+                attr = id_or_path.__dict__
+        if attr is None:
+            attr = await self.attr_async(id_or_path, pid)
+        if not attr["is_directory"]:
+            raise NotADirectoryError(
+                errno.ENOTDIR, 
+                f"{attr['path']!r} (id={attr['id']!r}) is not a directory", 
+            )
+        id = attr["id"]
+        attr_cache = self.attr_cache
+        if payload:
+            ls = await self._fetch_dir_async(attr, page_size, max_workers, **payload)
+        else:
+            if not refresh and attr_cache is not None:
+                get_version = self.get_version
+                version = None if get_version is None else get_version(attr)
+                pid_attrs = attr_cache.get(id)
+                if pid_attrs is not None and "version" in pid_attrs and pid_attrs["version"] == version:
+                    return list(map(as_attr_dict, pid_attrs["children"].values()))
+            tasks = self._listing_tasks
+            try:
+                task = tasks[id]
+            except KeyError:
+                task = tasks[id] = ensure_future(self._fetch_dir_async(attr, page_size, max_workers))
+                task.add_done_callback(lambda _: tasks.pop(id, None))
+            # NOTE: 用 shield 保护共享的任务，以免某一个调用方被取消时连累其它调用方
+            ls = await shield(task)
+        return list(map(as_attr_dict, ls))
+
+    async def _listdir_attr_async(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        **kwargs, 
+    ) -> list[AttrDict]:
+        return await self.listdir_attr_async(id_or_path, pid, **kwargs)
+
+    async def glob_async(
+        self, 
+        /, 
+        pattern: str = "*", 
+        dirname: IDOrPathType = "", 
+        ignore_case: bool = False, 
+        allow_escaped_slash: bool = True, 
+        max_readdir_workers: int = 1, 
+    ) -> AsyncIterator[P115Path]:
+        """异步的 `glob`，逐层匹配时，同一层的目录会被并发罗列
+
+        :param max_readdir_workers: 同时拉取目录列表的最大并发数
+        """
+        if pattern in ("*", "**"):
+            async for path in self.iter_async(
+                dirname, 
+                max_depth=1 if pattern == "*" else -1, 
+                max_readdir_workers=max_readdir_workers, 
+            ):
+                yield path
+            return
+        if not pattern:
+            try:
+                yield await self.as_path_async(dirname)
+            except FileNotFoundError:
+                pass
+            return
+        elif not pattern.lstrip("/"):
+            yield await self.as_path_async(0)
+            return
+        splitted_pats = tuple(translate_iter(pattern, allow_escaped_slash=allow_escaped_slash))
+        try:
+            attr = await self.attr_async(0 if pattern.startswith("/") else dirname)
+        except FileNotFoundError:
+            return
+        i = 0
+        if not ignore_case:
+            prefix: list[str] = []
+            for pat, typ, orig in splitted_pats:
+                if typ != "orig":
+                    break
+                prefix.append(orig)
+                i += 1
+            if prefix:
+                try:
+                    attr = await self.attr_async(prefix, attr["id"])
+                except (FileNotFoundError, NotADirectoryError):
+                    return
+            if i == len(splitted_pats):
+                attr["fs"] = self
+                yield P115Path(attr)
+                return
+        if not attr["is_directory"]:
+            return
+        rest = splitted_pats[i:]
+        if any(typ == "dstar" for _, typ, _ in rest):
+            pattern = joinpath(re_escape(attr["path"]), "/".join(t[0] for t in rest))
+            if ignore_case:
+                pattern = "(?i:%s)" % pattern
+            match = re_compile(pattern).fullmatch
+            async for path in self.iter_async(
+                attr, 
+                max_depth=-1, 
+                predicate=lambda p: match(p.path) is not None, 
+                max_readdir_workers=max_readdir_workers, 
+            ):
+                yield path
+            return
+        sema = AsyncSemaphore(max(1, max_readdir_workers))
+        attrs = [attr]
+        for j, (pat, typ, orig) in enumerate(rest):
+            at_end = j + 1 == len(rest)
+            if typ == "orig" and not ignore_case:
+                async def step(attr: AttrDict, /, name: str = orig) -> list[AttrDict]:
+                    async with sema:
+                        try:
+                            return [await self.attr_async([name], attr["id"])]
+                        except (FileNotFoundError, NotADirectoryError):
+                            return []
+            else:
+                match = None
+                if typ != "star":
+                    match = re_compile("(?i:%s)" % pat if ignore_case else pat).fullmatch
+                async def step(attr: AttrDict, /, match=match) -> list[AttrDict]:
+                    async with sema:
+                        ls = await self.listdir_attr_async(attr)
+                    if match is None:
+                        return ls
+                    return [a for a in ls if match(a["name"])]
+            attrs = [
+                a for ls in await gather(*map(step, attrs))
+                for a in ls if at_end or a["is_directory"]
+            ]
+            if not attrs:
+                return
+        for attr in attrs:
+            attr["fs"] = self
+            yield P115Path(attr)
+
+    async def rglob_async(
+        self, 
+        /, 
+        pattern: str = "", 
+        dirname: IDOrPathType = "", 
+        ignore_case: bool = False, 
+        allow_escaped_slash: bool = True, 
+        max_readdir_workers: int = 1, 
+    ) -> AsyncIterator[P115Path]:
+        "异步的 `rglob`"
+        if not pattern:
+            pattern = "**"
+        elif not pattern.startswith("/"):
+            pattern = "**/" + pattern
+        async for path in self.glob_async(
+            pattern, 
+            dirname, 
+            ignore_case=ignore_case, 
+            allow_escaped_slash=allow_escaped_slash, 
+            max_readdir_workers=max_readdir_workers, 
+        ):
+            yield path
+
+    async def search_async(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        page_size: int = 1_000, 
+        **payload, 
+    ) -> AsyncIterator[P115Path]:
+        "异步搜索目录，参数同 `search`"
+        if page_size <= 0:
+            page_size = 1_000
+        attr = await self.attr_async(id_or_path, pid)
+        payload["cid"] = attr["id"]
+        payload["limit"] = page_size
+        offset = int(payload.setdefault("offset", 0))
+        if offset < 0:
+            payload["offset"] = 0
+        if not attr["is_directory"]:
+            payload.setdefault("search_value", attr["sha1"])
+        while True:
+            resp = await self.fs_search_async(payload)
+            if resp["offset"] != offset:
+                break
+            data = resp["data"]
+            if not data:
+                return
+            for attr in data:
+                yield P115Path(normalize_info(attr, fs=self))
+            offset = payload["offset"] = offset + resp["page_size"]
+            if offset >= resp["count"]:
+                break
+
+    async def get_url_async(
+        self, 
+        id_or_path: IDOrPathType, 
+        /, 
+        pid: None | int = None, 
+        headers: Optional[Mapping] = None, 
+        detail: bool = False, 
+    ) -> str:
+        "异步获取下载链接"
+        attr = await self.attr_async(id_or_path, pid)
+        if attr["is_directory"]:
+            raise IsADirectoryError(errno.EISDIR, f"{attr['path']!r} (id={attr['id']!r}) is a directory")
+        return await self.client.download_url(
+            attr["pickcode"], 
+            use_web_api=attr.get("violated", False) and attr["size"] < 1024 * 1024 * 115, 
+            detail=detail, 
+            headers=headers, 
+            async_=True, 
+        )
+
+    async def open_async(
+        self, 
+        id_or_path: IDOrPathType, 
+        /, 
+        pid: None | int = None, 
+        headers: Optional[Mapping] = None, 
+        start: int = 0, 
+        seek_threshold: int = 1 << 20, 
+    ) -> AsyncHTTPFileReader:
+        """异步打开文件（只读），断线重连时会重新获取下载链接
+
+        :param start: 开始读取的位置
+        :param seek_threshold: 向前 seek 不超过这么多字节时，直接读取并丢弃，而不是重新连接
+        """
+        attr = await self.attr_async(id_or_path, pid)
+        if attr["is_directory"]:
+            raise IsADirectoryError(errno.EISDIR, f"{attr['path']!r} (id={attr['id']!r}) is a directory")
+        if headers is None:
+            headers = self.client.headers
+        return await self.client.open(
+            lambda: self.get_url_async(attr["id"], headers=headers), 
+            headers=headers, 
+            start=start, 
+            seek_threshold=seek_threshold, 
+            async_=True, 
+        )
+
+    async def download_async(
+        self, 
+        id_or_path: IDOrPathType, 
+        /, 
+        local_path_or_file: bytes | str | PathLike | SupportsWrite[bytes] = "", 
+        pid: None | int = None, 
+        write_mode: Literal["a", "w", "x", "i"] = "a", 
+        chunksize: int = 1 << 16, 
+    ) -> None | AttrDict:
+        """异步下载文件，用 `async_session` 流式读取，返回文件的属性（如果因为 `write_mode="i"` 而跳过，则返回 None）
+
+        :param write_mode: 同 `download`，"a" 为断点续传，"w" 为覆盖，"x" 为已存在时报错，"i" 为已存在时忽略
+        :param chunksize: 每次写入的块大小
+        """
+        attr = await self.attr_async(id_or_path, pid)
+        if attr["is_directory"]:
+            raise IsADirectoryError(errno.EISDIR, f"{attr['path']!r} (id={attr['id']!r}) is a directory")
+        file: SupportsWrite[bytes]
+        start = 0
+        if isinstance(local_path_or_file, SupportsWrite):
+            file = local_path_or_file
+        else:
+            path = fsdecode(local_path_or_file) or attr["name"]
+            if ospath.lexists(path):
+                if write_mode == "x":
+                    raise FileExistsError(
+                        errno.EEXIST, 
+                        f"local path already exists: {path!r}", 
+                    )
+                elif write_mode == "i":
+                    return None
+                elif write_mode == "a":
+                    start = ospath.getsize(path)
+                    if start >= attr["size"]:
+                        return attr
+            file = open(path, "ab" if start else "wb")
+        headers = {**self.client.headers, "Accept-Encoding": "identity"}
+        url = await self.get_url_async(attr, headers=headers)
+        if start:
+            headers["Range"] = f"bytes={start}-"
+        try:
+            async with self.client.async_session.stream("GET", url, headers=headers) as resp:
+                resp.raise_for_status()
+                if start and resp.status_code != 206:
+                    file.truncate(0) # type: ignore
+                async for chunk in resp.aiter_bytes(chunksize):
+                    file.write(chunk)
+        finally:
+            if file is not local_path_or_file:
+                file.close() # type: ignore
+        return attr
+
+    async def _upload_async(
+        self, 
+        /, 
+        file: ( str | PathLike | URL | SupportsGeturl |
+                Buffer | SupportsRead[Buffer] | Iterable[Buffer] ), 
+        name: str, 
+        pid: None | int = None, 
+        filesha1: None | str = None, 
+    ) -> AttrDict:
+        if pid is None:
+            pid = self.id
+        resp = await self.client.upload_file(file, name, pid, filesha1=filesha1, async_=True)
+        data = check_response(resp)["data"]
+        if "file_id" in data:
+            file_id = int(data["file_id"])
+            try:
+                return await self._attr_async(file_id)
+            except FileNotFoundError:
+                await self.fs_files_async({"cid": pid, "limit": 1})
+                return await self._attr_async(file_id)
+        else:
+            name = data["file_name"]
+            try:
+                return await self._attr_path_async([name], pid)
+            except FileNotFoundError:
+                await self.fs_files_async({"cid": pid, "limit": 1})
+                return await self._attr_path_async([name], pid)
+
+    async def upload_async(
+        self, 
+        /, 
+        file: ( str | PathLike | URL | SupportsGeturl |
+                Buffer | SupportsRead[Buffer] | Iterable[Buffer] ), 
+        path: IDOrPathType = "", 
+        pid: None | int = None, 
+        overwrite: bool = False, 
+        remove_done: bool = False, 
+        filesha1: None | str = None, 
+    ) -> AttrDict:
+        "异步上传文件，参数同 `upload`"
+        name: str = ""
+        if not path:
+            if pid is None:
+                pid = self.id
+        else:
+            attr: Mapping
+            if isinstance(path, int):
+                attr = await self.attr_async(path)
+            elif isinstance(path, (str, PathLike)):
+                dirname, name = ospath.split(path)
+                attr = await self.attr_async(dirname, pid)
+            elif isinstance(path, Sequence):
+                if len(path) == 1 and path[0] == "":
+                    attr = await self.attr_async(0)
+                else:
+                    *dirname_t, name = path
+                    attr = await self.attr_async(dirname_t, pid)
+            else:
+                attr = path
+            pid = attr["id"]
+            if attr["is_directory"]:
+                if name:
+                    try:
+                        attr = await self.attr_async([name], pid)
+                        if attr["is_directory"]:
+                            pid = attr["id"]
+                            name = ""
+                    except FileNotFoundError:
+                        pass
+            if not attr["is_directory"]:
+                if name:
+                    raise NotADirectoryError(errno.ENOTDIR, f"parent path {attr['path']!r} is not directory")
+                elif overwrite:
+                    check_response(await self.client.fs_delete(attr["id"], async_=True))
+                    self._clear_cache(cast(dict, attr))
+                    name = attr["name"]
+                    pid = attr["parent_id"]
+                else:
+                    raise FileExistsError(errno.EEXIST, f"remote path {attr['path']!r} already exists")
+        resp = await self._upload_async(file, name, pid, filesha1=filesha1)
+        if remove_done and isinstance(file, (str, PathLike)):
+            try:
+                await to_thread(remove, file)
+            except OSError:
+                pass
+        return resp
@@ -12,26 +12,34 @@ __all__ = [
 import errno
 
 from abc import ABC, abstractmethod
+from asyncio import (
+    ensure_future, sleep as async_sleep, to_thread, Queue as AsyncQueue, 
+    Semaphore as AsyncSemaphore, Task, 
+)
 from collections import deque
 from collections.abc import (
-    Callable, Iterable, Iterator, ItemsView, KeysView, Mapping, Sequence, ValuesView, 
+    AsyncIterator, Awaitable, Callable, Iterable, Iterator, ItemsView, KeysView, Mapping, 
+    Sequence, ValuesView, 
 )
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import cached_property
 from io import UnsupportedOperation
 from mimetypes import guess_type
 from os import fsdecode, fspath, lstat, makedirs, scandir, stat, stat_result, PathLike
 from os import path as ospath
 from posixpath import join as joinpath, splitext
+from queue import Empty, Full, Queue, SimpleQueue
 from re import compile as re_compile, escape as re_escape
 from stat import S_IFDIR, S_IFREG # TODO: common stat method
-from time import time
+from threading import Event, Lock, Thread
+from time import perf_counter, sleep, time
 from typing import (
     cast, Any, Generic, IO, Literal, Never, Self, TypeAlias, TypeVar, 
 )
 from types import MappingProxyType
 from urllib.parse import parse_qsl, urlparse
 
-from download import DownloadTask
+from download import download_iter, DownloadTask
 from filewrap import SupportsWrite
 from httpfile import HTTPFileReader
 from glob_pattern import translate_iter
@@ -46,6 +54,71 @@ P115FSType = TypeVar("P115FSType", bound="P115FileSystemBase")
 P115PathType = TypeVar("P115PathType", bound="P115PathBase")
 
 
+def _make_throttle(max_rate: None | float = None, /) -> None | Callable[[], None]:
+    """帮助函数：创建一个节流函数，每次调用时可能会阻塞，使得每秒最多调用 `max_rate` 次（线程安全）
+    """
+    if not max_rate or max_rate <= 0:
+        return None
+    interval = 1 / max_rate
+    next_time = 0.
+    lock = Lock()
+    def throttle():
+        nonlocal next_time
+        with lock:
+            now = perf_counter()
+            if next_time > now:
+                wait = next_time - now
+                next_time += interval
+            else:
+                wait = 0
+                next_time = now + interval
+        if wait:
+            sleep(wait)
+    return throttle
+
+
+def _make_async_throttle(max_rate: None | float = None, /) -> None | Callable[[], Awaitable[None]]:
+    """帮助函数：创建一个异步的节流函数，每次调用时可能会等待，使得每秒最多调用 `max_rate` 次
+    """
+    if not max_rate or max_rate <= 0:
+        return None
+    interval = 1 / max_rate
+    next_time = 0.
+    async def throttle():
+        nonlocal next_time
+        now = perf_counter()
+        if next_time > now:
+            wait = next_time - now
+            next_time += interval
+            await async_sleep(wait)
+        else:
+            next_time = now + interval
+    return throttle
+
+
+def _make_bandwidth_limiter(max_rate: None | float = None, /) -> None | Callable[[int], None]:
+    """帮助函数：创建一个限速函数，每次传输 n 个字节后调用它，可能会阻塞，使得总速度不超过每秒 `max_rate` 字节（线程安全）
+    """
+    if not max_rate or max_rate <= 0:
+        return None
+    next_time = 0.
+    lock = Lock()
+    def consume(n: int, /):
+        nonlocal next_time
+        if n <= 0:
+            return
+        with lock:
+            now = perf_counter()
+            # NOTE: 空闲过后，最多允许 1 秒的突发
+            if next_time < now - 1:
+                next_time = now - 1
+            next_time += n / max_rate
+            wait = next_time - now
+        if wait > 0:
+            sleep(wait)
+    return consume
+
+
 class P115PathBase(Generic[P115FSType], Mapping, PathLike[str]):
     id: int
     path: str
@@ -693,7 +766,13 @@ class P115FileSystemBase(Generic[P115PathType]):
         pid: None | int = None, 
         write_mode: Literal["a", "w", "x", "i"] = "a", 
         submit: bool | Callable[[Callable], Any] = True, 
+        max_workers: int = 1, 
     ) -> None | DownloadTask:
+        """下载文件
+
+        :param max_workers: 如果大于 1，则用这么多个 Range 请求分段并发下载（需要 `local_path_or_file` 是路径），
+            进度记录在旁边的 .download 文件中，`write_mode="a"` 时据此续传
+        """
         if not isinstance(local_path_or_file, SupportsWrite):
             path = cast(bytes | str | PathLike, local_path_or_file)
             if not path:
@@ -707,6 +786,8 @@ class P115FileSystemBase(Generic[P115PathType]):
                 elif write_mode == "i":
                     return None
         kwargs: dict = {"resume": write_mode == "a"}
+        if max_workers > 1:
+            kwargs["max_workers"] = max_workers
         if callable(submit):
             kwargs["submit"] = submit
         task = DownloadTask.create_task(
@@ -724,6 +805,233 @@ class P115FileSystemBase(Generic[P115PathType]):
             task.run_wait()
         return task
 
+    def _download_tree_concurrent(
+        self, 
+        /, 
+        attr: AttrDict, 
+        local_dir: str, 
+        write_mode: Literal["i", "x", "w", "a"] = "a", 
+        predicate: None | Callable[[P115PathType], bool] = None, 
+        onerror: None | bool | Callable[[BaseException], Any] = None, 
+        max_workers: int = 4, 
+        max_rate: None | float = None, 
+        url_batch_size: int = 50, 
+        report: None | Callable[[dict], Any] = None, 
+    ) -> Iterator[tuple[P115PathType, str, DownloadTask]]:
+        """`download_tree` 的流水线模式，由 3 个环节组成：
+
+            1. 遍历线程逐层罗列远程目录，每个本地目录只 `scandir` 一次，据此跳过大小相同的文件
+            2. 预取线程把待下载的文件攒成批，用 `get_url_batch` 批量获取下载链接
+            3. 下载池最多同时下载 `max_workers` 个文件，所有下载共享 `max_rate` 字节/秒的带宽上限
+
+        预取的链接只比下载池领先有限的几批，以免在开始下载前过期，过期或缺失时再用 `get_url` 单独获取。
+        每完成一个文件，都会用如下统计信息调用 `report`（遍历尚未结束时，总数还会增长）：
+
+            {
+                "files_total": int,     # 需要下载的文件数
+                "files_done": int,      # 已完成的文件数（包括失败的）
+                "files_skipped": int,   # 因为大小相同而跳过的文件数
+                "files_error": int,     # 失败的文件数
+                "bytes_total": int,     # 需要下载的总字节数
+                "bytes_done": int,      # 已完成的字节数（包括续传时跳过的）
+                "elapsed": float,       # 已用时间（秒）
+                "speed": float,         # 平均速度（字节/秒）
+                "files_per_sec": float, # 平均每秒完成的文件数
+                "eta": None | float,    # 预计剩余的秒数
+            }
+        """
+        limit = _make_bandwidth_limiter(max_rate)
+        headers = {
+            **self.client.headers, 
+            "Cookie": "; ".join(f"{c.name}={c.value}" for c in self.client.cookiejar), 
+        }
+        stats = {
+            "files_total": 0, "files_done": 0, "files_skipped": 0, "files_error": 0, 
+            "bytes_total": 0, "bytes_done": 0, "elapsed": 0.0, "speed": 0.0, 
+            "files_per_sec": 0.0, "eta": None, 
+        }
+        stats_lock = Lock()
+        stop = Event()
+        running: set[DownloadTask] = set()
+        url_queue: SimpleQueue[None | tuple[P115PathType, str, str]] = SimpleQueue()
+        task_queue: Queue[None | tuple[P115PathType, str, str, str]] = Queue(max(url_batch_size, max_workers) * 2)
+        # NOTE: 元素为 (远程路径, 本地路径, 任务, 异常)，遍历结束时放入 None
+        results: SimpleQueue[None | tuple[None | P115PathType, str, None | DownloadTask, None | BaseException]] = SimpleQueue()
+
+        def put(q: Queue, item, /) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def scan_sizes(top: str, /) -> dict[str, int]:
+            sizes: dict[str, int] = {}
+            try:
+                with scandir(top) as it:
+                    for entry in it:
+                        try:
+                            if not entry.is_dir(follow_symlinks=False):
+                                sizes[entry.name] = entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            pass
+            except FileNotFoundError:
+                pass
+            return sizes
+
+        def walk():
+            mode: str
+            dq: deque[tuple[int, str]] = deque([(attr["id"], local_dir)])
+            try:
+                while dq and not stop.is_set():
+                    top_id, top_dir = dq.popleft()
+                    try:
+                        if top_dir:
+                            makedirs(top_dir, exist_ok=True)
+                        sizes = scan_sizes(top_dir or ".")
+                        for subpath in filter(predicate, self.scandir(top_id)):
+                            download_path = ospath.join(top_dir, subpath["name"])
+                            if subpath["is_directory"]:
+                                dq.append((subpath["id"], download_path))
+                                continue
+                            mode = write_mode
+                            remote_size = subpath["size"]
+                            size = sizes.get(subpath["name"])
+                            if size is not None:
+                                if write_mode == "i" or remote_size == size:
+                                    with stats_lock:
+                                        stats["files_skipped"] += 1
+                                    continue
+                                elif write_mode == "x":
+                                    results.put((None, download_path, None, FileExistsError(
+                                        errno.EEXIST, 
+                                        f"local path already exists: {download_path!r}", 
+                                    )))
+                                    continue
+                                elif remote_size < size:
+                                    mode = "w"
+                            with stats_lock:
+                                stats["files_total"] += 1
+                                stats["bytes_total"] += remote_size or 0
+                            url_queue.put((subpath, download_path, mode))
+                    except KeyboardInterrupt:
+                        raise
+                    except BaseException as exc:
+                        results.put((None, top_dir, None, exc))
+            finally:
+                url_queue.put(None)
+                results.put(None)
+
+        def prefetch():
+            try:
+                while not stop.is_set():
+                    job = url_queue.get()
+                    if job is None:
+                        break
+                    batch = [job]
+                    while len(batch) < url_batch_size:
+                        try:
+                            job = url_queue.get(timeout=0.05)
+                        except Empty:
+                            break
+                        if job is None:
+                            url_queue.put(None)
+                            break
+                        batch.append(job)
+                    try:
+                        urls = self.get_url_batch([subpath for subpath, *_ in batch])
+                    except OSError:
+                        urls = {}
+                    for subpath, download_path, mode in batch:
+                        if not put(task_queue, (subpath, download_path, mode, urls.get(subpath["id"], ""))):
+                            return
+            finally:
+                for _ in range(max_workers):
+                    put(task_queue, None)
+
+        def track(gen, /):
+            downloaded = 0
+            for progress in gen:
+                if limit is not None:
+                    limit(progress.downloaded - downloaded)
+                    downloaded = progress.downloaded
+                with stats_lock:
+                    stats["bytes_done"] += progress.last_incr
+                yield progress
+
+        def make_get_url(id: int, url: str, /) -> Callable[[], str]:
+            def get_url() -> str:
+                nonlocal url
+                if url:
+                    url, prefetched = "", url
+                    return prefetched
+                return self.get_url(id)
+            return get_url
+
+        def work():
+            while not stop.is_set():
+                try:
+                    job = task_queue.get(timeout=0.1)
+                except Empty:
+                    continue
+                if job is None:
+                    break
+                subpath, download_path, mode, url = job
+                try:
+                    task = DownloadTask(track(download_iter(
+                        make_get_url(subpath["id"], url), 
+                        download_path, 
+                        resume=mode == "a", 
+                        headers=headers, 
+                    )))
+                    running.add(task)
+                    try:
+                        task.run_wait()
+                    finally:
+                        running.discard(task)
+                except BaseException as exc:
+                    results.put((subpath, download_path, None, exc))
+                else:
+                    results.put((subpath, download_path, task, task.result if task.state == "FAILED" else None))
+
+        threads = [Thread(target=walk, daemon=True), Thread(target=prefetch, daemon=True)]
+        threads.extend(Thread(target=work, daemon=True) for _ in range(max_workers))
+        start_t = perf_counter()
+        for t in threads:
+            t.start()
+        walking = True
+        try:
+            while walking or stats["files_done"] < stats["files_total"]:
+                item = results.get()
+                if item is None:
+                    walking = False
+                    continue
+                subpath, download_path, task, exc = item
+                if subpath is not None:
+                    with stats_lock:
+                        stats["files_done"] += 1
+                        if exc is not None:
+                            stats["files_error"] += 1
+                        elapsed = stats["elapsed"] = perf_counter() - start_t
+                        speed = stats["speed"] = stats["bytes_done"] / elapsed if elapsed else 0.0
+                        stats["files_per_sec"] = stats["files_done"] / elapsed if elapsed else 0.0
+                        stats["eta"] = (stats["bytes_total"] - stats["bytes_done"]) / speed if speed else None
+                    if report is not None:
+                        report(stats)
+                if exc is not None:
+                    if onerror is None or onerror is True:
+                        raise exc
+                    elif callable(onerror):
+                        onerror(exc)
+                elif subpath is not None and task is not None:
+                    yield subpath, download_path, task
+        finally:
+            stop.set()
+            for task in tuple(running):
+                task.close()
+
     def download_tree(
         self, 
         id_or_path: IDOrPathType = "", 
@@ -735,18 +1043,52 @@ class P115FileSystemBase(Generic[P115PathType]):
         no_root: bool = False, 
         predicate: None | Callable[[P115PathType], bool] = None, 
         onerror: None | bool | Callable[[BaseException], Any] = None, 
+        max_workers: int = 1, 
+        max_rate: None | float = None, 
+        url_batch_size: int = 50, 
+        report: None | Callable[[dict], Any] = None, 
     ) -> Iterator[tuple[P115PathType, str, DownloadTask]]:
+        """下载目录树，本地已有且大小相同的文件会被跳过（每个本地目录只扫描一次）
+
+        :param max_workers: 如果大于 1，则使用流水线模式（见 `_download_tree_concurrent`），
+            同时下载这么多个文件，产生的是已经完成的任务，此时忽略 `submit`
+        :param max_rate: 流水线模式下，所有下载合计的带宽上限（字节/秒），为 None 时不限
+        :param url_batch_size: 流水线模式下，每批预取多少个下载链接
+        :param report: 流水线模式下，每完成一个文件，就用统计信息调用一次
+        """
         local_dir = fsdecode(local_dir)
         if local_dir:
             makedirs(local_dir, exist_ok=True)
         attr = self.attr(id_or_path, pid)
         pathes: Iterable[P115PathType]
+        local_sizes: None | dict[str, int] = None
         if attr["is_directory"]:
             if not no_root:
                 local_dir = ospath.join(local_dir, attr["name"])
                 if local_dir:
                     makedirs(local_dir, exist_ok=True)
+            if max_workers > 1:
+                yield from self._download_tree_concurrent(
+                    attr, 
+                    local_dir, 
+                    write_mode=write_mode, 
+                    predicate=predicate, 
+                    onerror=onerror, 
+                    max_workers=max_workers, 
+                    max_rate=max_rate, 
+                    url_batch_size=url_batch_size, 
+                    report=report, 
+                )
+                return
             pathes = self.scandir(attr["id"])
+            local_sizes = {}
+            with scandir(local_dir or ".") as it:
+                for entry in it:
+                    try:
+                        if not entry.is_dir(follow_symlinks=False):
+                            local_sizes[entry.name] = entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        pass
         else:
             path_class = type(self).path_class
             attr["fs"] = self
@@ -767,11 +1109,15 @@ class P115FileSystemBase(Generic[P115PathType]):
                 try:
                     download_path = ospath.join(local_dir, subpath["name"])
                     remote_size = subpath["size"]
-                    try:
-                        size = lstat(download_path).st_size
-                    except OSError:
-                        pass
+                    size: None | int
+                    if local_sizes is None:
+                        try:
+                            size = lstat(download_path).st_size
+                        except OSError:
+                            size = None
                     else:
+                        size = local_sizes.get(subpath["name"])
+                    if size is not None:
                         if remote_size == size:
                             continue
                         elif remote_size < size:
@@ -934,6 +1280,24 @@ class P115FileSystemBase(Generic[P115PathType]):
             ppatht.extend(patht)
         return ppatht
 
+    def get_url_batch(
+        self, 
+        attrs: Iterable[Mapping], 
+        /, 
+        headers: None | Mapping = None, 
+    ) -> dict[int, str]:
+        """批量获取下载链接，返回 文件 id → 下载链接 的字典，获取失败的文件不在其中
+
+        NOTE: 默认逐个调用 `get_url`，子类可以改用一次请求获取多个链接
+        """
+        urls: dict[int, str] = {}
+        for attr in attrs:
+            try:
+                urls[attr["id"]] = self.get_url(attr["id"], headers=headers)
+            except OSError:
+                pass
+        return urls
+
     def glob(
         self, 
         /, 
@@ -1134,6 +1498,68 @@ class P115FileSystemBase(Generic[P115PathType]):
                 elif onerror:
                     raise
 
+    def _iter_concurrent(
+        self, 
+        top: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        min_depth: int = 1, 
+        max_depth: int = 1, 
+        predicate: None | Callable[[P115PathType], None | bool] = None, 
+        onerror: bool | Callable[[OSError], bool] = False, 
+        max_readdir_workers: int = 1, 
+        max_readdir_rate: None | float = None, 
+        **kwargs, 
+    ) -> Iterator[P115PathType]:
+        path_class = type(self).path_class
+        path = self.as_path(top, pid)
+        if min_depth <= 0:
+            pred = predicate(path) if predicate else True
+            if pred is None:
+                return
+            elif pred:
+                yield path
+            min_depth = 1
+        if not path.is_dir() or max_depth == 0:
+            return
+        throttle = _make_throttle(max_readdir_rate)
+        def listdir(path):
+            if throttle is not None:
+                throttle()
+            return self.listdir_attr(path, **kwargs)
+        results: SimpleQueue[tuple[int, Future]] = SimpleQueue()
+        executor = ThreadPoolExecutor(max(1, max_readdir_workers))
+        pending = 0
+        def submit(depth: int, path):
+            nonlocal pending
+            pending += 1
+            executor.submit(listdir, path).add_done_callback(
+                lambda fu: results.put((depth, fu)))
+        try:
+            submit(1, path)
+            while pending:
+                depth, fu = results.get()
+                pending -= 1
+                try:
+                    attrs = fu.result()
+                except OSError as e:
+                    if callable(onerror):
+                        onerror(e)
+                    elif onerror:
+                        raise
+                    continue
+                for attr in attrs:
+                    path = path_class(attr)
+                    pred = predicate(path) if predicate else True
+                    if pred is None:
+                        continue
+                    elif pred and depth >= min_depth:
+                        yield path
+                    if path.is_dir() and (max_depth < 0 or depth < max_depth):
+                        submit(depth + 1, path)
+        finally:
+            executor.shutdown(False, cancel_futures=True)
+
     def _iter_dfs(
         self, 
         top: IDOrPathType = "", 
@@ -1204,9 +1630,29 @@ class P115FileSystemBase(Generic[P115PathType]):
         max_depth: int = 1, 
         predicate: None | Callable[[P115PathType], None | bool] = None, 
         onerror: bool | Callable[[OSError], bool] = False, 
+        max_readdir_workers: int = 1, 
+        max_readdir_rate: None | float = None, 
         **kwargs, 
     ) -> Iterator[P115PathType]:
-        if topdown is None:
+        """遍历目录树
+
+        :param topdown: 为 True 时自顶向下深度优先，为 False 时自底向上深度优先，为 None 时广度优先
+        :param max_readdir_workers: 同时拉取目录列表的最大并发数，大于 1 时（或者指定了 `max_readdir_rate`）使用并发的广度优先遍历，产出顺序为拉取完成的顺序（`topdown` 为 False 时不生效）
+        :param max_readdir_rate: 每秒最多发起的目录列表请求数，为 None 时不限制
+        """
+        if topdown is not False and (max_readdir_workers > 1 or max_readdir_rate):
+            return self._iter_concurrent(
+                top, 
+                pid, 
+                min_depth=min_depth, 
+                max_depth=max_depth, 
+                predicate=predicate, 
+                onerror=onerror, 
+                max_readdir_workers=max_readdir_workers, 
+                max_readdir_rate=max_readdir_rate, 
+                **kwargs, 
+            )
+        elif topdown is None:
             return self._iter_bfs(
                 top, 
                 pid, 
@@ -1228,6 +1674,107 @@ class P115FileSystemBase(Generic[P115PathType]):
                 **kwargs, 
             )
 
+    async def iter_async(
+        self, 
+        top: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        min_depth: int = 1, 
+        max_depth: int = 1, 
+        predicate: None | Callable[[P115PathType], None | bool] = None, 
+        onerror: bool | Callable[[OSError], bool] = False, 
+        max_readdir_workers: int = 1, 
+        max_readdir_rate: None | float = None, 
+        **kwargs, 
+    ) -> AsyncIterator[P115PathType]:
+        """异步地并发广度优先遍历，产出顺序为拉取完成的顺序
+
+        :param max_readdir_workers: 同时拉取目录列表的最大并发数
+        :param max_readdir_rate: 每秒最多发起的目录列表请求数，为 None 时不限制
+        """
+        path_class = type(self).path_class
+        if isinstance(top, path_class):
+            path = top
+        else:
+            attr = await self.attr_async(top, pid)
+            attr["fs"] = self
+            path = path_class(attr)
+        if min_depth <= 0:
+            pred = predicate(path) if predicate else True
+            if pred is None:
+                return
+            elif pred:
+                yield path
+            min_depth = 1
+        if not path.is_dir() or max_depth == 0:
+            return
+        throttle = _make_async_throttle(max_readdir_rate)
+        sema = AsyncSemaphore(max(1, max_readdir_workers))
+        results: AsyncQueue[tuple[int, list[AttrDict] | Exception]] = AsyncQueue()
+        tasks: set[Task] = set()
+        async def listdir(depth: int, path):
+            async with sema:
+                if throttle is not None:
+                    await throttle()
+                try:
+                    attrs = await self._listdir_attr_async(path, **kwargs)
+                except Exception as e:
+                    results.put_nowait((depth, e))
+                else:
+                    results.put_nowait((depth, attrs))
+        def submit(depth: int, path):
+            task = ensure_future(listdir(depth, path))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        try:
+            submit(1, path)
+            pending = 1
+            while pending:
+                depth, attrs = await results.get()
+                pending -= 1
+                if isinstance(attrs, OSError):
+                    if callable(onerror):
+                        onerror(attrs)
+                    elif onerror:
+                        raise attrs
+                    continue
+                elif isinstance(attrs, Exception):
+                    raise attrs
+                for attr in attrs:
+                    path = path_class(attr)
+                    pred = predicate(path) if predicate else True
+                    if pred is None:
+                        continue
+                    elif pred and depth >= min_depth:
+                        yield path
+                    if path.is_dir() and (max_depth < 0 or depth < max_depth):
+                        submit(depth + 1, path)
+                        pending += 1
+        finally:
+            for task in tuple(tasks):
+                task.cancel()
+
+    async def attr_async(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+    ) -> AttrDict:
+        """异步获取属性，默认在线程中执行 `attr`，子类可以改为原生的异步实现
+        """
+        return await to_thread(self.attr, id_or_path, pid)
+
+    async def _listdir_attr_async(
+        self, 
+        id_or_path: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        **kwargs, 
+    ) -> list[AttrDict]:
+        """异步遍历时拉取目录列表所用的方法，默认在线程中执行 `listdir_attr`，子类可以改为原生的异步实现
+        """
+        return await to_thread(self.listdir_attr, id_or_path, pid, **kwargs)
+
     def listdir(
         self, 
         id_or_path: IDOrPathType = "", 
@@ -1415,6 +1962,61 @@ class P115FileSystemBase(Generic[P115PathType]):
                 elif onerror:
                     raise
 
+    def _walk_concurrent(
+        self, 
+        top: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        min_depth: int = 0, 
+        max_depth: int = -1, 
+        onerror: None | bool | Callable[[OSError], bool] = None, 
+        max_readdir_workers: int = 1, 
+        max_readdir_rate: None | float = None, 
+        **kwargs, 
+    ) -> Iterator[tuple[str, list[AttrDict], list[AttrDict]]]:
+        if not max_depth:
+            return
+        throttle = _make_throttle(max_readdir_rate)
+        def listdir(attr):
+            if throttle is not None:
+                throttle()
+            return self.listdir_attr(attr, **kwargs)
+        results: SimpleQueue[tuple[int, AttrDict, Future]] = SimpleQueue()
+        executor = ThreadPoolExecutor(max(1, max_readdir_workers))
+        pending = 0
+        def submit(depth: int, attr: AttrDict):
+            nonlocal pending
+            pending += 1
+            executor.submit(listdir, attr).add_done_callback(
+                lambda fu: results.put((depth, attr, fu)))
+        try:
+            submit(1, self.attr(top, pid))
+            while pending:
+                depth, parent, fu = results.get()
+                pending -= 1
+                try:
+                    attrs = fu.result()
+                except OSError as e:
+                    if callable(onerror):
+                        onerror(e)
+                    elif onerror:
+                        raise
+                    continue
+                push_me = max_depth < 0 or depth < max_depth
+                dirs: list[AttrDict] = []
+                files: list[AttrDict] = []
+                for attr in attrs:
+                    if attr["is_directory"]:
+                        dirs.append(attr)
+                        if push_me:
+                            submit(depth + 1, attr)
+                    else:
+                        files.append(attr)
+                if min_depth <= 0 or depth >= min_depth:
+                    yield parent["path"], dirs, files
+        finally:
+            executor.shutdown(False, cancel_futures=True)
+
     def _walk_dfs(
         self, 
         top: IDOrPathType = "", 
@@ -1481,6 +2083,28 @@ class P115FileSystemBase(Generic[P115PathType]):
         ):
             yield path, [a["name"] for a in dirs], [a["name"] for a in files]
 
+    async def walk_async(
+        self, 
+        top: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        min_depth: int = 0, 
+        max_depth: int = -1, 
+        onerror: None | bool | Callable[[OSError], bool] = None, 
+        **kwargs, 
+    ) -> AsyncIterator[tuple[str, list[str], list[str]]]:
+        """异步地并发广度优先遍历，参数同 `walk_attr_async`
+        """
+        async for path, dirs, files in self.walk_attr_async(
+            top, 
+            pid, 
+            min_depth=min_depth, 
+            max_depth=max_depth, 
+            onerror=onerror, 
+            **kwargs, 
+        ):
+            yield path, [a["name"] for a in dirs], [a["name"] for a in files]
+
     def walk_attr(
         self, 
         top: IDOrPathType = "", 
@@ -1490,9 +2114,28 @@ class P115FileSystemBase(Generic[P115PathType]):
         min_depth: int = 0, 
         max_depth: int = -1, 
         onerror: None | bool | Callable[[OSError], bool] = None, 
+        max_readdir_workers: int = 1, 
+        max_readdir_rate: None | float = None, 
         **kwargs, 
     ) -> Iterator[tuple[str, list[AttrDict], list[AttrDict]]]:
-        if topdown is None:
+        """遍历目录树
+
+        :param topdown: 为 True 时自顶向下深度优先，为 False 时自底向上深度优先，为 None 时广度优先
+        :param max_readdir_workers: 同时拉取目录列表的最大并发数，大于 1 时（或者指定了 `max_readdir_rate`）使用并发的广度优先遍历，产出顺序为拉取完成的顺序（`topdown` 为 False 时不生效）
+        :param max_readdir_rate: 每秒最多发起的目录列表请求数，为 None 时不限制
+        """
+        if topdown is not False and (max_readdir_workers > 1 or max_readdir_rate):
+            return self._walk_concurrent(
+                top, 
+                pid, 
+                min_depth=min_depth, 
+                max_depth=max_depth, 
+                onerror=onerror, 
+                max_readdir_workers=max_readdir_workers, 
+                max_readdir_rate=max_readdir_rate, 
+                **kwargs, 
+            )
+        elif topdown is None:
             return self._walk_bfs(
                 top, 
                 pid, 
@@ -1512,6 +2155,74 @@ class P115FileSystemBase(Generic[P115PathType]):
                 **kwargs, 
             )
 
+    async def walk_attr_async(
+        self, 
+        top: IDOrPathType = "", 
+        /, 
+        pid: None | int = None, 
+        min_depth: int = 0, 
+        max_depth: int = -1, 
+        onerror: None | bool | Callable[[OSError], bool] = None, 
+        max_readdir_workers: int = 1, 
+        max_readdir_rate: None | float = None, 
+        **kwargs, 
+    ) -> AsyncIterator[tuple[str, list[AttrDict], list[AttrDict]]]:
+        """异步地并发广度优先遍历，产出顺序为拉取完成的顺序
+
+        :param max_readdir_workers: 同时拉取目录列表的最大并发数
+        :param max_readdir_rate: 每秒最多发起的目录列表请求数，为 None 时不限制
+        """
+        if not max_depth:
+            return
+        throttle = _make_async_throttle(max_readdir_rate)
+        sema = AsyncSemaphore(max(1, max_readdir_workers))
+        results: AsyncQueue[tuple[int, AttrDict, list[AttrDict] | Exception]] = AsyncQueue()
+        tasks: set[Task] = set()
+        async def listdir(depth: int, attr: AttrDict):
+            async with sema:
+                if throttle is not None:
+                    await throttle()
+                try:
+                    attrs = await self._listdir_attr_async(attr, **kwargs)
+                except Exception as e:
+                    results.put_nowait((depth, attr, e))
+                else:
+                    results.put_nowait((depth, attr, attrs))
+        def submit(depth: int, attr: AttrDict):
+            task = ensure_future(listdir(depth, attr))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        try:
+            submit(1, await self.attr_async(top, pid))
+            pending = 1
+            while pending:
+                depth, parent, attrs = await results.get()
+                pending -= 1
+                if isinstance(attrs, OSError):
+                    if callable(onerror):
+                        onerror(attrs)
+                    elif onerror:
+                        raise attrs
+                    continue
+                elif isinstance(attrs, Exception):
+                    raise attrs
+                push_me = max_depth < 0 or depth < max_depth
+                dirs: list[AttrDict] = []
+                files: list[AttrDict] = []
+                for attr in attrs:
+                    if attr["is_directory"]:
+                        dirs.append(attr)
+                        if push_me:
+                            submit(depth + 1, attr)
+                            pending += 1
+                    else:
+                        files.append(attr)
+                if min_depth <= 0 or depth >= min_depth:
+                    yield parent["path"], dirs, files
+        finally:
+            for task in tuple(tasks):
+                task.cancel()
+
     def walk_path(
         self, 
         top: IDOrPathType = "", 
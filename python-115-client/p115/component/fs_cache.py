@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+from __future__ import annotations
+
+__author__ = "ChenyangGao <https://chenyanggao.github.io>"
+__all__ = [
+    "AttrRecord", "PathToIdIndex", "P115SQLiteCache", "SQLiteAttrCache", "SQLitePathToId", 
+]
+
+from collections import deque
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping
+from datetime import datetime
+from json import dumps, loads
+from os import PathLike
+from sqlite3 import connect, Connection
+from sys import intern
+from threading import RLock
+from typing import cast, overload, Any
+
+
+# NOTE: 这些字段在 `normalize_info` 中被转换为 `datetime`，存储时转换为时间戳
+DATETIME_KEYS = ("etime", "utime", "ptime", "open_time", "time")
+
+
+def dumps_attr(attr: dict, /) -> str:
+    attr = {k: v for k, v in attr.items() if k != "fs"}
+    for k in DATETIME_KEYS:
+        if isinstance(v := attr.get(k), datetime):
+            attr[k] = v.timestamp()
+    return dumps(attr, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads_attr(data: str, /, fs: Any = None) -> dict:
+    attr = loads(data)
+    for k in DATETIME_KEYS:
+        if isinstance(v := attr.get(k), (int, float)):
+            attr[k] = datetime.fromtimestamp(v)
+    if fs is not None:
+        attr["fs"] = fs
+    return attr
+
+
+class AttrRecord(MutableMapping[str, Any]):
+    """紧凑的文件属性记录，可以替代 `normalize_info` 返回的 dict 存储在 `attr_cache` 中
+
+    常用字段存储在 `__slots__` 中，时间（"etime", "ptime", "open_time", "utime", "time"）存储为整数时间戳，
+    取值时再转换为 `datetime`，名字会被 intern，其它字段存储在一个额外的 dict 中
+    """
+    __slots__ = (
+        "id", "parent_id", "name", "path", "is_directory", "size", "sha1", "pickcode", 
+        "mtime", "ctime", "atime", "labels", "score", "star", "shortcut", "hidden", 
+        "described", "violated", "thumb", "play_long", "ico", "fs", "_utime", "_time", "_extra", 
+    )
+    SLOT_KEYS = frozenset(__slots__[:-3])
+    DATETIME_KEYS = {
+        "etime": "mtime", "ptime": "ctime", "open_time": "atime", "utime": "_utime", "time": "_time", 
+    }
+
+    def __init__(self, attr: Mapping[str, Any] | Iterable[tuple[str, Any]] = (), /, **kwargs):
+        self.update(attr, **kwargs)
+
+    def __delitem__(self, key: str, /):
+        try:
+            if key in self.SLOT_KEYS:
+                return delattr(self, key)
+            elif slot := self.DATETIME_KEYS.get(key):
+                return delattr(self, slot)
+            else:
+                del self._extra[key]
+                return
+        except AttributeError:
+            pass
+        raise KeyError(key)
+
+    def __getitem__(self, key: str, /):
+        try:
+            if key in self.SLOT_KEYS:
+                return getattr(self, key)
+            elif slot := self.DATETIME_KEYS.get(key):
+                return datetime.fromtimestamp(getattr(self, slot))
+            else:
+                return self._extra[key]
+        except AttributeError:
+            pass
+        raise KeyError(key)
+
+    def __iter__(self, /) -> Iterator[str]:
+        for key in type(self).__slots__:
+            if key in self.SLOT_KEYS and hasattr(self, key):
+                yield key
+        for key, slot in self.DATETIME_KEYS.items():
+            if hasattr(self, slot):
+                yield key
+        try:
+            yield from self._extra
+        except AttributeError:
+            pass
+
+    def __len__(self, /) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self, /) -> str:
+        return f"{type(self).__qualname__}({self.to_dict()!r})"
+
+    def __setitem__(self, key: str, value, /):
+        if key in self.SLOT_KEYS:
+            if key == "name" and type(value) is str:
+                value = intern(value)
+            setattr(self, key, value)
+        elif slot := self.DATETIME_KEYS.get(key):
+            if isinstance(value, datetime):
+                value = int(value.timestamp())
+            setattr(self, slot, value)
+        else:
+            try:
+                self._extra[key] = value
+            except AttributeError:
+                self._extra = {key: value}
+
+    def to_dict(self, /) -> dict[str, Any]:
+        return dict(self.items())
+
+
+def as_attr_dict(attr: Mapping[str, Any], /) -> dict[str, Any]:
+    "如果是 `AttrRecord`，则转换为 dict，否则原样返回"
+    if isinstance(attr, AttrRecord):
+        return attr.to_dict()
+    return cast(dict, attr)
+
+
+def parent_of(path: str, /) -> None | str:
+    "获取路径的父路径（路径中被转义的 \"/\" 不视为分隔符），根路径 \"/\" 返回 None"
+    if path == "/":
+        return None
+    i = len(path)
+    while (i := path.rfind("/", 0, i)) > 0:
+        j = i
+        while j and path[j-1] == "\\":
+            j -= 1
+        if not (i - j) & 1:
+            return path[:i]
+    return "/" if i == 0 else ""
+
+
+class PathToIdIndex(dict[str, int]):
+    """`P115FileSystem.path_to_id` 的默认实现，是一个 dict，另外维护了每个路径到其下一级路径的索引，
+    因此可以用 `pop_prefix` 和 `move_prefix` 删除或移动整棵子树，耗时只和子树的大小有关
+    """
+    def __init__(self, iterable: Mapping[str, int] | Iterable[tuple[str, int]] = (), /, **kwargs):
+        super().__init__()
+        self._children: dict[str, set[str]] = {}
+        self.update(iterable, **kwargs)
+
+    def __delitem__(self, path: str, /):
+        super().__delitem__(path)
+        self._unlink(path)
+
+    def __setitem__(self, path: str, id: int, /):
+        if not super().__contains__(path):
+            self._link(path)
+        super().__setitem__(path, id)
+
+    def _link(self, path: str, /):
+        children = self._children
+        while (parent := parent_of(path)) is not None:
+            try:
+                children[parent].add(path)
+                break
+            except KeyError:
+                children[parent] = {path}
+                path = parent
+
+    def _unlink(self, path: str, /):
+        children = self._children
+        contains = super().__contains__
+        while not (children.get(path) or contains(path)):
+            children.pop(path, None)
+            if (parent := parent_of(path)) is None:
+                break
+            try:
+                children[parent].discard(path)
+            except KeyError:
+                break
+            path = parent
+
+    def clear(self, /):
+        super().clear()
+        self._children.clear()
+
+    def iter_prefix(self, path: str, /) -> Iterator[str]:
+        "迭代此路径及其下所有已缓存的路径"
+        children = self._children
+        contains = super().__contains__
+        dq = deque((path,))
+        get, put = dq.popleft, dq.extend
+        while dq:
+            path = get()
+            if contains(path):
+                yield path
+            if subpaths := children.get(path):
+                put(subpaths)
+
+    def move_prefix(self, old_path: str, new_path: str, /) -> int:
+        "把此路径及其下所有已缓存的路径，移动到新路径下，返回移动的条目数"
+        if old_path == new_path:
+            return 0
+        getitem = super().__getitem__
+        items = [(path, getitem(path)) for path in self.iter_prefix(old_path)]
+        self.pop_prefix(old_path)
+        len_old_path = len(old_path)
+        for path, id in items:
+            self[new_path + path[len_old_path:]] = id
+        return len(items)
+
+    @overload
+    def pop(self, path: str, /) -> int:
+        ...
+    @overload
+    def pop(self, path: str, default: int, /) -> int:
+        ...
+    def pop(self, path: str, /, *default):
+        if super().__contains__(path):
+            id = super().pop(path)
+            self._unlink(path)
+            return id
+        return super().pop(path, *default)
+
+    def pop_prefix(self, path: str, /) -> int:
+        "删除此路径及其下所有已缓存的路径，返回删除的条目数"
+        children = self._children
+        pop = super().pop
+        count = 0
+        dq = deque((path,))
+        get, put = dq.popleft, dq.extend
+        while dq:
+            subpath = get()
+            if pop(subpath, None) is not None:
+                count += 1
+            if subpaths := children.pop(subpath, None):
+                put(subpaths)
+        self._unlink(path)
+        return count
+
+    def popitem(self, /) -> tuple[str, int]:
+        path, id = super().popitem()
+        self._unlink(path)
+        return path, id
+
+    def setdefault(self, path: str, default: int, /) -> int: # type: ignore
+        if not super().__contains__(path):
+            self[path] = default
+        return super().__getitem__(path)
+
+    def update(self, iterable: Mapping[str, int] | Iterable[tuple[str, int]] = (), /, **kwargs): # type: ignore
+        if isinstance(iterable, Mapping):
+            iterable = iterable.items()
+        for path, id in iterable:
+            self[path] = id
+        for path, id in kwargs.items():
+            self[path] = id
+
+
+class P115SQLiteCache:
+    """把 `P115FileSystem` 的 `attr_cache` 和 `path_to_id` 持久化到 sqlite 数据库，重启后可以直接复用
+
+    用法：
+        cache = P115SQLiteCache("115-cache.db")
+        fs = P115FileSystem(client, attr_cache=cache.attr_cache, path_to_id=cache.path_to_id)
+
+    注意：`P115FileSystem` 默认会用 `get_version` 检查缓存是否过期（这需要请求接口），
+    如果传入 `get_version=None`，则完全信任缓存，此时热启动后根据路径查找不需要请求接口
+
+    :param dbfile: 数据库文件路径
+    :param cache_size: `attr_cache` 在内存中保留的最大条目数，超过后会写回数据库并清空
+    """
+    def __init__(
+        self, 
+        /, 
+        dbfile: bytes | str | PathLike = ":memory:", 
+        cache_size: int = 4096, 
+    ):
+        con = connect(dbfile, check_same_thread=False)
+        con.executescript("""\
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS entry (
+    id INTEGER PRIMARY KEY, 
+    attr TEXT, 
+    version TEXT, 
+    has_children INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS child (
+    parent_id INTEGER NOT NULL, 
+    id INTEGER NOT NULL, 
+    attr TEXT NOT NULL, 
+    PRIMARY KEY (parent_id, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS child_id ON child (id);
+CREATE TABLE IF NOT EXISTS path_to_id (
+    path TEXT PRIMARY KEY, 
+    id INTEGER NOT NULL
+) WITHOUT ROWID;
+""")
+        self.con: Connection = con
+        self.lock = RLock()
+        self.attr_cache = SQLiteAttrCache(self, cache_size=cache_size)
+        self.path_to_id = SQLitePathToId(self)
+
+    def __del__(self, /):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self, /):
+        return self
+
+    def __exit__(self, /, *exc_info):
+        self.close()
+
+    def close(self, /):
+        "写回所有数据，并关闭数据库"
+        try:
+            con = self.con
+        except AttributeError:
+            return
+        with self.lock:
+            self.commit()
+            con.close()
+            del self.con
+
+    def commit(self, /):
+        "把内存中的改动写回数据库"
+        with self.lock:
+            self.attr_cache.flush()
+            self.con.commit()
+
+
+class SQLiteAttrCache(MutableMapping[int, dict]):
+    """`P115FileSystem.attr_cache` 的 sqlite 实现，条目的结构为 {"attr": ..., "children": ..., "version": ...}
+
+    访问过的条目会保留在内存中（以便原地修改），在 `flush` 时写回数据库；直接赋值（例如拉取了一整个目录）时立即在一个事务中写入
+
+    NOTE: 只有 "attr" 的条目（罗列目录时为每个子项生成）不单独存储，而是存在其父目录的 child 行中，
+          赋值时只保留在内存中，随父目录的条目一起写入，所以罗列一个目录只需要 1 次提交
+    """
+    def __init__(
+        self, 
+        /, 
+        store: P115SQLiteCache, 
+        cache_size: int = 4096, 
+    ):
+        self.store = store
+        self.cache_size = cache_size
+        self.fs: Any = None
+        self._data: dict[int, dict] = {}
+
+    def __contains__(self, id, /) -> bool:
+        if id in self._data:
+            return True
+        with self.store.lock:
+            return self.store.con.execute(
+                "SELECT EXISTS(SELECT 1 FROM entry WHERE id=?) "
+                "OR EXISTS(SELECT 1 FROM child WHERE parent_id=?) "
+                "OR EXISTS(SELECT 1 FROM child WHERE id=?)", 
+                (id, id, id), 
+            ).fetchone()[0] == 1
+
+    def __delitem__(self, id: int, /):
+        with self.store.lock:
+            con = self.store.con
+            with con:
+                cur = con.execute("DELETE FROM entry WHERE id=?", (id,))
+                cur2 = con.execute("DELETE FROM child WHERE parent_id=?", (id,))
+                cur3 = con.execute("DELETE FROM child WHERE id=?", (id,))
+            if self._data.pop(id, None) is None and not (cur.rowcount or cur2.rowcount or cur3.rowcount):
+                raise KeyError(id)
+
+    def __getitem__(self, id: int, /) -> dict:
+        try:
+            return self._data[id]
+        except KeyError:
+            pass
+        with self.store.lock:
+            try:
+                return self._data[id]
+            except KeyError:
+                pass
+            entry = self._load(id)
+            if entry is None:
+                raise KeyError(id)
+            if len(self._data) >= self.cache_size:
+                self.flush(clear=True)
+            self._data[id] = entry
+            return entry
+
+    def __iter__(self, /) -> Iterator[int]:
+        with self.store.lock:
+            ids = [id for id, in self.store.con.execute(
+                "SELECT id FROM entry UNION SELECT parent_id FROM child UNION SELECT id FROM child")]
+        return iter(ids)
+
+    def __len__(self, /) -> int:
+        with self.store.lock:
+            return self.store.con.execute(
+                "SELECT COUNT(*) FROM (SELECT id FROM entry UNION SELECT parent_id FROM child UNION SELECT id FROM child)", 
+            ).fetchone()[0]
+
+    def __setitem__(self, id: int, entry: dict, /):
+        with self.store.lock:
+            data = self._data
+            data[id] = entry
+            if entry.keys() == {"attr"}:
+                return
+            if len(data) > self.cache_size:
+                self.flush(clear=True)
+            else:
+                with self.store.con:
+                    self._save(id, entry)
+
+    def _load(self, id: int, /) -> None | dict:
+        fs = self.fs
+        con = self.store.con
+        row = con.execute(
+            "SELECT attr, version, has_children FROM entry WHERE id=?", (id,)).fetchone()
+        children = {
+            cid: loads_attr(data, fs) for cid, data in con.execute(
+                "SELECT id, attr FROM child WHERE parent_id=?", (id,))
+        }
+        if row is None:
+            row2 = con.execute("SELECT attr FROM child WHERE id=? LIMIT 1", (id,)).fetchone()
+            if row2 is None and not children:
+                return None
+            row = None if row2 is None else (row2[0], None, False)
+        entry: dict = {}
+        if row is not None:
+            attr, version, has_children = row
+            if attr is not None:
+                entry["attr"] = loads_attr(attr, fs)
+            if version is not None:
+                entry["version"] = loads(version)
+            if has_children:
+                entry["children"] = children
+        if children:
+            entry["children"] = children
+        return entry
+
+    def _save(self, id: int, entry: dict, /):
+        con = self.store.con
+        attr = entry.get("attr")
+        con.execute("DELETE FROM child WHERE parent_id=?", (id,))
+        if entry.keys() == {"attr"}:
+            con.execute("DELETE FROM entry WHERE id=?", (id,))
+            if con.execute("UPDATE child SET attr=? WHERE id=?", (dumps_attr(attr), id)).rowcount:
+                return
+        con.execute(
+            "INSERT OR REPLACE INTO entry (id, attr, version, has_children) VALUES (?, ?, ?, ?)", 
+            (
+                id, 
+                None if attr is None else dumps_attr(attr), 
+                dumps(entry["version"]) if "version" in entry else None, 
+                "children" in entry, 
+            ), 
+        )
+        if children := entry.get("children"):
+            con.executemany(
+                "INSERT OR REPLACE INTO child (parent_id, id, attr) VALUES (?, ?, ?)", 
+                ((id, cid, dumps_attr(attr)) for cid, attr in children.items()), 
+            )
+
+    def flush(self, /, clear: bool = False):
+        "把内存中的条目写回数据库，如果 `clear` 为 True，则随后清空内存中的条目"
+        with self.store.lock:
+            data = self._data
+            if data:
+                # NOTE: 先写入其它条目，再写入只有 "attr" 的条目，以便它们能找到父目录的 child 行
+                items = sorted(data.items(), key=lambda item: item[1].keys() == {"attr"})
+                with self.store.con:
+                    for id, entry in items:
+                        self._save(id, entry)
+            if clear:
+                data.clear()
+
+
+class SQLitePathToId(MutableMapping[str, int]):
+    "`P115FileSystem.path_to_id` 的 sqlite 实现，写入会在下一次 `attr_cache` 写入或 `commit` 时提交"
+    def __init__(self, /, store: P115SQLiteCache):
+        self.store = store
+
+    def __contains__(self, path, /) -> bool:
+        with self.store.lock:
+            return self.store.con.execute(
+                "SELECT 1 FROM path_to_id WHERE path=?", (path,)).fetchone() is not None
+
+    def __delitem__(self, path: str, /):
+        with self.store.lock:
+            if not self.store.con.execute(
+                "DELETE FROM path_to_id WHERE path=?", (path,)
+            ).rowcount:
+                raise KeyError(path)
+
+    def __getitem__(self, path: str, /) -> int:
+        with self.store.lock:
+            row = self.store.con.execute(
+                "SELECT id FROM path_to_id WHERE path=?", (path,)).fetchone()
+        if row is None:
+            raise KeyError(path)
+        return row[0]
+
+    def __iter__(self, /) -> Iterator[str]:
+        with self.store.lock:
+            paths = [path for path, in self.store.con.execute("SELECT path FROM path_to_id")]
+        return iter(paths)
+
+    def __len__(self, /) -> int:
+        with self.store.lock:
+            return self.store.con.execute("SELECT COUNT(*) FROM path_to_id").fetchone()[0]
+
+    def __setitem__(self, path: str, id: int, /):
+        with self.store.lock:
+            self.store.con.execute(
+                "INSERT OR REPLACE INTO path_to_id (path, id) VALUES (?, ?)", (path, id))
+
+    @staticmethod
+    def _prefix_range(path: str, /) -> tuple[str, str]:
+        # NOTE: 以 path + "/" 开头的字符串，恰好在 [path + "/", path + "0") 之间
+        prefix = path if path.endswith("/") else path + "/"
+        return prefix, prefix[:-1] + "0"
+
+    def move_prefix(self, old_path: str, new_path: str, /) -> int:
+        "把此路径及其下所有已缓存的路径，移动到新路径下，返回移动的条目数"
+        if old_path == new_path:
+            return 0
+        with self.store.lock:
+            return self.store.con.execute(
+                "UPDATE OR REPLACE path_to_id SET path = ? || substr(path, ?) "
+                "WHERE path = ? OR (path >= ? AND path < ?)", 
+                (new_path, len(old_path) + 1, old_path, *self._prefix_range(old_path)), 
+            ).rowcount
+
+    def pop_prefix(self, path: str, /) -> int:
+        "删除此路径及其下所有已缓存的路径，返回删除的条目数"
+        with self.store.lock:
+            return self.store.con.execute(
+                "DELETE FROM path_to_id WHERE path = ? OR (path >= ? AND path < ?)", 
+                (path, *self._prefix_range(path)), 
+            ).rowcount
+
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+from __future__ import annotations
+
+__author__ = "ChenyangGao <https://chenyanggao.github.io>"
+__all__ = ["P115LifeSyncer"]
+
+from collections.abc import Iterator, Mapping
+from json import dumps, loads
+from logging import getLogger
+from os import fspath, replace, PathLike
+from threading import Event, Lock, Thread
+from time import time
+from typing import Any, Final, Self, TYPE_CHECKING
+
+from .client import check_response
+from .exception import LoginError
+from .fs_cache import as_attr_dict
+
+if TYPE_CHECKING:
+    from .fs import P115FileSystem
+
+
+logger = getLogger(__name__)
+
+#: 会改变文件系统的操作类型（`life_list` 中的 "behavior_type"）
+CHANGE_TYPES: Final = frozenset((
+    "upload_file", "upload_image_file", "receive_files", "new_folder", "copy_folder", 
+    "folder_rename", "move_file", "move_image_file", "rename_file", "copy_file", "delete_file", 
+))
+
+
+class P115LifeSyncer:
+    """从 `life_list` 的操作记录（上传、新建、复制、移动、改名、删除等）中增量同步 `P115FileSystem` 的缓存
+
+    每个事件只会引起针对性的失效：这个文件（或目录及其子树）从 `attr_cache`、`path_to_id` 和 `name_index` 中移除，
+    它原来和现在的上级目录被标记为过期（删除 "version"），下次访问时才重新罗列这些目录。
+    读取的位置（游标）可以保存到文件，重启后从上次停下的地方继续。
+
+    NOTE: 配合 `get_version=None` 使用效果最好，此时缓存的目录不必在每次访问时检查版本
+
+    NOTE: 后台同步失败时会记录日志，并把轮询间隔加倍（最多到 `max_interval`），成功后恢复；
+          如果遇到登录失效（`LoginError`），则停止同步，记录到 `error`，
+          并且如果 `fs.get_version` 为 None，则恢复按 "mtime" 检查目录的版本，以免缓存一直过期
+
+    :param fs: 文件系统对象，需要有 `attr_cache`
+    :param cursor_file: 保存游标的 JSON 文件路径，如果为 None，则不保存
+    :param interval: 后台线程两次轮询之间的秒数
+    :param max_interval: 连续失败时，两次轮询之间最多的秒数
+    :param start_time: 初始游标（时间戳），如果为 None，则从 `cursor_file` 读取，都没有时为当前时间
+    """
+    def __init__(
+        self, 
+        fs: P115FileSystem, 
+        /, 
+        cursor_file: None | str | PathLike = None, 
+        interval: float = 10, 
+        start_time: None | int = None, 
+        max_interval: float = 600, 
+    ):
+        self.__dict__.update(
+            fs = fs, 
+            cursor_file = cursor_file, 
+            interval = interval, 
+            max_interval = max_interval, 
+            error = None, 
+            last_time = int(time()), 
+            last_keys = set(), 
+            applied = 0, 
+            _lock = Lock(), 
+            _stop_event = Event(), 
+            _thread = None, 
+        )
+        if start_time is not None:
+            self.last_time = start_time
+        elif cursor_file is not None:
+            self.load_cursor()
+
+    def __enter__(self, /) -> Self:
+        return self.start()
+
+    def __exit__(self, /, *exc_info):
+        self.stop()
+
+    def __repr__(self, /) -> str:
+        return f"<{type(self).__qualname__}(fs={self.fs!r}, last_time={self.last_time!r}, applied={self.applied!r})>"
+
+    def load_cursor(self, /):
+        "从 `cursor_file` 读取游标"
+        try:
+            with open(self.cursor_file, "rb") as f:
+                cursor = loads(f.read())
+        except (OSError, ValueError, TypeError):
+            return
+        self.last_time = int(cursor["last_time"])
+        self.last_keys = set(map(tuple, cursor.get("last_keys", ())))
+
+    def save_cursor(self, /):
+        "把游标写入 `cursor_file`"
+        if self.cursor_file is None:
+            return
+        cursor = {"last_time": self.last_time, "last_keys": list(self.last_keys)}
+        # NOTE: 先写入临时文件再替换，以免中途退出时留下残缺的游标
+        cursor_file = fspath(self.cursor_file)
+        tmp_file = cursor_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            f.write(dumps(cursor))
+        replace(tmp_file, cursor_file)
+
+    def iter_events(self, /, page_size: int = 1000) -> Iterator[dict]:
+        """拉取游标之后的新事件（按时间先后），并推进游标，每个事件形如 {"type": 操作类型, **操作的文件信息}
+
+        同一秒内的事件用 (类型, 文件 id, 时间) 去重，因此游标所在的那一秒可以被安全地重复拉取
+        """
+        life_list = check_response(self.fs.client.life_list)
+        events: list[dict] = []
+        payload = {"start": 0, "limit": page_size, "start_time": self.last_time}
+        while True:
+            data = life_list(payload)["data"]
+            ls = data.get("list") or ()
+            for behavior in ls:
+                type = behavior.get("behavior_type")
+                if type not in CHANGE_TYPES:
+                    continue
+                for item in behavior.get("items") or ():
+                    events.append({"type": type, **item})
+            if len(ls) < page_size:
+                break
+            payload["start"] += page_size
+        events.sort(key=lambda e: int(e.get("update_time") or 0))
+        last_time = self.last_time
+        last_keys = self.last_keys
+        for event in events:
+            t = int(event.get("update_time") or 0)
+            key = (event["type"], str(event.get("file_id", "")), t)
+            if t < last_time or key in last_keys:
+                continue
+            if t > last_time:
+                last_time = t
+                last_keys = set()
+            last_keys.add(key)
+            yield event
+        self.last_time = last_time
+        self.last_keys = last_keys
+
+    def invalidate_dir(self, id: int, /):
+        "把目录的罗列结果标记为过期，下次访问时重新罗列"
+        fs = self.fs
+        if (name_index := fs.name_index) is not None:
+            name_index.pop(id, None)
+        attr_cache = fs.attr_cache
+        if attr_cache is None:
+            return
+        try:
+            id_attrs = attr_cache[id]
+        except LookupError:
+            return
+        if "version" in id_attrs:
+            del id_attrs["version"]
+            # NOTE: 重新赋值，以便持久化的缓存（例如 `SQLiteAttrCache`）写回
+            attr_cache[id] = id_attrs
+
+    def apply(self, event: Mapping[str, Any], /):
+        "把一个事件应用到缓存"
+        fs = self.fs
+        attr_cache = fs.attr_cache
+        if attr_cache is None:
+            return
+        try:
+            id = int(event["file_id"])
+        except (KeyError, TypeError, ValueError):
+            return
+        parent_ids: set[int] = set()
+        try:
+            parent_ids.add(int(event["parent_id"]))
+        except (KeyError, TypeError, ValueError):
+            pass
+        try:
+            attr = as_attr_dict(attr_cache[id]["attr"])
+        except LookupError:
+            pass
+        else:
+            parent_ids.add(attr["parent_id"])
+            fs._clear_cache(attr)
+            if not attr["is_directory"]:
+                attr_cache.pop(id, None)
+                path_to_id = fs.path_to_id
+                if path_to_id is not None:
+                    try:
+                        if path_to_id[attr["path"]] == id:
+                            del path_to_id[attr["path"]]
+                    except LookupError:
+                        pass
+        for pid in parent_ids:
+            self.invalidate_dir(pid)
+
+    def sync_once(self, /) -> int:
+        "拉取并应用一次新事件，返回事件数"
+        with self._lock:
+            n = 0
+            for event in self.iter_events():
+                self.apply(event)
+                n += 1
+            self.applied += n
+            self.save_cursor()
+            return n
+
+    def run(self, /):
+        "持续同步，直到调用 `stop`"
+        stop_event = self._stop_event
+        failures = 0
+        while not stop_event.is_set():
+            try:
+                self.sync_once()
+            except LoginError as e:
+                self.error = e
+                logger.exception("life sync stopped, since the login is invalid")
+                fs = self.fs
+                if fs.get_version is None:
+                    fs.get_version = lambda attr: attr.get("mtime", 0)
+                return
+            except Exception as e:
+                self.error = e
+                failures += 1
+                logger.exception("life sync failed (%d times in a row)", failures)
+            else:
+                failures = 0
+            interval = self.interval
+            if failures:
+                interval = min(interval * 2 ** failures, max(self.max_interval, interval))
+            stop_event.wait(interval)
+
+    def start(self, /) -> Self:
+        "启动后台同步线程"
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = Thread(target=self.run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, /):
+        "停止后台同步线程"
+        self._stop_event.set()
+        if (thread := self._thread) is not None:
+            thread.join()
+            self._thread = None
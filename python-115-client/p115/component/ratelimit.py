@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+from __future__ import annotations
+
+__author__ = "ChenyangGao <https://chenyanggao.github.io>"
+__all__ = ["TokenBucket", "AIMDLimiter", "P115RequestScheduler"]
+
+from asyncio import get_running_loop, sleep as async_sleep, Future as AsyncFuture
+from collections import deque
+from collections.abc import Awaitable, Callable, Mapping
+from random import uniform
+from threading import Condition, Lock
+from time import perf_counter, sleep
+from typing import Any, Final
+from urllib.parse import urlsplit
+
+from httpx import ConnectError, HTTPStatusError, PoolTimeout, TimeoutException, TransportError
+
+
+#: 各类接口默认的 (每秒请求数, 突发容量)，None 表示不限速
+DEFAULT_RATES: Final[dict[str, None | tuple[float, int]]] = {
+    "list": (10, 20), 
+    "info": (10, 20), 
+    "search": (4, 8), 
+    "download": (20, 40), 
+    "upload": (5, 10), 
+    "default": (20, 40), 
+}
+#: 只读的接口，即使是 POST 请求，也可以安全地重试
+IDEMPOTENT_KINDS: Final = frozenset(("list", "info", "search", "download"))
+
+
+class TokenBucket:
+    """令牌桶，每秒补充 `rate` 个令牌，最多积攒 `burst` 个，同一个实例可以同时用于多线程和异步（线程安全）
+
+    :param rate: 每秒补充的令牌数
+    :param burst: 桶的容量，也就是允许的突发请求数
+    """
+    def __init__(self, /, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate!r}")
+        self.__dict__.update(
+            rate = rate, 
+            burst = max(1, burst), 
+            tokens = float(max(1, burst)), 
+            last = perf_counter(), 
+            _lock = Lock(), 
+        )
+
+    def __repr__(self, /) -> str:
+        return f"{type(self).__qualname__}(rate={self.rate!r}, burst={self.burst!r})"
+
+    def _reserve(self, /) -> float:
+        "取走一个令牌（允许透支），返回需要等待的秒数"
+        with self._lock:
+            now = perf_counter()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate) - 1
+            self.last = now
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+    def acquire(self, /):
+        "取一个令牌，必要时阻塞等待"
+        if wait := self._reserve():
+            sleep(wait)
+
+    async def acquire_async(self, /):
+        "取一个令牌，必要时异步等待"
+        if wait := self._reserve():
+            await async_sleep(wait)
+
+
+class AIMDLimiter:
+    """并发数的 AIMD（加性增、乘性减）控制：每次成功，上限增加 `increase / limit`（大约每轮增加 `increase`），
+    遇到限流或超时，上限乘以 `decrease`（每 `cooldown` 秒最多减一次），同一个实例可以同时用于多线程和异步
+
+    :param initial: 初始的并发上限
+    :param minimum: 并发上限的最小值
+    :param maximum: 并发上限的最大值
+    :param increase: 加性增的步长
+    :param decrease: 乘性减的系数
+    :param cooldown: 两次乘性减之间的最小间隔秒数
+    """
+    def __init__(
+        self, 
+        /, 
+        initial: float = 4, 
+        minimum: float = 1, 
+        maximum: float = 64, 
+        increase: float = 1, 
+        decrease: float = 0.5, 
+        cooldown: float = 1, 
+    ):
+        lock = Lock()
+        self.__dict__.update(
+            limit = min(max(initial, minimum), maximum), 
+            minimum = minimum, 
+            maximum = maximum, 
+            increase = increase, 
+            decrease = decrease, 
+            cooldown = cooldown, 
+            active = 0, 
+            last_decrease = 0., 
+            _lock = lock, 
+            _cond = Condition(lock), 
+            _async_waiters = deque(), 
+        )
+
+    def __repr__(self, /) -> str:
+        return f"<{type(self).__qualname__}(limit={self.limit!r}, active={self.active!r})>"
+
+    def acquire(self, /):
+        "占用一个并发名额，必要时阻塞等待"
+        with self._cond:
+            while self.active >= int(self.limit):
+                self._cond.wait()
+            self.active += 1
+
+    async def acquire_async(self, /):
+        "占用一个并发名额，必要时异步等待"
+        loop = get_running_loop()
+        while True:
+            with self._lock:
+                if self.active < int(self.limit):
+                    self.active += 1
+                    return
+                fut: AsyncFuture = loop.create_future()
+                waiter = (loop, fut)
+                self._async_waiters.append(waiter)
+            try:
+                await fut
+            except BaseException:
+                with self._lock:
+                    try:
+                        self._async_waiters.remove(waiter)
+                    except ValueError:
+                        # NOTE: 已经被 `release` 唤醒过，把这次唤醒转给下一个等待者
+                        self._wake_async(int(self.limit) - self.active)
+                raise
+
+    def release(self, /, ok: None | bool = None):
+        """释放一个并发名额，并反馈结果
+
+        :param ok: 为 True 时是成功（加性增），为 False 时是被限流或超时（乘性减），为 None 时不调整
+        """
+        with self._lock:
+            self.active -= 1
+            if ok:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            elif ok is not None:
+                now = perf_counter()
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self.last_decrease = now
+            free = int(self.limit) - self.active
+            if free <= 0:
+                return
+            self._cond.notify(free)
+            self._wake_async(free)
+
+    def _wake_async(self, free: int, /):
+        "唤醒至多 `free` 个异步等待者（需要在持有 `_lock` 时调用）"
+        waiters = self._async_waiters
+        while free > 0 and waiters:
+            loop, fut = waiters.popleft()
+            if fut.done():
+                # NOTE: 已经被取消的等待者不占用唤醒名额
+                continue
+            try:
+                loop.call_soon_threadsafe(_wakeup, fut)
+            except RuntimeError:
+                # NOTE: 事件循环已经关闭
+                continue
+            free -= 1
+
+
+def _wakeup(fut: AsyncFuture, /):
+    if not fut.done():
+        fut.set_result(None)
+
+
+class P115RequestScheduler:
+    """`P115Client` 的请求调度器：按接口分类做令牌桶限速和 AIMD 并发控制，并且带抖动地重试可以安全重试的请求
+
+    接口分为 "list"（罗列）、"info"（信息）、"search"（搜索）、"download"（下载链接）、"upload"（上传）和 "default"，
+    非 115 的域名（例如上传到阿里云 OSS）不受调度。遇到 405、429 或超时时，并发上限减半，成功后逐步恢复。
+
+    GET 请求和只读接口（`IDEMPOTENT_KINDS`）的请求，在超时、连接错误或 `retry_statuses` 状态码时重试；
+    其它请求只在请求未发出（连接失败）时重试。
+
+    :param rates: 各类接口的 (每秒请求数, 突发容量)，值为 None 时不限速，会合并到 `DEFAULT_RATES`
+    :param max_retries: 最大重试次数
+    :param backoff_base: 退避的基数（秒），第 i 次重试前随机等待 [0, min(backoff_max, backoff_base * 2 ** i)] 秒
+    :param backoff_max: 退避的最大秒数
+    :param initial_concurrency: 每类接口初始的并发上限
+    :param max_concurrency: 每类接口并发上限的最大值
+    :param retry_statuses: 可以重试的 HTTP 状态码
+    :param throttle_statuses: 表示被限流的 HTTP 状态码
+    """
+    def __init__(
+        self, 
+        /, 
+        rates: None | Mapping[str, None | float | tuple[float, int]] = None, 
+        max_retries: int = 3, 
+        backoff_base: float = 0.5, 
+        backoff_max: float = 30, 
+        initial_concurrency: float = 4, 
+        max_concurrency: float = 64, 
+        retry_statuses: frozenset[int] = frozenset((405, 429, 500, 502, 503, 504)), 
+        throttle_statuses: frozenset[int] = frozenset((405, 429)), 
+    ):
+        merged: dict[str, None | tuple[float, int]] = dict(DEFAULT_RATES)
+        if rates:
+            for kind, rate in rates.items():
+                if rate is None or isinstance(rate, tuple):
+                    merged[kind] = rate
+                else:
+                    merged[kind] = (rate, max(1, int(rate)))
+        self.__dict__.update(
+            rates = merged, 
+            max_retries = max_retries, 
+            backoff_base = backoff_base, 
+            backoff_max = backoff_max, 
+            initial_concurrency = initial_concurrency, 
+            max_concurrency = max_concurrency, 
+            retry_statuses = retry_statuses, 
+            throttle_statuses = throttle_statuses, 
+            buckets = {}, 
+            limiters = {}, 
+            stats = {}, 
+            _lock = Lock(), 
+        )
+
+    def __repr__(self, /) -> str:
+        return f"<{type(self).__qualname__}(limiters={self.limiters!r})>"
+
+    @staticmethod
+    def classify(url: str, /, method: str = "GET") -> None | str:
+        "判断请求属于哪类接口，返回 None 表示不做调度"
+        urlp = urlsplit(url)
+        host = urlp.hostname or ""
+        if not (host == "115.com" or host.endswith(".115.com")):
+            return None
+        path = urlp.path.rstrip("/")
+        if host.startswith("uplb.") or path.endswith("/uploadinfo"):
+            return "upload"
+        elif "downurl" in path or path.endswith(("/files/download", "/downlist")):
+            return "download"
+        elif path.endswith("/files/search"):
+            return "search"
+        elif path.endswith(("/files", "/files.php", "/share/snap")):
+            return "list"
+        elif path.endswith(("/files/get_info", "/files/file", "/category/get")):
+            return "info"
+        return "default"
+
+    def _get(self, kind: str, /) -> tuple[None | TokenBucket, AIMDLimiter, dict]:
+        try:
+            return self.buckets[kind], self.limiters[kind], self.stats[kind]
+        except KeyError:
+            pass
+        with self._lock:
+            if kind not in self.limiters:
+                rate = self.rates.get(kind, self.rates.get("default"))
+                self.buckets[kind] = None if rate is None else TokenBucket(*rate)
+                self.stats[kind] = {"requests": 0, "retries": 0, "throttled": 0, "errors": 0}
+                self.limiters[kind] = AIMDLimiter(self.initial_concurrency, maximum=self.max_concurrency)
+            return self.buckets[kind], self.limiters[kind], self.stats[kind]
+
+    def _count(self, stats: dict, key: str, /):
+        "统计数加 1（多个线程共用统计数据，所以要加锁）"
+        with self._lock:
+            stats[key] += 1
+
+    def _judge(
+        self, 
+        exc: BaseException, 
+        /, 
+        kind: str, 
+        method: str, 
+        attempt: int, 
+    ) -> tuple[None | bool, None | float]:
+        """判断异常的性质，返回 (AIMD 反馈, 重试前等待的秒数)，后者为 None 时不重试
+        """
+        feedback: None | bool = None
+        retryable = False
+        idempotent = method.upper() in ("GET", "HEAD", "OPTIONS") or kind in IDEMPOTENT_KINDS
+        retry_after = 0.
+        if isinstance(exc, HTTPStatusError):
+            status = exc.response.status_code
+            if status in self.throttle_statuses:
+                feedback = False
+            retryable = idempotent and status in self.retry_statuses
+            try:
+                retry_after = float(exc.response.headers.get("Retry-After") or 0)
+            except ValueError:
+                pass
+        elif isinstance(exc, (ConnectError, PoolTimeout)):
+            # NOTE: 请求还没有发出，任何方法都可以重试
+            retryable = True
+        elif isinstance(exc, TimeoutException):
+            feedback = False
+            retryable = idempotent
+        elif isinstance(exc, TransportError):
+            retryable = idempotent
+        if not retryable or attempt >= self.max_retries:
+            return feedback, None
+        delay = uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return feedback, max(delay, min(retry_after, self.backoff_max))
+
+    def request(
+        self, 
+        call: Callable[[], Any], 
+        /, 
+        url: str, 
+        method: str = "GET", 
+    ) -> Any:
+        "在调度下执行同步请求 `call()`"
+        kind = self.classify(url, method)
+        if kind is None:
+            return call()
+        bucket, limiter, stats = self._get(kind)
+        for attempt in range(self.max_retries + 1):
+            if bucket is not None:
+                bucket.acquire()
+            limiter.acquire()
+            self._count(stats, "requests")
+            try:
+                resp = call()
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    limiter.release()
+                    raise
+                feedback, delay = self._judge(e, kind, method, attempt)
+                limiter.release(feedback)
+                if feedback is False:
+                    self._count(stats, "throttled")
+                if delay is None:
+                    self._count(stats, "errors")
+                    raise
+                self._count(stats, "retries")
+                sleep(delay)
+            else:
+                limiter.release(True)
+                return resp
+
+    async def request_async(
+        self, 
+        call: Callable[[], Awaitable], 
+        /, 
+        url: str, 
+        method: str = "GET", 
+    ) -> Any:
+        "在调度下执行异步请求 `await call()`"
+        kind = self.classify(url, method)
+        if kind is None:
+            return await call()
+        bucket, limiter, stats = self._get(kind)
+        for attempt in range(self.max_retries + 1):
+            if bucket is not None:
+                await bucket.acquire_async()
+            await limiter.acquire_async()
+            self._count(stats, "requests")
+            try:
+                resp = await call()
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    # NOTE: 例如被取消，归还名额但不调整上限
+                    limiter.release()
+                    raise
+                feedback, delay = self._judge(e, kind, method, attempt)
+                limiter.release(feedback)
+                if feedback is False:
+                    self._count(stats, "throttled")
+                if delay is None:
+                    self._count(stats, "errors")
+                    raise
+                self._count(stats, "retries")
+                await async_sleep(delay)
+            else:
+                limiter.release(True)
+                return resp
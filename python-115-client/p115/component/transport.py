@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+from __future__ import annotations
+
+__author__ = "ChenyangGao <https://chenyanggao.github.io>"
+__all__ = ["CachedResolver", "SessionStats", "make_session"]
+
+from asyncio import get_running_loop
+from collections.abc import Mapping
+from socket import getaddrinfo, AF_UNSPEC, SOCK_STREAM
+from threading import Lock
+from time import perf_counter, time
+from typing import overload, Any, Literal
+
+from httpcore import AnyIOBackend, SyncBackend
+from httpx import AsyncClient, AsyncHTTPTransport, Client, HTTPTransport, Limits
+
+try:
+    from httpx._utils import get_environment_proxies
+except ImportError:
+    def get_environment_proxies() -> dict[str, None | str]:
+        return {}
+
+
+class CachedResolver:
+    """DNS 缓存，解析结果保留 `ttl` 秒，同一个实例可以同时用于多线程和异步
+
+    :param ttl: 缓存的秒数
+    """
+    def __init__(self, /, ttl: float = 300):
+        self.__dict__.update(ttl = ttl, cache = {}, _lock = Lock())
+
+    def __repr__(self, /) -> str:
+        return f"{type(self).__qualname__}(ttl={self.ttl!r})"
+
+    def _get(self, host: str, port: int, /) -> None | str:
+        try:
+            expire, addr = self.cache[(host, port)]
+        except KeyError:
+            return None
+        if expire < time():
+            return None
+        return addr
+
+    def _set(self, host: str, port: int, infos: list, /) -> str:
+        if not infos:
+            return host
+        addr = infos[0][4][0]
+        with self._lock:
+            self.cache[(host, port)] = (time() + self.ttl, addr)
+        return addr
+
+    def resolve(self, host: str, port: int, /) -> str:
+        "把主机名解析为 ip"
+        if addr := self._get(host, port):
+            return addr
+        return self._set(host, port, getaddrinfo(host, port, AF_UNSPEC, SOCK_STREAM))
+
+    async def resolve_async(self, host: str, port: int, /) -> str:
+        "把主机名异步解析为 ip"
+        if addr := self._get(host, port):
+            return addr
+        infos = await get_running_loop().getaddrinfo(host, port, family=AF_UNSPEC, type=SOCK_STREAM)
+        return self._set(host, port, infos)
+
+
+class _CachedDNSBackend(SyncBackend):
+
+    def __init__(self, /, resolver: CachedResolver):
+        self.resolver = resolver
+
+    def connect_tcp(self, host, port, *args, **kwargs):
+        # NOTE: 只替换用于连接的地址，TLS 握手的 server_hostname 依然是原来的主机名
+        return super().connect_tcp(self.resolver.resolve(host, port), port, *args, **kwargs)
+
+
+class _AsyncCachedDNSBackend(AnyIOBackend):
+
+    def __init__(self, /, resolver: CachedResolver):
+        self.resolver = resolver
+
+    async def connect_tcp(self, host, port, *args, **kwargs):
+        addr = await self.resolver.resolve_async(host, port)
+        return await super().connect_tcp(addr, port, *args, **kwargs)
+
+
+class SessionStats:
+    """会话的连接统计，用来确定连接池的大小
+
+    - requests: 请求数
+    - connections: 新建的连接数
+    - reused: 复用已有连接的请求数
+    - pool_waits: 等待连接池超过 1 毫秒的请求数
+    - pool_wait_total: 等待连接池的总秒数
+    - pool_wait_max: 等待连接池的最长秒数
+    """
+    def __init__(self, /):
+        self.__dict__.update(
+            requests = 0, 
+            connections = 0, 
+            pool_waits = 0, 
+            pool_wait_total = 0., 
+            pool_wait_max = 0., 
+            _lock = Lock(), 
+        )
+
+    def __repr__(self, /) -> str:
+        return f"{type(self).__qualname__}({self.snapshot()!r})"
+
+    @property
+    def reused(self, /) -> int:
+        return max(0, self.requests - self.connections)
+
+    def snapshot(self, /) -> dict[str, Any]:
+        "当前的统计数据"
+        return {
+            "requests": self.requests, 
+            "connections": self.connections, 
+            "reused": self.reused, 
+            "pool_waits": self.pool_waits, 
+            "pool_wait_total": self.pool_wait_total, 
+            "pool_wait_max": self.pool_wait_max, 
+        }
+
+    def reset(self, /):
+        with self._lock:
+            self.requests = self.connections = self.pool_waits = 0
+            self.pool_wait_total = self.pool_wait_max = 0.
+
+    def _make_trace(self, /):
+        """创建一个 httpcore 的 trace 回调：从发起请求到第一个连接事件之间的时间，近似为等待连接池的时间，
+        如果第一个事件不是建立 tcp 连接，那么这个请求复用了已有的连接
+        """
+        start = perf_counter()
+        first = True
+        def trace(event: str, info: dict, /):
+            nonlocal first
+            if first and event.endswith(".started"):
+                first = False
+                wait = perf_counter() - start
+                with self._lock:
+                    self.requests += 1
+                    if wait > 0.001:
+                        self.pool_waits += 1
+                    self.pool_wait_total += wait
+                    if wait > self.pool_wait_max:
+                        self.pool_wait_max = wait
+            if event == "connection.connect_tcp.complete":
+                with self._lock:
+                    self.connections += 1
+        return trace
+
+    def request_hook(self, request, /):
+        request.extensions["trace"] = self._make_trace()
+
+    async def async_request_hook(self, request, /):
+        trace = self._make_trace()
+        async def async_trace(event: str, info: dict, /):
+            trace(event, info)
+        request.extensions["trace"] = async_trace
+
+
+def _make_transport(
+    async_: bool, 
+    /, 
+    limits: Limits, 
+    http2: bool, 
+    resolver: None | CachedResolver, 
+    proxy: None | str = None, 
+) -> HTTPTransport | AsyncHTTPTransport:
+    transport: HTTPTransport | AsyncHTTPTransport
+    if async_:
+        transport = AsyncHTTPTransport(verify=False, limits=limits, http2=http2, proxy=proxy)
+        backend: Any = None if resolver is None else _AsyncCachedDNSBackend(resolver)
+    else:
+        transport = HTTPTransport(verify=False, limits=limits, http2=http2, proxy=proxy)
+        backend = None if resolver is None else _CachedDNSBackend(resolver)
+    if backend is not None:
+        # NOTE: httpx 没有开放 network_backend 参数，只好替换底层 httpcore 连接池的网络后端
+        pool = getattr(transport, "_pool", None)
+        if pool is not None and hasattr(pool, "_network_backend"):
+            pool._network_backend = backend
+    return transport
+
+
+def _proxy_for_host(env_proxies: Mapping[str, None | str], host: str, /) -> None | str:
+    "环境变量中的代理设置里，用于访问 https://`host` 的代理"
+    for pattern in (f"all://{host}", f"https://{host}"):
+        if pattern in env_proxies:
+            return env_proxies[pattern]
+    return env_proxies.get("https://") or env_proxies.get("all://")
+
+
+@overload
+def make_session(
+    async_: Literal[False] = False, 
+    /, 
+    max_connections: None | int = 100, 
+    max_keepalive_connections: None | int = 20, 
+    keepalive_expiry: None | float = 5, 
+    http2: bool = False, 
+    per_host: None | Mapping[str, int] = None, 
+    resolver: None | CachedResolver = None, 
+    stats: None | SessionStats = None, 
+    trust_env: bool = True, 
+) -> Client:
+    ...
+@overload
+def make_session(
+    async_: Literal[True], 
+    /, 
+    max_connections: None | int = 100, 
+    max_keepalive_connections: None | int = 20, 
+    keepalive_expiry: None | float = 5, 
+    http2: bool = False, 
+    per_host: None | Mapping[str, int] = None, 
+    resolver: None | CachedResolver = None, 
+    stats: None | SessionStats = None, 
+    trust_env: bool = True, 
+) -> AsyncClient:
+    ...
+def make_session(
+    async_: Literal[False, True] = False, 
+    /, 
+    max_connections: None | int = 100, 
+    max_keepalive_connections: None | int = 20, 
+    keepalive_expiry: None | float = 5, 
+    http2: bool = False, 
+    per_host: None | Mapping[str, int] = None, 
+    resolver: None | CachedResolver = None, 
+    stats: None | SessionStats = None, 
+    trust_env: bool = True, 
+) -> Client | AsyncClient:
+    """创建一个调好连接池的 httpx 会话（默认值和 httpx 相同）
+
+    :param async_: 是否创建异步会话
+    :param max_connections: 连接池的最大连接数，为 None 时不限
+    :param max_keepalive_connections: 最多保持多少个空闲连接
+    :param keepalive_expiry: 空闲连接保持的秒数
+    :param http2: 是否启用 HTTP/2 多路复用（需要安装 h2，例如 `pip install httpx[http2]`）
+    :param per_host: 为这些主机单独建立连接池，主机名 → 最大连接数（空闲连接数和保持时间同上）
+    :param resolver: DNS 缓存，如果为 None，则不缓存
+    :param stats: 连接统计，如果为 None，则不统计
+    :param trust_env: 是否使用环境变量中的代理设置（HTTP_PROXY、HTTPS_PROXY、ALL_PROXY 和 NO_PROXY），
+        因为指定了 transport 后，httpx 不再读取这些环境变量，所以在这里按相同的规则重建
+    """
+    limits = Limits(
+        max_connections=max_connections, 
+        max_keepalive_connections=max_keepalive_connections, 
+        keepalive_expiry=keepalive_expiry, 
+    )
+    env_proxies = get_environment_proxies() if trust_env else {}
+    mounts: None | dict = None
+    if env_proxies:
+        # NOTE: 值为 None 的模式（来自 NO_PROXY）使用默认的 transport，也就是直连
+        mounts = {
+            pattern: None if proxy is None else _make_transport(async_, limits, http2, resolver, proxy)
+            for pattern, proxy in env_proxies.items()
+        }
+    if per_host:
+        mounts = mounts or {}
+        mounts.update({
+            f"all://{host}": _make_transport(
+                async_, 
+                Limits(
+                    max_connections=n, 
+                    max_keepalive_connections=n if max_keepalive_connections is None else min(n, max_keepalive_connections), 
+                    keepalive_expiry=keepalive_expiry, 
+                ), 
+                http2, 
+                resolver, 
+                _proxy_for_host(env_proxies, host), 
+            )
+            for host, n in per_host.items()
+        })
+    event_hooks = None
+    if stats is not None:
+        event_hooks = {"request": [stats.async_request_hook if async_ else stats.request_hook]}
+    kwargs: dict = {
+        "transport": _make_transport(async_, limits, http2, resolver), 
+        "mounts": mounts, 
+        "event_hooks": event_hooks, 
+    }
+    if async_:
+        return AsyncClient(**kwargs)
+    return Client(**kwargs)
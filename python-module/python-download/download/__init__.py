@@ -4,7 +4,7 @@
 __author__ = "ChenyangGao <https://chenyanggao.github.io>"
 __version__ = (0, 0, 1)
 __all__ = [
-    "DownloadTask", "download_iter", "download", "requests_download", 
+    "DownloadTask", "download_iter", "download_segmented_iter", "download", "requests_download", 
     "download_async_iter", "async_download", 
 ]
 
@@ -21,19 +21,24 @@ __all__ = [
 import errno
 
 from collections.abc import AsyncGenerator, AsyncIterator, Callable, Generator, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from inspect import isasyncgen, isgenerator
-from os import fsdecode, fstat, makedirs, PathLike
+from json import dumps, loads
+from os import fsdecode, fstat, ftruncate, lseek, makedirs, remove, replace, stat, write, PathLike, SEEK_SET
 from os.path import abspath, dirname, isdir, join as joinpath
+from queue import Empty, Full, Queue
 from shutil import COPY_BUFSIZE # type: ignore
-from threading import Event
+from threading import Event, Lock
+from time import perf_counter, sleep
 from typing import cast, Any, NamedTuple, Self
+from urllib.error import HTTPError
 
 from aiohttp_client_request import request as aiohttp_request
 from asynctools import ensure_async, as_thread
 from concurrenttools import run_as_thread
 from filewrap import bio_skip_iter, bio_skip_async_iter, SupportsRead, SupportsWrite
 from http_request import headers_str_to_dict
-from http_response import get_filename, get_length, is_chunked, is_range_request
+from http_response import get_filename, get_length, get_range, get_total_length, is_chunked, is_range_request
 from iterutils import cut_iter
 from requests_request import request as requests_request
 from urlopen import urlopen
@@ -47,6 +52,21 @@ else:
     if "__getattr__" not in FileIOWrapperBase.__dict__:
         setattr(FileIOWrapperBase, "__getattr__", lambda self, attr, /: getattr(self.file, attr))
 
+try:
+    from os import pwrite
+except ImportError:
+    _pwrite_lock = Lock()
+    def pwrite(fd: int, data, offset: int, /) -> int: # type: ignore
+        "没有 `os.pwrite` 的平台（例如 Windows），用加锁的 seek + write 代替"
+        with _pwrite_lock:
+            lseek(fd, offset, SEEK_SET)
+            return write(fd, data)
+
+#: 断点续传时，把完成情况保存在下载文件旁边的这个后缀的文件中
+SIDECAR_SUFFIX = ".download"
+#: 分段下载时，数据先写入这个后缀的文件，完成后才改名为目标文件
+PART_SUFFIX = ".part"
+
 
 class DownloadProgress(NamedTuple):
     total: int
@@ -175,9 +195,21 @@ def download_iter(
     chunksize: int = COPY_BUFSIZE, 
     headers: None | dict[str, str] | Callable[[], dict[str, str]] = None, 
     urlopen: Callable = urlopen, 
+    max_workers: int = 1, 
 ) -> Generator[DownloadProgress, None, None]:
     """
+    :param max_workers: 如果大于 1，且 `file` 是路径，则用 `download_segmented_iter` 分段并发下载
     """
+    if max_workers > 1 and not hasattr(file, "write"):
+        return (yield from download_segmented_iter(
+            url, 
+            cast(bytes | str | PathLike, file), 
+            resume=resume, 
+            chunksize=chunksize, 
+            headers=headers, 
+            urlopen=urlopen, 
+            max_workers=max_workers, 
+        ))
     if not isinstance(url, str):
         url = url()
 
@@ -259,6 +291,360 @@ def download_iter(
         resp.close()
 
 
+class _Segment:
+    "下载的一个分段，正在下载 [pos, stop)，`stop` 可能被其它线程缩小（任务被分走）"
+    __slots__ = ("start", "pos", "stop")
+
+    def __init__(self, start: int, stop: int, /):
+        self.start = self.pos = start
+        self.stop = stop
+
+    @property
+    def remaining(self, /) -> int:
+        return max(0, self.stop - self.pos)
+
+
+class _Bitmap:
+    "记录哪些块已经写完，保存为 sidecar 文件：第 1 行是 JSON 头部，其后是位图"
+
+    def __init__(self, length: int, block_size: int, /, data: None | bytes = None):
+        self.length = length
+        self.block_size = block_size
+        nblocks = self.nblocks = (length + block_size - 1) // block_size
+        if data is None or len(data) != (nblocks + 7) // 8:
+            self.bits = bytearray((nblocks + 7) // 8)
+        else:
+            self.bits = bytearray(data)
+
+    def __contains__(self, i: int, /) -> bool:
+        return bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def add(self, i: int, /):
+        self.bits[i >> 3] |= 1 << (i & 7)
+
+    def mark(self, start: int, stop: int, /):
+        "标记 [start, stop) 中完整覆盖的块"
+        block_size = self.block_size
+        i = -(-start // block_size)
+        j = self.nblocks if stop >= self.length else stop // block_size
+        for k in range(i, j):
+            self.add(k)
+
+    def done(self, /) -> int:
+        "已完成的字节数"
+        block_size = self.block_size
+        n = sum(block_size for i in range(self.nblocks) if i in self)
+        if self.nblocks and self.nblocks - 1 in self:
+            n -= self.nblocks * block_size - self.length
+        return n
+
+    def missing(self, /) -> Iterator[tuple[int, int]]:
+        "未完成的区间 [start, stop)"
+        block_size = self.block_size
+        i = 0
+        nblocks = self.nblocks
+        while i < nblocks:
+            if i in self:
+                i += 1
+                continue
+            j = i + 1
+            while j < nblocks and j not in self:
+                j += 1
+            yield i * block_size, min(j * block_size, self.length)
+            i = j
+
+    def dump(self, path: str, /):
+        header = dumps({"length": self.length, "block_size": self.block_size}).encode()
+        # NOTE: 先写入临时文件再替换，所以 sidecar 文件要么是旧的，要么是新的，不会残缺
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header + b"\n" + self.bits)
+        replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, length: int, block_size: int, /) -> None | Self:
+        "读取 sidecar 文件，如果不存在或者与当前下载不符，则返回 None"
+        try:
+            with open(path, "rb") as f:
+                header, _, data = f.read().partition(b"\n")
+            meta = loads(header)
+        except (OSError, ValueError):
+            return None
+        if meta.get("length") != length or meta.get("block_size") != block_size:
+            return None
+        return cls(length, block_size, data)
+
+
+def download_segmented_iter(
+    url: str | Callable[[], str], 
+    file: bytes | str | PathLike = "", 
+    resume: bool = False, 
+    chunksize: int = COPY_BUFSIZE, 
+    headers: None | dict[str, str] | Callable[[], dict[str, str]] = None, 
+    urlopen: Callable = urlopen, 
+    max_workers: int = 4, 
+    block_size: int = 1 << 20, 
+    max_retries: int = 5, 
+) -> Generator[DownloadProgress, None, None]:
+    """分段并发下载：预先分配文件大小，`max_workers` 个线程各自用 Range 请求下载一段，用 `os.pwrite` 写到对应位置
+
+    - 数据写入 `<file>.part`，下载完成后才改名为 `file`，所以 `file` 存在时总是完整的
+    - 完成情况按块（`block_size`）记录在 `<file>.download` 里（在预分配之前写入，每次都原子地替换），
+      `resume` 为真时据此续传，下载完成后删除；如果 `<file>.part` 没有对应的记录，则从头下载
+    - 生成器不被迭代时（例如 `DownloadTask.pause()`），最多再缓冲几个块，然后各线程就会停下等待
+    - 空闲的线程会把剩余最多的那个分段切走一半（按块对齐），所以慢的连接不会拖住整个下载
+    - 如果 `url` 是可调用的，当链接失效（401、403、404、410）时，会调用它获取新链接，然后从断点继续
+    - 如果服务器不支持 Range 请求，或者长度未知，则退回到 `download_iter`
+
+    :param url: 下载链接，或者返回下载链接的函数
+    :param file: 保存的路径，如果是目录，则使用响应中的文件名
+    :param resume: 是否断点续传
+    :param chunksize: 每次读取的块大小
+    :param headers: 请求头，或者返回请求头的函数
+    :param urlopen: 发起请求的函数，调用方式是 `urlopen(url, headers=headers)`
+    :param max_workers: 并发数
+    :param block_size: 断点续传的记录粒度，分段的边界都按它对齐
+    :param max_retries: 每个分段遇到错误时的最大重试次数
+    """
+    get_url: None | Callable[[], str] = None
+    if not isinstance(url, str):
+        get_url = url
+        url = url()
+    if callable(headers):
+        headers = headers()
+    if headers:
+        headers = {**headers, "Accept-Encoding": "identity"}
+    else:
+        headers = {"Accept-Encoding": "identity"}
+    if chunksize <= 0:
+        chunksize = COPY_BUFSIZE
+    if block_size <= 0:
+        block_size = 1 << 20
+
+    resp = urlopen(url, headers={**headers, "Range": "bytes=0-"})
+    try:
+        length = get_total_length(resp)
+        seekable = get_range(resp) is not None
+        file = abspath(fsdecode(file))
+        if isdir(file):
+            file = joinpath(file, get_filename(resp, "download"))
+    finally:
+        resp.close()
+    if not seekable or not length or length < 2 * block_size:
+        return (yield from download_iter(
+            get_url or url, file, resume=resume, chunksize=chunksize, headers=headers, urlopen=urlopen))
+
+    extra = {"url": url, "file": file, "resume": resume}
+    part = file + PART_SUFFIX
+    sidecar = file + SIDECAR_SUFFIX
+    bitmap: None | _Bitmap = None
+    if resume:
+        try:
+            filesize = stat(file).st_size
+        except OSError:
+            filesize = -1
+        if filesize == length:
+            # NOTE: 分段下载只在完成后才改名为 `file`，`download_iter` 是追加写入，所以大小一致就是已经完成
+            yield DownloadProgress(length, 0, length, length, extra)
+            return
+        try:
+            stat(part)
+        except OSError:
+            if 0 < filesize < length:
+                # NOTE: 视为由 `download_iter` 下载的前缀
+                replace(file, part)
+                bitmap = _Bitmap(length, block_size)
+                bitmap.mark(0, filesize)
+        else:
+            # NOTE: 没有 sidecar 文件（或与当前下载不符）时，不知道预分配的文件里哪些是数据，只能从头下载
+            bitmap = _Bitmap.load(sidecar, length, block_size)
+    fresh = bitmap is None
+    if bitmap is None:
+        bitmap = _Bitmap(length, block_size)
+    try:
+        bitmap.dump(sidecar)
+    except FileNotFoundError:
+        makedirs(dirname(file), exist_ok=True)
+        bitmap.dump(sidecar)
+    with open(part, "wb" if fresh else "r+b") as fdst:
+        fd = fdst.fileno()
+        if fstat(fd).st_size != length:
+            ftruncate(fd, length)
+        skipped = bitmap.done()
+        yield DownloadProgress(length, 0, skipped, skipped, extra)
+        if skipped < length:
+            yield from _download_segments(
+                fd, bitmap, sidecar, url, get_url, headers, urlopen, chunksize, max_workers, max_retries, skipped, extra)
+    # NOTE: 先改名再删除 sidecar，中途退出时，续传能看到完整的 `file`
+    replace(part, file)
+    try:
+        remove(sidecar)
+    except OSError:
+        pass
+
+
+def _download_segments(
+    fd: int, 
+    bitmap: _Bitmap, 
+    sidecar: str, 
+    url: str, 
+    get_url: None | Callable[[], str], 
+    headers: dict[str, str], 
+    urlopen: Callable, 
+    chunksize: int, 
+    max_workers: int, 
+    max_retries: int, 
+    skipped: int, 
+    extra: Any, 
+) -> Generator[DownloadProgress, None, None]:
+    "用多个线程下载 `bitmap` 中未完成的块，写入 `fd`，在下载完成后返回，否则抛出异常"
+    length = bitmap.length
+    block_size = bitmap.block_size
+    # 把未完成的区间，按块对齐，切成至少 max_workers 个分段
+    pending: list[_Segment] = []
+    missing = list(bitmap.missing())
+    seg_size = max(block_size, -(-(length - skipped) // max_workers // block_size) * block_size)
+    for start, stop in missing:
+        for i in range(start, stop, seg_size):
+            pending.append(_Segment(i, min(i + seg_size, stop)))
+    pending.reverse()
+    active: list[_Segment] = []
+    lock = Lock()
+    stop_event = Event()
+    # NOTE: 有界队列：生成器不被迭代时（例如暂停），各线程在 `report` 处停下，而不是继续下载
+    queue: Queue[int | BaseException | None] = Queue(max_workers * 4)
+    url_state = [url, 0]
+
+    def report(item: int | BaseException | None, /):
+        while not stop_event.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return
+            except Full:
+                pass
+
+    def refresh_url(generation: int, /) -> tuple[str, int]:
+        with lock:
+            if get_url is not None and url_state[1] == generation:
+                url_state[0] = get_url()
+                url_state[1] += 1
+            return url_state[0], url_state[1]
+
+    def take() -> None | _Segment:
+        with lock:
+            if pending:
+                seg = pending.pop()
+            else:
+                # NOTE: 分走剩余最多的那个分段的后一半
+                victim = max(active, key=lambda s: s.remaining, default=None)
+                if victim is None:
+                    return None
+                mid = -(-(victim.pos + victim.stop) // 2 // block_size) * block_size
+                if victim.stop - mid < block_size or mid <= victim.pos:
+                    return None
+                seg = _Segment(mid, victim.stop)
+                victim.stop = mid
+            active.append(seg)
+            return seg
+
+    def fetch(seg: _Segment, /):
+        url, generation = url_state
+        retries = 0
+        while seg.pos < seg.stop and not stop_event.is_set():
+            if retries > max_retries:
+                raise OSError(errno.EIO, f"too many retries: {url!r} [{seg.pos}, {seg.stop})")
+            try:
+                resp = urlopen(url, headers={**headers, "Range": f"bytes={seg.pos}-{seg.stop-1}"})
+            except HTTPError as e:
+                if e.code in (401, 403, 404, 410) and get_url is not None:
+                    # NOTE: 链接可能已经过期，换一个新的
+                    retries += 1
+                    url, generation = refresh_url(generation)
+                    continue
+                elif e.code < 500:
+                    raise
+                retries += 1
+                sleep(min(0.1 * 2 ** retries, 5))
+                continue
+            except OSError:
+                retries += 1
+                sleep(min(0.1 * 2 ** retries, 5))
+                continue
+            pos = seg.pos
+            try:
+                rng = get_range(resp)
+                if rng is None or rng[0] != pos:
+                    raise OSError(errno.EIO, f"range request failed: {url!r} [{pos}, {seg.stop})")
+                read = resp.read
+                while not stop_event.is_set():
+                    # NOTE: `seg.stop` 可能被其它线程缩小
+                    with lock:
+                        stop = seg.stop
+                    if seg.pos >= stop:
+                        break
+                    try:
+                        chunk = read(min(chunksize, stop - seg.pos))
+                    except OSError:
+                        break
+                    if not chunk:
+                        break
+                    pwrite(fd, chunk, seg.pos)
+                    with lock:
+                        old = seg.pos
+                        seg.pos += len(chunk)
+                        done = min(seg.pos, seg.stop)
+                        bitmap.mark(old - old % block_size, done)
+                    if done > old:
+                        report(done - old)
+            finally:
+                resp.close()
+            # NOTE: 连接中断，如果没有任何进展，才计为一次重试
+            retries = retries + 1 if seg.pos == pos else 0
+
+    def worker():
+        try:
+            while not stop_event.is_set() and (seg := take()) is not None:
+                try:
+                    fetch(seg)
+                finally:
+                    with lock:
+                        active.remove(seg)
+        except BaseException as e:
+            report(e)
+        else:
+            report(None)
+
+    downloaded = 0
+    running = max_workers
+    executor = ThreadPoolExecutor(max_workers)
+    try:
+        for _ in range(max_workers):
+            executor.submit(worker)
+        last_dump = perf_counter()
+        while running:
+            try:
+                item = queue.get(timeout=1)
+            except Empty:
+                item = 0
+            if item is None:
+                running -= 1
+            elif isinstance(item, BaseException):
+                raise item
+            elif item:
+                downloaded += item
+                yield DownloadProgress(length, downloaded, skipped, item, extra)
+            if perf_counter() - last_dump >= 1:
+                with lock:
+                    bitmap.dump(sidecar)
+                last_dump = perf_counter()
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True)
+        bitmap.dump(sidecar)
+    if bitmap.done() < length:
+        raise OSError(errno.EIO, f"download incomplete: {url!r}")
+
+
 def download(
     url: str | Callable[[], str], 
     file: bytes | str | PathLike | SupportsWrite[bytes] = "", 
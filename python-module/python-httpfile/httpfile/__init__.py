@@ -2,20 +2,26 @@
 # encoding: utf-8
 
 __author__ = "ChenyangGao <https://chenyanggao.github.io>"
-__version__ = (0, 0, 1)
-__all__ = ["HTTPFileReader", "RequestsFileReader"]
+__version__ = (0, 0, 2)
+__all__ = ["BlockCache", "HTTPFileReader", "RequestsFileReader"]
 
 import errno
 
-from collections.abc import Callable, Iterator, Mapping
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import cached_property, partial
+from hashlib import sha1
 from http.client import HTTPResponse
+from inspect import isawaitable
 from io import (
     BufferedReader, RawIOBase, TextIOWrapper, UnsupportedOperation, DEFAULT_BUFFER_SIZE, 
 )
-from os import fstat, stat, PathLike
+from os import fstat, makedirs, remove, stat, PathLike
+from os.path import join as joinpath
 from shutil import COPY_BUFSIZE # type: ignore
-from typing import Any, BinaryIO, IO, Optional, Protocol, Self, TypeVar
+from threading import Lock
+from typing import cast, Any, BinaryIO, IO, Optional, Protocol, Self, TypeVar
 from types import MappingProxyType
 from warnings import warn
 
@@ -74,6 +80,163 @@ def get_filesize(file, /, dont_read: bool = True) -> int:
     return total
 
 
+def _iter_runs(indices: Iterator[int] | list[int], /) -> Iterator[tuple[int, int]]:
+    "把有序的整数序列合并为若干个连续区间 [first, last]"
+    first = last = -2
+    for i in indices:
+        if i == last + 1:
+            last = i
+        else:
+            if first >= 0:
+                yield first, last
+            first = last = i
+    if first >= 0:
+        yield first, last
+
+
+class BlockCache:
+    """按块对齐的 LRU 缓存，可以被多个 `HTTPFileReader` 共享（线程安全）
+
+    :param block_size: 块的字节数
+    :param max_memory: 内存中最多缓存的字节数
+    :param disk_dir: 如果不为 None，则从内存中淘汰的块会写入这个目录，作为第 2 层缓存
+    :param max_disk: 磁盘上最多缓存的字节数
+    """
+    def __init__(
+        self, 
+        /, 
+        block_size: int = 1 << 20, 
+        max_memory: int = 64 << 20, 
+        disk_dir: None | str | PathLike = None, 
+        max_disk: int = 1 << 30, 
+    ):
+        if block_size <= 0:
+            raise ValueError(f"block_size must be positive: {block_size!r}")
+        if disk_dir is not None:
+            makedirs(disk_dir, exist_ok=True)
+        self.block_size = block_size
+        self.max_memory = max_memory
+        self.disk_dir = disk_dir
+        self.max_disk = max_disk
+        self.memory: OrderedDict[Hashable, bytes] = OrderedDict()
+        self.memory_size = 0
+        self.disk: OrderedDict[Hashable, int] = OrderedDict()
+        self.disk_size = 0
+        self.counters = dict.fromkeys(("hits", "disk_hits", "misses", "prefetched", "requests", "evictions"), 0)
+        self._lock = Lock()
+
+    def __contains__(self, key: Hashable, /) -> bool:
+        return key in self.memory or key in self.disk
+
+    def __len__(self, /) -> int:
+        return len(self.memory) + len(self.disk)
+
+    def __repr__(self, /) -> str:
+        return f"{type(self).__qualname__}(block_size={self.block_size!r}, max_memory={self.max_memory!r}, disk_dir={self.disk_dir!r}, max_disk={self.max_disk!r})"
+
+    @property
+    def hit_rate(self, /) -> float:
+        "命中率（内存和磁盘合计）"
+        counters = self.counters
+        hits = counters["hits"] + counters["disk_hits"]
+        total = hits + counters["misses"]
+        return hits / total if total else 0.
+
+    @property
+    def stats(self, /) -> dict:
+        "统计数据"
+        return {
+            **self.counters, 
+            "hit_rate": self.hit_rate, 
+            "memory_blocks": len(self.memory), 
+            "memory_size": self.memory_size, 
+            "disk_blocks": len(self.disk), 
+            "disk_size": self.disk_size, 
+        }
+
+    def _disk_path(self, key: Hashable, /) -> str:
+        return joinpath(self.disk_dir, sha1(repr(key).encode("utf-8")).hexdigest()) # type: ignore
+
+    def clear(self, /):
+        with self._lock:
+            keys = list(self.disk)
+            self.memory.clear()
+            self.disk.clear()
+            self.memory_size = self.disk_size = 0
+        for key in keys:
+            try:
+                remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def get(self, key: Hashable, /) -> None | bytes:
+        "取出一个块，并计入命中率"
+        with self._lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.counters["hits"] += 1
+                return data
+            if key not in self.disk:
+                self.counters["misses"] += 1
+                return None
+            self.disk.move_to_end(key)
+        try:
+            data = open(self._disk_path(key), "rb").read()
+        except OSError:
+            with self._lock:
+                self.disk_size -= self.disk.pop(key, 0)
+                self.counters["misses"] += 1
+            return None
+        with self._lock:
+            self.counters["disk_hits"] += 1
+        self.put(key, data)
+        return data
+
+    def put(self, key: Hashable, data: bytes, /):
+        "放入一个块，如果内存超出限制，就淘汰最久未用的块（有磁盘缓存时写入磁盘）"
+        spilled: list[tuple[Hashable, bytes]] = []
+        with self._lock:
+            memory = self.memory
+            old = memory.pop(key, None)
+            if old is not None:
+                self.memory_size -= len(old)
+            memory[key] = data
+            self.memory_size += len(data)
+            while self.memory_size > self.max_memory and len(memory) > 1:
+                k, v = memory.popitem(last=False)
+                self.memory_size -= len(v)
+                self.counters["evictions"] += 1
+                if self.disk_dir is not None and k not in self.disk:
+                    spilled.append((k, v))
+        for k, v in spilled:
+            self._put_disk(k, v)
+
+    def _put_disk(self, key: Hashable, data: bytes, /):
+        try:
+            open(self._disk_path(key), "wb").write(data)
+        except OSError:
+            return
+        removed: list[Hashable] = []
+        with self._lock:
+            disk = self.disk
+            disk[key] = len(data)
+            self.disk_size += len(data)
+            while self.disk_size > self.max_disk and len(disk) > 1:
+                k, size = disk.popitem(last=False)
+                self.disk_size -= size
+                removed.append(k)
+        for k in removed:
+            try:
+                remove(self._disk_path(k))
+            except OSError:
+                pass
+
+    def record(self, name: str, n: int = 1, /):
+        "累加一个计数"
+        with self._lock:
+            self.counters[name] += n
+
 class HTTPFileReader(RawIOBase, BinaryIO):
     url: str | Callable[[], str]
     response: Any
@@ -83,6 +246,10 @@ class HTTPFileReader(RawIOBase, BinaryIO):
     urlopen: Callable
     headers: Mapping
     seek_threshold: int
+    cache: None | BlockCache
+    cache_key: Hashable
+    readahead: int
+    prefetch_workers: int
     _seekable: bool
 
     def __init__(
@@ -95,6 +262,17 @@ class HTTPFileReader(RawIOBase, BinaryIO):
         #       it will be directly read and discarded, default to 1 MB
         seek_threshold: int = 1 << 20, 
         urlopen: Callable[..., HTTPResponse] = urlopen, 
+        # NOTE: If provided, reads go through this block cache, seeks become free, 
+        #       and missing blocks are fetched with (coalesced) Range requests
+        cache: None | BlockCache = None, 
+        # NOTE: Identifies this file in a shared cache, default to the url (if it is a str)
+        cache_key: None | Hashable = None, 
+        # NOTE: The maximum number of blocks to read ahead, the window doubles on each 
+        #       consecutive sequential read and resets on a random access
+        readahead: int = 0, 
+        # NOTE: If greater than 0, read-ahead blocks are fetched in background threads, 
+        #       otherwise they are only fetched along with blocks that missed the cache
+        prefetch_workers: int = 0, 
     ):
         if headers:
             headers = {**headers, "Accept-Encoding": "identity"}
@@ -110,17 +288,37 @@ class HTTPFileReader(RawIOBase, BinaryIO):
             if not rng:
                 raise OSError(errno.ESPIPE, "non-seekable")
             start = rng[0]
+        length = get_total_length(response) or 0
+        chunked = is_chunked(response)
+        seekable = is_range_request(response)
+        if cache is not None:
+            if not seekable or chunked or not length:
+                cache = None
+            else:
+                # NOTE: In cache mode, all reads are Range requests, so the initial response is no longer needed
+                response.close()
+                if cache_key is None:
+                    cache_key = url if isinstance(url, str) else object()
         self.__dict__.update(
             url = url, 
             response = response, 
-            length = get_total_length(response) or 0, 
-            chunked = is_chunked(response), 
+            length = length, 
+            chunked = chunked, 
             start = start, 
             closed = False, 
             urlopen = urlopen, 
             headers = MappingProxyType(headers), 
             seek_threshold = max(seek_threshold, 0), 
-            _seekable = is_range_request(response), 
+            cache = cache, 
+            cache_key = (cache_key, length), 
+            readahead = max(readahead, 0), 
+            prefetch_workers = max(prefetch_workers, 0), 
+            _seekable = seekable, 
+            _last_end = -1, 
+            _sequential = 0, 
+            _inflight = {}, 
+            _inflight_lock = Lock(), 
+            _executor = None, 
         )
 
     def __del__(self, /):
@@ -162,8 +360,162 @@ class HTTPFileReader(RawIOBase, BinaryIO):
     def _add_start(self, delta: int, /):
         self.__dict__["start"] += delta
 
+    def _fetch_blocks(self, first: int, last: int, /, prefetch: bool = False) -> dict[int, bytes]:
+        "用 1 个 Range 请求获取第 `first` 到 `last` 块，并放入缓存"
+        cache = cast(BlockCache, self.cache)
+        block_size = cache.block_size
+        start = first * block_size
+        stop = min(self.length, (last + 1) * block_size)
+        url = self.url
+        response = self.urlopen(
+            url() if callable(url) else url, 
+            headers={**self.headers, "Range": f"bytes={start}-{stop-1}"}, 
+        )
+        try:
+            rng = get_range(response)
+            if not rng or rng[0] != start:
+                raise OSError(errno.EIO, f"range request failed: bytes={start}-{stop-1}, got {rng!r}")
+            if rng[-1] != self.length:
+                raise OSError(errno.EIO, f"file size changed: {self.length} -> {rng[-1]}")
+            buf = bytearray(stop - start)
+            view = memoryview(buf)
+            pos = 0
+            while pos < len(buf):
+                n = response.readinto(view[pos:])
+                if not n:
+                    raise OSError(errno.EIO, f"incomplete read: {pos} < {len(buf)}")
+                pos += n
+        finally:
+            response.close()
+        cache.record("requests")
+        if prefetch:
+            cache.record("prefetched", last - first + 1)
+        key = self.cache_key
+        blocks: dict[int, bytes] = {}
+        for i in range(first, last + 1):
+            data = blocks[i] = bytes(view[(i - first) * block_size:(i - first + 1) * block_size])
+            cache.put((key, i), data)
+        return blocks
+
+    def _prefetch(self, indices: list[int], /):
+        "在后台获取这些块，每段连续的块最多被拆成 `prefetch_workers` 个请求"
+        executor = self._executor
+        if executor is None:
+            executor = self.__dict__["_executor"] = ThreadPoolExecutor(self.prefetch_workers)
+        inflight = self._inflight
+        workers = self.prefetch_workers
+        def done(indices: range, fu: Future, /):
+            with self._inflight_lock:
+                for i in indices:
+                    if inflight.get(i) is fu:
+                        del inflight[i]
+        for first, last in _iter_runs(indices):
+            step = -(-(last - first + 1) // workers)
+            for a in range(first, last + 1, step):
+                b = min(a + step - 1, last)
+                fu = executor.submit(self._fetch_blocks, a, b, True)
+                with self._inflight_lock:
+                    for i in range(a, b + 1):
+                        inflight[i] = fu
+                fu.add_done_callback(partial(done, range(a, b + 1)))
+
+    def _get_blocks(self, first: int, last: int, /) -> dict[int, bytes]:
+        "获取第 `first` 到 `last` 块，缺失的连续块合并为 1 个请求，并按需预读之后的块"
+        cache = cast(BlockCache, self.cache)
+        key = self.cache_key
+        inflight = self._inflight
+        blocks: dict[int, bytes] = {}
+        missing: list[int] = []
+        for i in range(first, last + 1):
+            fu = inflight.get(i)
+            if fu is not None:
+                try:
+                    blocks[i] = fu.result()[i]
+                    cache.record("hits")
+                    continue
+                except Exception:
+                    pass
+            data = cache.get((key, i))
+            if data is None:
+                missing.append(i)
+            else:
+                blocks[i] = data
+        ahead: list[int] = []
+        if self.readahead and self._sequential:
+            window = min(self.readahead, 1 << min(self._sequential - 1, 30))
+            last_block = (self.length - 1) // cache.block_size
+            ahead = [
+                i for i in range(last + 1, min(last + window, last_block) + 1) 
+                if i not in inflight and (key, i) not in cache
+            ]
+        if ahead and not self.prefetch_workers:
+            # NOTE: Without background workers, read-ahead only rides along with a request 
+            #       that has to be made anyway, so a read served from the cache never blocks on it
+            if not missing:
+                ahead = []
+            elif missing[-1] == last and ahead[0] == last + 1:
+                missing.extend(ahead)
+                cache.record("prefetched", len(ahead))
+                ahead = []
+        for a, b in _iter_runs(missing):
+            blocks.update(self._fetch_blocks(a, b))
+        if ahead:
+            if self.prefetch_workers:
+                self._prefetch(ahead)
+            else:
+                for a, b in _iter_runs(ahead):
+                    self._fetch_blocks(a, b, True)
+        return blocks
+
+    def _read_cached(self, size: int = -1, /) -> bytes:
+        cache = cast(BlockCache, self.cache)
+        pos = self.tell()
+        length = self.length
+        stop = length if size < 0 else min(length, pos + size)
+        if pos >= stop:
+            return b""
+        if pos == self._last_end:
+            self.__dict__["_sequential"] += 1
+        else:
+            self.__dict__["_sequential"] = 0
+        block_size = cache.block_size
+        first, last = pos // block_size, (stop - 1) // block_size
+        blocks = self._get_blocks(first, last)
+        offset = pos - first * block_size
+        if first == last:
+            data = blocks[first][offset:offset + stop - pos]
+        else:
+            data = b"".join(blocks[i] for i in range(first, last + 1))[offset:offset + stop - pos]
+        self.__dict__.update(start=stop, _last_end=stop)
+        return data
+
+    def _readline_cached(self, size: int = -1, /) -> bytes:
+        block_size = cast(BlockCache, self.cache).block_size
+        chunks: list[bytes] = []
+        remaining = size
+        while remaining:
+            pos = self.tell()
+            n = block_size - pos % block_size
+            if remaining > 0:
+                n = min(n, remaining)
+            chunk = self._read_cached(n)
+            if not chunk:
+                break
+            idx = chunk.find(b"\n")
+            if idx >= 0:
+                # NOTE: Give back the bytes after the newline, they are still in the cache
+                self.__dict__.update(start=pos + idx + 1, _last_end=pos + idx + 1)
+                chunks.append(chunk[:idx + 1])
+                break
+            chunks.append(chunk)
+            if remaining > 0:
+                remaining -= len(chunk)
+        return b"".join(chunks)
+
     def close(self, /):
         self.response.close()
+        if (executor := self._executor) is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
         self.__dict__["closed"] = True
 
     @funcproperty
@@ -197,6 +549,8 @@ class HTTPFileReader(RawIOBase, BinaryIO):
             raise ValueError("I/O operation on closed file.")
         if size == 0 or not self.chunked and self.tell() >= self.length:
             return b""
+        if self.cache is not None:
+            return self._read_cached(-1 if size is None else size)
         if self.file.closed:
             self.reconnect()
         if size is None or size < 0:
@@ -215,6 +569,11 @@ class HTTPFileReader(RawIOBase, BinaryIO):
             raise ValueError("I/O operation on closed file.")
         if not self.chunked and self.tell() >= self.length:
             return 0
+        if self.cache is not None:
+            data = self._read_cached(len(memoryview(buffer).cast("B")))
+            size = len(data)
+            memoryview(buffer).cast("B")[:size] = data
+            return size
         if self.file.closed:
             self.reconnect()
         size = self.file.readinto(buffer)
@@ -227,6 +586,8 @@ class HTTPFileReader(RawIOBase, BinaryIO):
             raise ValueError("I/O operation on closed file.")
         if size == 0 or not self.chunked and self.tell() >= self.length:
             return b""
+        if self.cache is not None:
+            return self._readline_cached(-1 if size is None else size)
         if self.file.closed:
             self.reconnect()
         if size is None or size < 0:
@@ -242,6 +603,15 @@ class HTTPFileReader(RawIOBase, BinaryIO):
             raise ValueError("I/O operation on closed file.")
         if not self.chunked and self.tell() >= self.length:
             return []
+        if self.cache is not None:
+            ls = []
+            total = 0
+            while (line := self._readline_cached()):
+                ls.append(line)
+                total += len(line)
+                if 0 < hint <= total:
+                    break
+            return ls
         if self.file.closed:
             self.reconnect()
         ls = self.file.readlines(hint)
@@ -290,7 +660,9 @@ class HTTPFileReader(RawIOBase, BinaryIO):
             old_pos = self.tell()
             if old_pos == pos:
                 return pos
-            if pos > old_pos and pos - old_pos <= self.seek_threshold:
+            if self.cache is not None:
+                self.__dict__["start"] = pos
+            elif pos > old_pos and pos - old_pos <= self.seek_threshold:
                 for _ in bio_skip_iter(self, pos - old_pos):
                     pass
             else:
@@ -418,9 +790,330 @@ except ImportError:
 
 
 try:
-    from httpx import Client, AsyncClient
+    from httpx import AsyncClient, TransportError
 
-    ...
+    class AsyncHTTPFileReader:
+        """`HTTPFileReader` 的异步版本，基于 httpx 的流式响应
+
+        `readinto` 把网络收到的数据块直接复制进调用者提供的缓冲区（例如 memoryview），
+        不拼接中间的 bytes 对象；连接中断时，会重新调用 `url`（如果是可调用的），从当前位置续上。
+        需要用 `await AsyncHTTPFileReader.new(...)` 创建。
+        """
+        url: str | Callable[[], str] | Callable[[], Awaitable[str]]
+        response: Any
+        length: int
+        chunked: bool
+        start: int
+        session: AsyncClient
+        headers: Mapping
+        seek_threshold: int
+        max_reconnects: int
+        _seekable: bool
+
+        def __init__(
+            self, 
+            /, 
+            url: str | Callable[[], str] | Callable[[], Awaitable[str]], 
+            headers: Optional[Mapping] = None, 
+            seek_threshold: int = 1 << 20, 
+            session: None | AsyncClient = None, 
+            # NOTE: How many times in a row to reconnect after the connection breaks during a read
+            max_reconnects: int = 3, 
+        ):
+            if headers:
+                headers = {**headers, "Accept-Encoding": "identity"}
+            else:
+                headers = {"Accept-Encoding": "identity"}
+            self.__dict__.update(
+                url = url, 
+                response = None, 
+                length = 0, 
+                chunked = False, 
+                start = 0, 
+                closed = False, 
+                session = AsyncClient() if session is None else session, 
+                headers = MappingProxyType(headers), 
+                seek_threshold = max(seek_threshold, 0), 
+                max_reconnects = max_reconnects, 
+                _own_session = session is None, 
+                _seekable = False, 
+                _iter = None, 
+                _pending = memoryview(b""), 
+            )
+
+        @classmethod
+        async def new(
+            cls, 
+            /, 
+            url: str | Callable[[], str] | Callable[[], Awaitable[str]], 
+            headers: Optional[Mapping] = None, 
+            start: int = 0, 
+            seek_threshold: int = 1 << 20, 
+            session: None | AsyncClient = None, 
+            max_reconnects: int = 3, 
+        ) -> Self:
+            self = cls(
+                url, 
+                headers=headers, 
+                seek_threshold=seek_threshold, 
+                session=session, 
+                max_reconnects=max_reconnects, 
+            )
+            try:
+                await self._open(start)
+            except BaseException:
+                await self.aclose()
+                raise
+            return self
+
+        async def __aenter__(self, /) -> Self:
+            return self
+
+        async def __aexit__(self, /, *exc_info):
+            await self.aclose()
+
+        def __aiter__(self, /):
+            return self
+
+        async def __anext__(self, /) -> bytes:
+            line = await self.readline()
+            if line:
+                return line
+            else:
+                raise StopAsyncIteration
+
+        def __len__(self, /) -> int:
+            return self.length
+
+        def __repr__(self, /) -> str:
+            cls = type(self)
+            module = cls.__module__
+            name = cls.__qualname__
+            if module != "__main__":
+                name = module + "." + name
+            return f"{name}({self.url!r}, session={self.session!r}, headers={self.headers!r})"
+
+        def __setattr__(self, attr, val, /):
+            raise TypeError("can't set attribute")
+
+        async def _get_url(self, /) -> str:
+            url = self.url
+            if callable(url):
+                url = url()
+                if isawaitable(url):
+                    url = await url
+            return cast(str, url)
+
+        async def _open(self, start: int = 0, /):
+            headers = dict(self.headers)
+            if start > 0:
+                headers["Range"] = f"bytes={start}-"
+            elif start < 0:
+                headers["Range"] = f"bytes={start}"
+            session = self.session
+            request = session.build_request("GET", await self._get_url(), headers=headers)
+            response = await session.send(request, stream=True, follow_redirects=True)
+            try:
+                response.raise_for_status()
+                length = get_total_length(response) or 0
+                if self.response is not None and self.length != length:
+                    raise OSError(errno.EIO, f"file size changed: {self.length} -> {length}")
+                if start:
+                    rng = get_range(response)
+                    if not rng:
+                        raise OSError(errno.ESPIPE, "non-seekable")
+                    start = rng[0]
+            except BaseException:
+                await response.aclose()
+                raise
+            if (old := self.response) is not None:
+                await old.aclose()
+            self.__dict__.update(
+                response = response, 
+                length = length, 
+                chunked = is_chunked(response), 
+                start = start, 
+                _seekable = is_range_request(response), 
+                _iter = response.aiter_raw(), 
+                _pending = memoryview(b""), 
+            )
+
+        async def _next_chunk(self, /) -> memoryview:
+            "取出下一段未读的数据（不复制），连接中断时自动重连"
+            if self._pending:
+                return self._pending
+            reconnects = 0
+            while True:
+                if self._iter is None:
+                    await self.reconnect()
+                try:
+                    chunk = await anext(self._iter)
+                except StopAsyncIteration:
+                    return memoryview(b"")
+                except TransportError:
+                    if not self._seekable or reconnects >= self.max_reconnects:
+                        raise
+                    reconnects += 1
+                    self.__dict__["_iter"] = None
+                    continue
+                if chunk:
+                    return memoryview(chunk)
+
+        async def aclose(self, /):
+            if (response := self.response) is not None:
+                await response.aclose()
+            if self._own_session:
+                await self.session.aclose()
+            self.__dict__["closed"] = True
+
+        close = aclose
+
+        @funcproperty
+        def closed(self, /):
+            return self.__dict__["closed"]
+
+        @cached_property
+        def mode(self, /) -> str:
+            return "rb"
+
+        @cached_property
+        def name(self, /) -> str:
+            return get_filename(self.response)
+
+        async def read(self, size: int = -1, /) -> bytes:
+            if self.closed:
+                raise ValueError("I/O operation on closed file.")
+            if size == 0 or not self.chunked and self.tell() >= self.length:
+                return b""
+            if size is None or size < 0:
+                chunks: list[bytes] = []
+                while (chunk := await self._next_chunk()):
+                    chunks.append(bytes(chunk))
+                    self.__dict__["_pending"] = memoryview(b"")
+                    self.__dict__["start"] += len(chunk)
+                return b"".join(chunks)
+            buf = bytearray(size)
+            n = await self.readinto(buf)
+            del buf[n:]
+            return bytes(buf)
+
+        def readable(self, /) -> bool:
+            return True
+
+        async def readinto(self, buffer, /) -> int:
+            "读取数据到 `buffer`，直到填满或者到达文件末尾，返回读取的字节数"
+            if self.closed:
+                raise ValueError("I/O operation on closed file.")
+            view = memoryview(buffer).cast("B")
+            size = len(view)
+            n = 0
+            while n < size:
+                if not self.chunked and self.tell() >= self.length:
+                    break
+                chunk = await self._next_chunk()
+                if not chunk:
+                    break
+                k = min(len(chunk), size - n)
+                view[n:n+k] = chunk[:k]
+                self.__dict__.update(_pending=chunk[k:], start=self.start + k)
+                n += k
+            return n
+
+        async def readline(self, size: Optional[int] = -1, /) -> bytes:
+            if self.closed:
+                raise ValueError("I/O operation on closed file.")
+            if size is None:
+                size = -1
+            chunks: list[bytes] = []
+            remaining = size
+            while remaining:
+                pending = await self._next_chunk()
+                if not pending:
+                    break
+                chunk = pending[:remaining] if remaining > 0 else pending
+                idx = chunk.tobytes().find(b"\n")
+                k = len(chunk) if idx < 0 else idx + 1
+                chunks.append(chunk[:k].tobytes())
+                self.__dict__.update(_pending=pending[k:], start=self.start + k)
+                if idx >= 0:
+                    break
+                if remaining > 0:
+                    remaining -= k
+            return b"".join(chunks)
+
+        async def readlines(self, hint: int = -1, /) -> list[bytes]:
+            ls: list[bytes] = []
+            total = 0
+            while (line := await self.readline()):
+                ls.append(line)
+                total += len(line)
+                if 0 < hint <= total:
+                    break
+            return ls
+
+        async def reconnect(self, /, start: Optional[int] = None) -> int:
+            if not self._seekable:
+                if start is None and self.tell() or start:
+                    raise OSError(errno.EOPNOTSUPP, "Unsupport for reconnection of non-seekable streams.")
+                start = 0
+            if start is None:
+                start = self.tell()
+            elif start < 0:
+                start = self.length + start
+                if start < 0:
+                    start = 0
+            if start >= self.length:
+                if (response := self.response) is not None:
+                    await response.aclose()
+                self.__dict__.update(start=start, _iter=None, _pending=memoryview(b""))
+                return start
+            await self._open(start)
+            return start
+
+        async def seek(self, pos: int, whence: int = 0, /) -> int:
+            if self.closed:
+                raise ValueError("I/O operation on closed file.")
+            if not self._seekable:
+                raise OSError(errno.EINVAL, "not a seekable stream")
+            if whence == 0:
+                if pos < 0:
+                    raise OSError(errno.EINVAL, f"negative seek start: {pos!r}")
+                old_pos = self.tell()
+                if old_pos == pos:
+                    return pos
+                if pos > old_pos and pos - old_pos <= self.seek_threshold and self._iter is not None:
+                    # NOTE: Discard the bytes in between instead of opening a new connection
+                    remaining = pos - old_pos
+                    while remaining:
+                        chunk = await self._next_chunk()
+                        if not chunk:
+                            break
+                        k = min(len(chunk), remaining)
+                        self.__dict__.update(_pending=chunk[k:], start=self.start + k)
+                        remaining -= k
+                    if not remaining:
+                        return pos
+                await self.reconnect(pos)
+                return pos
+            elif whence == 1:
+                if pos == 0:
+                    return self.tell()
+                return await self.seek(self.tell() + pos)
+            elif whence == 2:
+                return await self.seek(self.length + pos)
+            else:
+                raise OSError(errno.EINVAL, f"whence value unsupported: {whence!r}")
+
+        def seekable(self, /) -> bool:
+            return self._seekable
+
+        def tell(self, /) -> int:
+            return self.start
+
+        def writable(self, /) -> bool:
+            return False
+
+    __all__.append("AsyncHTTPFileReader")
 except ImportError:
     pass
 
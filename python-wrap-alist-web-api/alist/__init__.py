@@ -15,28 +15,33 @@ from __future__ import annotations
 __author__ = "ChenyangGao <https://chenyanggao.github.io>"
 __version__ = (0, 0, 12)
 __all__ = [
-    "AlistClient", "AlistPath", "AlistFileSystem", "AlistCopyTaskList", "AlistOfflineDownloadTaskList", 
+    "AlistClient", "AlistPath", "AlistAttrCache", "AlistFileSystem", "AlistCopyTaskList", "AlistOfflineDownloadTaskList", 
     "AlistOfflineDownloadTransferTaskList", "AlistUploadTaskList", "AlistAria2DownTaskList", 
     "AlistAria2TransferTaskList", "AlistQbitDownTaskList", "AlistQbitTransferTaskList", 
 ]
 
 import errno
 
-from asyncio import get_running_loop, run, TaskGroup
+from asyncio import ensure_future, get_running_loop, run, TaskGroup
 from collections import deque
 from collections.abc import (
-    AsyncIterator, Awaitable, Callable, Coroutine, ItemsView, Iterable, Iterator, KeysView, Mapping, ValuesView
+    AsyncIterator, Awaitable, Callable, Coroutine, ItemsView, Iterable, Iterator, KeysView, Mapping, 
+    MutableMapping, ValuesView, 
 )
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import cached_property, partial, update_wrapper
 from inspect import isawaitable
 from io import BytesIO, TextIOWrapper, UnsupportedOperation
+from itertools import chain
 from json import loads
 from mimetypes import guess_type
 from os import fsdecode, fspath, fstat, makedirs, scandir, stat_result, path as ospath, PathLike
 from posixpath import basename, commonpath, dirname, join as joinpath, normpath, split as splitpath, splitext
-from re import compile as re_compile, escape as re_escape
+from queue import SimpleQueue
+from re import compile as re_compile, escape as re_escape, split as re_split
 from shutil import copyfileobj, SameFileError
 from stat import S_IFDIR, S_IFREG
+from threading import Lock
 from time import time
 from typing import cast, overload, Any, IO, Literal, Never, Optional
 from types import MappingProxyType, MethodType
@@ -108,6 +113,11 @@ def check_response(func: dict | Awaitable[dict] | Callable):
         return check_code(func)
 
 
+def _glob_keywords(pattern: str, /) -> str:
+    "The longest literal text in a glob pattern (of one path part), to be used as search keywords."
+    return max(re_split(r"[*?]|\[!?\]?[^]]*\]", pattern), key=len)
+
+
 def parse_as_timestamp(s: Optional[str] = None, /) -> float:
     if not s:
         return 0.0
@@ -3009,7 +3019,10 @@ class AlistPath(Mapping, PathLike[str]):
 
     @property
     def raw_url(self, /) -> str:
-        return self["raw_url"]
+        if "raw_url" not in self.__dict__:
+            # NOTE: Attrs from a listing (or from the cache) have no "raw_url"
+            self.__dict__["raw_url"] = self.fs.fs_get(self)["data"]["raw_url"]
+        return self.__dict__["raw_url"]
 
     def walk(
         self, 
@@ -3098,6 +3111,169 @@ class AlistPath(Mapping, PathLike[str]):
         )
 
 
+class AlistAttrCache:
+    """Cache for `AlistFileSystem`: path -> attr and directory -> children, each entry expires after a TTL.
+
+    The TTL can be set per storage (by its mount path), the longest matching mount path wins. 
+    Entries are invalidated by the `fs_*` methods of `AlistFileSystem` that change something, 
+    and the attr of a path is also served from the listing of its parent directory.
+
+    Pass your own mutable mappings as `attrs` and `children` to change where the entries live 
+    (e.g. a bounded LRU mapping). Expired entries are dropped when looked up, and swept from time to time.
+    All methods are thread-safe.
+    """
+    def __init__(
+        self, 
+        /, 
+        ttl: float = 60, 
+        storage_ttl: Optional[Mapping[str, float]] = None, 
+        attrs: Optional[MutableMapping[str, tuple[float, dict]]] = None, 
+        children: Optional[MutableMapping[str, tuple[float, list[dict]]]] = None, 
+    ):
+        self.ttl = ttl
+        self.storage_ttl = {
+            "/" + normpath("/" + k).lstrip("/"): v for k, v in (storage_ttl or {}).items()
+        }
+        self.attrs = {} if attrs is None else attrs
+        self.children = {} if children is None else children
+        self.counters = dict.fromkeys(("attr_hits", "attr_misses", "list_hits", "list_misses", "invalidations"), 0)
+        self._lock = Lock()
+        self._next_purge = time() + max(ttl, 60)
+
+    def __repr__(self, /) -> str:
+        return f"{type(self).__qualname__}(ttl={self.ttl!r}, storage_ttl={self.storage_ttl!r})"
+
+    @property
+    def stats(self, /) -> dict:
+        counters = self.counters
+        hits = counters["attr_hits"] + counters["list_hits"]
+        total = hits + counters["attr_misses"] + counters["list_misses"]
+        return {
+            **counters, 
+            "hit_rate": hits / total if total else 0., 
+            "attrs": len(self.attrs), 
+            "children": len(self.children), 
+        }
+
+    def ttl_of(self, path: str, /) -> float:
+        "Return the TTL of `path`, which depends on the storage it belongs to."
+        best = ""
+        ttl = self.ttl
+        for mount_path, storage_ttl in self.storage_ttl.items():
+            if len(mount_path) > len(best) and (
+                path == mount_path or path.startswith(mount_path.rstrip("/") + "/")
+            ):
+                best, ttl = mount_path, storage_ttl
+        return ttl
+
+    def clear(self, /):
+        with self._lock:
+            self.attrs.clear()
+            self.children.clear()
+
+    def purge(self, /):
+        "Drop all expired entries."
+        with self._lock:
+            self._purge(time())
+
+    def _purge(self, now: float, /):
+        for d in (self.attrs, self.children):
+            for key in [k for k, (expire, _) in d.items() if expire <= now]:
+                d.pop(key, None)
+        # NOTE: Expired entries that are never looked up again are swept at most once per `ttl` (or minute)
+        self._next_purge = now + max(self.ttl, 60)
+
+    def get_attr(self, path: str, /) -> Optional[dict]:
+        "Get the cached attr of `path` (from itself or from its parent's listing), or None if missing or expired."
+        now = time()
+        counters = self.counters
+        with self._lock:
+            try:
+                expire, attr = self.attrs[path]
+            except KeyError:
+                pass
+            else:
+                if expire > now:
+                    counters["attr_hits"] += 1
+                    return dict(attr)
+                self.attrs.pop(path, None)
+            if path != "/":
+                try:
+                    expire, content = self.children[dirname(path)]
+                except KeyError:
+                    pass
+                else:
+                    if expire > now:
+                        name = basename(path)
+                        for attr in content:
+                            if attr["name"] == name:
+                                counters["attr_hits"] += 1
+                                return dict(attr)
+                    else:
+                        self.children.pop(dirname(path), None)
+            counters["attr_misses"] += 1
+            return None
+
+    def set_attr(self, path: str, attr: dict, /):
+        ttl = self.ttl_of(path)
+        if ttl > 0:
+            now = time()
+            with self._lock:
+                if now >= self._next_purge:
+                    self._purge(now)
+                self.attrs[path] = (now + ttl, attr)
+
+    def get_children(self, path: str, /) -> Optional[list[dict]]:
+        "Get the cached listing of the directory `path`, or None if missing or expired."
+        counters = self.counters
+        with self._lock:
+            try:
+                expire, content = self.children[path]
+            except KeyError:
+                pass
+            else:
+                if expire > time():
+                    counters["list_hits"] += 1
+                    return [dict(attr) for attr in content]
+                self.children.pop(path, None)
+            counters["list_misses"] += 1
+            return None
+
+    def set_children(self, path: str, content: list[dict], /):
+        ttl = self.ttl_of(path)
+        if ttl > 0:
+            now = time()
+            with self._lock:
+                if now >= self._next_purge:
+                    self._purge(now)
+                self.children[path] = (now + ttl, content)
+
+    def invalidate(self, path: str, /, recursive: bool = True):
+        """Drop `path` and the listing of its parent directory, and if `recursive` is true, 
+        also drop its own listing and everything below it."""
+        with self._lock:
+            self.counters["invalidations"] += 1
+            attrs = self.attrs
+            children = self.children
+            attrs.pop(path, None)
+            if path != "/":
+                children.pop(dirname(path), None)
+            if recursive:
+                children.pop(path, None)
+                prefix = path.rstrip("/") + "/"
+                for d in (attrs, children):
+                    for key in [k for k in d if k.startswith(prefix)]:
+                        d.pop(key, None)
+
+    def invalidate_ancestors(self, path: str, /):
+        "Drop the attrs and listings of all ancestor directories of `path` (e.g. after they may have been created)."
+        with self._lock:
+            while path != "/":
+                path = dirname(path)
+                self.attrs.pop(path, None)
+                self.children.pop(path, None)
+
+
 class AlistFileSystem:
     """Implemented some file system methods by utilizing AList's web api and 
     referencing modules such as `os`, `posixpath`, `pathlib.Path` and `shutil`."""
@@ -3105,6 +3281,7 @@ class AlistFileSystem:
     path: str
     refresh: bool
     request_kwargs: dict
+    cache: Optional[AlistAttrCache]
 
     def __init__(
         self, 
@@ -3113,6 +3290,7 @@ class AlistFileSystem:
         path: str | PathLike[str] = "/", 
         refresh: bool = False, 
         request_kwargs: Optional[dict] = None, 
+        cache: Optional[AlistAttrCache] = None, 
     ):
         if path in ("", "/", ".", ".."):
             path = "/"
@@ -3120,7 +3298,7 @@ class AlistFileSystem:
             path = "/" + normpath("/" + fspath(path)).lstrip("/")
         if request_kwargs is None:
             request_kwargs = {}
-        self.__dict__.update(client=client, path=path, refresh=refresh, request_kwargs=request_kwargs)
+        self.__dict__.update(client=client, path=path, refresh=refresh, request_kwargs=request_kwargs, cache=cache)
 
     def __contains__(self, path: str | PathLike[str], /) -> bool:
         return self.exists(path)
@@ -3183,6 +3361,17 @@ class AlistFileSystem:
     def set_refresh(self, value: bool, /):
         self.__dict__["refresh"] = value
 
+    def set_cache(self, value: Optional[AlistAttrCache], /):
+        self.__dict__["cache"] = value
+
+    def _invalidate(self, /, *paths: str, ancestors: bool = False):
+        if (cache := self.cache) is None:
+            return
+        for path in paths:
+            cache.invalidate(path)
+            if ancestors:
+                cache.invalidate_ancestors(path)
+
     @check_response
     def fs_batch_rename(
         self, 
@@ -3203,7 +3392,13 @@ class AlistFileSystem:
                 "new_name": new_name, 
             } for src_name, new_name in rename_pairs]
         }
-        return self.client.fs_batch_rename(payload, **self.request_kwargs)
+        resp = self.client.fs_batch_rename(payload, **self.request_kwargs)
+        self._invalidate(*(
+            joinpath(src_dir, obj[key]) 
+            for obj in payload["rename_objects"] 
+            for key in ("src_name", "new_name")
+        ))
+        return resp
 
     @check_response
     def fs_copy(
@@ -3225,7 +3420,9 @@ class AlistFileSystem:
         src_dir = cast(str, src_dir)
         dst_dir = cast(str, dst_dir)
         payload = {"src_dir": src_dir, "dst_dir": dst_dir, "names": names}
-        return self.client.fs_copy(payload, **self.request_kwargs)
+        resp = self.client.fs_copy(payload, **self.request_kwargs)
+        self._invalidate(*(joinpath(dst_dir, name) for name in names))
+        return resp
 
     @check_response
     def fs_dirs(
@@ -3267,7 +3464,9 @@ class AlistFileSystem:
         elif _check:
             path = self.abspath(path)
         path = cast(str, path)
-        return self.client.fs_form(local_path_or_file, path, as_task=as_task, **self.request_kwargs)
+        resp = self.client.fs_form(local_path_or_file, path, as_task=as_task, **self.request_kwargs)
+        self._invalidate(path, ancestors=True)
+        return resp
 
     @check_response
     def fs_get(
@@ -3296,6 +3495,7 @@ class AlistFileSystem:
         refresh: Optional[bool] = None, 
         page: int = 1, 
         per_page: int = 0, 
+        async_: bool = False, 
         _check: bool = True, 
     ) -> dict:
         if isinstance(path, AlistPath):
@@ -3315,7 +3515,7 @@ class AlistFileSystem:
             "per_page": per_page, 
             "refresh": refresh, 
         }
-        return self.client.fs_list(payload, **self.request_kwargs)
+        return self.client.fs_list(payload, async_=async_, **self.request_kwargs)
 
     @check_response
     def fs_list_storage(self, /) -> dict:
@@ -3335,7 +3535,9 @@ class AlistFileSystem:
         path = cast(str, path)
         if path == "/":
             return {"code": 200}
-        return self.client.fs_mkdir({"path": path}, **self.request_kwargs)
+        resp = self.client.fs_mkdir({"path": path}, **self.request_kwargs)
+        self._invalidate(path, ancestors=True)
+        return resp
 
     @check_response
     def fs_move(
@@ -3361,7 +3563,9 @@ class AlistFileSystem:
         if src_dir == dst_dir:
             return {"code": 200}
         payload = {"src_dir": src_dir, "dst_dir": dst_dir, "names": names}
-        return self.client.fs_move(payload, **self.request_kwargs)
+        resp = self.client.fs_move(payload, **self.request_kwargs)
+        self._invalidate(*(joinpath(d, name) for name in names for d in (src_dir, dst_dir)))
+        return resp
 
     @check_response
     def fs_put(
@@ -3377,7 +3581,9 @@ class AlistFileSystem:
         elif _check:
             path = self.abspath(path)
         path = cast(str, path)
-        return self.client.fs_put(local_path_or_file, path, as_task=as_task, **self.request_kwargs)
+        resp = self.client.fs_put(local_path_or_file, path, as_task=as_task, **self.request_kwargs)
+        self._invalidate(path, ancestors=True)
+        return resp
 
     @check_response
     def fs_recursive_move(
@@ -3398,7 +3604,9 @@ class AlistFileSystem:
         src_dir = cast(str, src_dir)
         dst_dir = cast(str, dst_dir)
         payload = {"src_dir": src_dir, "dst_dir": dst_dir}
-        return self.client.fs_recursive_move(payload, **self.request_kwargs)
+        resp = self.client.fs_recursive_move(payload, **self.request_kwargs)
+        self._invalidate(src_dir, dst_dir)
+        return resp
 
     @check_response
     def fs_regex_rename(
@@ -3419,7 +3627,9 @@ class AlistFileSystem:
             "src_name_regex": src_name_regex, 
             "new_name_regex": new_name_regex, 
         }
-        return self.client.fs_regex_rename(payload, **self.request_kwargs)
+        resp = self.client.fs_regex_rename(payload, **self.request_kwargs)
+        self._invalidate(src_dir)
+        return resp
 
     @check_response
     def fs_remove(
@@ -3437,7 +3647,9 @@ class AlistFileSystem:
             src_dir = self.abspath(src_dir)
         src_dir = cast(str, src_dir)
         payload = {"names": names, "dir": src_dir}
-        return self.client.fs_remove(payload, **self.request_kwargs)
+        resp = self.client.fs_remove(payload, **self.request_kwargs)
+        self._invalidate(*(joinpath(src_dir, name) for name in names))
+        return resp
 
     @check_response
     def fs_remove_empty_directory(
@@ -3452,11 +3664,16 @@ class AlistFileSystem:
             src_dir = self.abspath(src_dir)
         src_dir = cast(str, src_dir)
         payload = {"src_dir": src_dir}
-        return self.client.fs_remove_empty_directory(payload, **self.request_kwargs)
+        resp = self.client.fs_remove_empty_directory(payload, **self.request_kwargs)
+        self._invalidate(src_dir)
+        return resp
 
     @check_response
     def fs_remove_storage(self, id: int | str, /) -> dict:
-        return self.client.admin_storage_delete(id, **self.request_kwargs)
+        resp = self.client.admin_storage_delete(id, **self.request_kwargs)
+        if self.cache is not None:
+            self.cache.clear()
+        return resp
 
     @check_response
     def fs_rename(
@@ -3472,7 +3689,9 @@ class AlistFileSystem:
             path = self.abspath(path)
         path = cast(str, path)
         payload = {"path": path, "name": name}
-        return self.client.fs_rename(payload, **self.request_kwargs)
+        resp = self.client.fs_rename(payload, **self.request_kwargs)
+        self._invalidate(path, joinpath(dirname(path), name))
+        return resp
 
     @check_response
     def fs_search(
@@ -3544,6 +3763,9 @@ class AlistFileSystem:
         elif _check:
             path = self.abspath(path)
         path = cast(str, path)
+        cache = self.cache
+        if cache is not None and (attr := cache.get_attr(path)) is not None:
+            return attr
         attr = self.fs_get(path, password, _check=False)["data"]
         last_update = time()
         attr["ctime"] = int(parse_as_timestamp(attr.get("created")))
@@ -3552,6 +3774,9 @@ class AlistFileSystem:
         attr["path"] = path
         attr["password"] = password
         attr["last_update"] = last_update
+        if cache is not None:
+            # NOTE: "raw_url" may be signed and expire, so it is not cached
+            cache.set_attr(path, {k: v for k, v in attr.items() if k != "raw_url"})
         return attr
 
     def chdir(
@@ -3811,7 +4036,10 @@ class AlistFileSystem:
             else:
                 file = open(basename(path), mode)
         file = cast(SupportsWrite[bytes], file)
-        url = attr["raw_url"]
+        url = attr.get("raw_url")
+        if not url:
+            # NOTE: An attr served from the cache (i.e. from a listing) has no "raw_url"
+            url = self.fs_get(path, password, _check=False)["data"]["raw_url"]
         if download:
             download(url, file)
         else:
@@ -3931,12 +4159,38 @@ class AlistFileSystem:
         dirname: str | PathLike[str] = "", 
         ignore_case: bool = False, 
         password: str = "", 
+        max_readdir_workers: int = 1, 
+        max_storage_workers: Optional[int | Mapping[str, int]] = None, 
+        use_index: Optional[bool] = None, 
+        index_max_age: Optional[float] = 86400, 
         _check: bool = True, 
     ) -> Iterator[AlistPath]:
+        """Glob files by `pattern` (relative to `dirname`).
+
+        :param use_index: For a pattern with "**" whose last part has some literal text, query the AList 
+            search index (see `search`) with that text and filter the results by the pattern, instead of 
+            crawling the tree. If None, only use the index when `admin_index_progress` reports it is built 
+            without errors, and its last build finished within `index_max_age` seconds, and `ignore_case` 
+            is false (the search may be case-sensitive, depending on the database of AList). If True, use it 
+            whenever searching works. Falls back to crawling when the search fails.
+            NOTE: The index is a snapshot, files changed after its last build are missed or stale in the results
+        :param index_max_age: The maximum age (in seconds) of the index when `use_index` is None, 
+            None means no limit
+
+        :param max_readdir_workers: If greater than 1, list this many directories concurrently (see `iter`), 
+            paths are yielded in the order their listings arrive
+        :param max_storage_workers: The maximum concurrent listings per storage, an int for every storage, 
+            or a mapping of mount path → limit
+        """
+        iter_paths = partial(
+            self.iter, 
+            max_readdir_workers=max_readdir_workers, 
+            max_storage_workers=max_storage_workers, 
+        )
         if pattern == "*":
-            return self.iter(dirname, password=password, _check=_check)
+            return iter_paths(dirname, password=password, _check=_check)
         elif pattern == "**":
-            return self.iter(dirname, password=password, max_depth=-1, _check=_check)
+            return iter_paths(dirname, password=password, max_depth=-1, _check=_check)
         elif not pattern:
             dirname = self.as_path(dirname, password, _check=_check)
             if dirname.exists():
@@ -3945,6 +4199,34 @@ class AlistFileSystem:
         elif not pattern.lstrip("/"):
             return iter((AlistPath(self, "/", password),))
         splitted_pats = tuple(translate_iter(pattern))
+        last_part = pattern.rstrip("/").rpartition("/")[2]
+        def glob_dstar(pattern: str, /) -> Iterator[AlistPath]:
+            match = re_compile("(?i:%s)" % pattern if ignore_case else pattern).fullmatch
+            _, typ, orig = splitted_pats[-1]
+            if typ == "orig":
+                keywords = orig
+            elif typ == "pat":
+                keywords = _glob_keywords(last_part)
+            else:
+                keywords = ""
+            # NOTE: The search of some backends is case-sensitive, so `ignore_case` only uses the index if forced
+            if keywords and (use_index or use_index is None and not ignore_case and self._search_index_ready(index_max_age)):
+                results = self.search(keywords, dirname, password=password, _check=False)
+                try:
+                    first = next(results)
+                except StopIteration:
+                    return iter(())
+                except OSError:
+                    pass
+                else:
+                    return (p for p in chain((first,), results) if match(p.path) is not None)
+            return iter_paths(
+                dirname, 
+                password=password, 
+                max_depth=-1, 
+                predicate=lambda p: match(p.path) is not None, 
+                _check=False, 
+            )
         if pattern.startswith("/"):
             dirname = "/"
         elif isinstance(dirname, AlistPath):
@@ -3957,15 +4239,7 @@ class AlistFileSystem:
         i = 0
         if ignore_case:
             if any(typ == "dstar" for _, typ, _ in splitted_pats):
-                pattern = joinpath(re_escape(dirname), "/".join(t[0] for t in splitted_pats))
-                match = re_compile("(?i:%s)" % pattern).fullmatch
-                return self.iter(
-                    dirname, 
-                    password=password, 
-                    max_depth=-1, 
-                    predicate=lambda p: match(p.path) is not None, 
-                    _check=False, 
-                )
+                return glob_dstar(joinpath(re_escape(dirname), "/".join(t[0] for t in splitted_pats)))
         else:
             typ = None
             for i, (pat, typ, orig) in enumerate(splitted_pats):
@@ -3977,17 +4251,36 @@ class AlistFileSystem:
                     return iter((AlistPath(self, dirname, password),))
                 return iter(())
             elif typ == "dstar" and i + 1 == len(splitted_pats):
-                return self.iter(dirname, password=password, max_depth=-1, _check=False)
+                return iter_paths(dirname, password=password, max_depth=-1, _check=False)
             if any(typ == "dstar" for _, typ, _ in splitted_pats):
-                pattern = joinpath(re_escape(dirname), "/".join(t[0] for t in splitted_pats[i:]))
-                match = re_compile(pattern).fullmatch
-                return self.iter(
-                    dirname, 
-                    password=password, 
-                    max_depth=-1, 
-                    predicate=lambda p: match(p.path) is not None, 
-                    _check=False, 
-                )
+                return glob_dstar(joinpath(re_escape(dirname), "/".join(t[0] for t in splitted_pats[i:])))
+        if max_readdir_workers > 1:
+            # NOTE: Without "**", the n-th pattern only matches at depth n, so the whole pattern is one 
+            #       bounded traversal, and a name that fails its pattern prunes that subtree
+            base = dirname.rstrip("/").count("/")
+            n = len(splitted_pats) - i
+            matches: list[Callable[[str], Any]] = []
+            for pat, typ, orig in splitted_pats[i:]:
+                if typ == "orig":
+                    matches.append(orig.__eq__)
+                elif typ == "star":
+                    matches.append(bool)
+                else:
+                    matches.append(re_compile("(?i:%s)" % pat if ignore_case else pat).fullmatch)
+            def predicate(path: AlistPath, /) -> Optional[bool]:
+                depth = path.path.count("/") - base
+                if not matches[depth-1](path.name):
+                    return None
+                return depth == n
+            return iter_paths(
+                dirname, 
+                topdown=None, 
+                min_depth=n, 
+                max_depth=n, 
+                predicate=predicate, 
+                password=password, 
+                _check=False, 
+            )
         cref_cache: dict[int, Callable] = {}
         def glob_step_match(path, i):
             j = i + 1
@@ -4141,6 +4434,55 @@ class AlistFileSystem:
                 elif onerror:
                     raise
 
+    def _iter_concurrent(
+        self, 
+        /, 
+        top: str | PathLike[str] = "", 
+        min_depth: int = 1, 
+        max_depth: int = 1, 
+        predicate: Optional[Callable[[AlistPath], Optional[bool]]] = None, 
+        onerror: bool | Callable[[OSError], bool] = False, 
+        refresh: Optional[bool] = None, 
+        password: str = "", 
+        max_readdir_workers: int = 8, 
+        max_storage_workers: Optional[int | Mapping[str, int]] = None, 
+        _check: bool = True, 
+    ) -> Iterator[AlistPath]:
+        path = self.as_path(top, password)
+        if not path.is_attr_loaded:
+            path()
+        if not password:
+            password = path.password
+        if min_depth <= 0:
+            pred = predicate(path) if predicate else True
+            if pred is None:
+                return
+            elif pred:
+                yield path
+            min_depth = 1
+        if not path.is_dir() or max_depth == 0:
+            return
+        for depth, _, attrs in self._traverse_concurrent(
+            path.path, 
+            password, 
+            refresh=refresh, 
+            onerror=onerror, 
+            max_workers=max_readdir_workers, 
+            max_storage_workers=max_storage_workers, 
+        ):
+            descend = max_depth < 0 or depth < max_depth
+            subdirs: list[dict] = []
+            for attr in attrs:
+                path = AlistPath(self, **attr)
+                pred = predicate(path) if predicate else True
+                if pred is None:
+                    continue
+                elif pred and depth >= min_depth:
+                    yield path
+                if descend and attr["is_dir"]:
+                    subdirs.append(attr)
+            attrs[:] = subdirs
+
     def _iter_dfs(
         self, 
         /, 
@@ -4217,9 +4559,32 @@ class AlistFileSystem:
         onerror: bool | Callable[[OSError], bool] = False, 
         refresh: Optional[bool] = None, 
         password: str = "", 
+        max_readdir_workers: int = 1, 
+        max_storage_workers: Optional[int | Mapping[str, int]] = None, 
         _check: bool = True, 
     ) -> Iterator[AlistPath]:
-        if topdown is None:
+        """Iterate over the directory tree.
+
+        :param topdown: True for pre-order depth-first, False for post-order depth-first, None for breadth-first
+        :param max_readdir_workers: If greater than 1 (and `topdown` is not False), list this many directories 
+            concurrently, paths are yielded in the order their listings arrive
+        :param max_storage_workers: The maximum concurrent listings per storage, an int for every storage, 
+            or a mapping of mount path → limit
+        """
+        if topdown is not False and max_readdir_workers > 1:
+            return self._iter_concurrent(
+                top, 
+                min_depth=min_depth, 
+                max_depth=max_depth, 
+                predicate=predicate, 
+                onerror=onerror, 
+                refresh=refresh, 
+                password=password, 
+                max_readdir_workers=max_readdir_workers, 
+                max_storage_workers=max_storage_workers, 
+                _check=_check, 
+            )
+        elif topdown is None:
             return self._iter_bfs(
                 top, 
                 min_depth=min_depth, 
@@ -4243,6 +4608,53 @@ class AlistFileSystem:
                 _check=_check, 
             )
 
+    @staticmethod
+    def _normalize_listed(content: Optional[list[dict]], path: str, password: str = "", /) -> list[dict]:
+        last_update = time()
+        if not content:
+            return []
+        for attr in content:
+            attr["ctime"] = int(parse_as_timestamp(attr.get("created")))
+            attr["mtime"] = int(parse_as_timestamp(attr.get("modified")))
+            attr["atime"] = int(last_update)
+            attr["path"] = joinpath(path, attr["name"])
+            attr["password"] = password
+            attr["last_update"] = last_update
+        return content
+
+    def _iterdir_paged(
+        self, 
+        /, 
+        path: str, 
+        password: str = "", 
+        refresh: bool = False, 
+        page_size: int = 1000, 
+        max_workers: int = 4, 
+    ) -> Iterator[dict]:
+        """Stream a directory page by page: the first page tells the `total`, then the remaining pages 
+        are fetched concurrently, at most `max_workers` at a time, and yielded in order as they arrive."""
+        # NOTE: Only the first request refreshes, or every page would make AList re-list the backend
+        data = self.fs_list(path, password, refresh=refresh, page=1, per_page=page_size, _check=False)["data"]
+        yield from self._normalize_listed(data["content"], path, password)
+        pages = -(-(data["total"] or 0) // page_size)
+        if pages <= 1:
+            return
+        def fetch(page: int, /) -> list[dict]:
+            data = self.fs_list(path, password, refresh=False, page=page, per_page=page_size, _check=False)["data"]
+            return self._normalize_listed(data["content"], path, password)
+        with ThreadPoolExecutor(max_workers) as executor:
+            futures: deque = deque()
+            next_page = 2
+            try:
+                while futures or next_page <= pages:
+                    while next_page <= pages and len(futures) < max_workers:
+                        futures.append(executor.submit(fetch, next_page))
+                        next_page += 1
+                    yield from futures.popleft().result()
+            finally:
+                for fu in futures:
+                    fu.cancel()
+
     def iterdir(
         self, 
         /, 
@@ -4251,17 +4663,104 @@ class AlistFileSystem:
         refresh: Optional[bool] = None, 
         page: int = 1, 
         per_page: int = 0, 
+        page_size: int = 0, 
+        max_workers: int = 4, 
         _check: bool = True, 
     ) -> Iterator[dict]:
-        yield from self.listdir_attr(
+        """Iterate over the entries of a directory.
+
+        If `page_size` > 0, the directory is streamed in pages of this size (fetched concurrently 
+        by at most `max_workers` threads), so the first entries arrive before AList has serialized 
+        the whole directory, and only a few pages are held in memory at a time.
+        """
+        if page_size <= 0:
+            yield from self.listdir_attr(
+                path, 
+                password, 
+                refresh=refresh, 
+                page=page, 
+                per_page=per_page, 
+                _check=_check, 
+            )
+            return
+        if isinstance(path, AlistPath):
+            if not password:
+                password = path.password
+            path = path.path
+        elif _check:
+            path = self.abspath(path)
+        if refresh is None:
+            refresh = self.refresh
+        path = cast(str, path)
+        cache = self.cache
+        if cache is not None and not refresh and (content := cache.get_children(path)) is not None:
+            yield from content
+            return
+        yield from self._iterdir_paged(
             path, 
             password, 
-            refresh=refresh, 
-            page=page, 
-            per_page=per_page, 
-            _check=_check, 
+            refresh=cast(bool, refresh), 
+            page_size=page_size, 
+            max_workers=max_workers, 
         )
 
+    async def iterdir_async(
+        self, 
+        /, 
+        path: str | PathLike[str] = "", 
+        password: str = "", 
+        refresh: Optional[bool] = None, 
+        page_size: int = 1000, 
+        max_workers: int = 4, 
+        _check: bool = True, 
+    ) -> AsyncIterator[dict]:
+        """Asynchronous version of `iterdir` in the paginated mode, which uses `client.async_session`: 
+        at most `max_workers` page requests are in flight, pages are yielded in order as they arrive."""
+        if isinstance(path, AlistPath):
+            if not password:
+                password = path.password
+            path = path.path
+        elif _check:
+            path = self.abspath(path)
+        if refresh is None:
+            refresh = self.refresh
+        path = cast(str, path)
+        cache = self.cache
+        if cache is not None and not refresh and (content := cache.get_children(path)) is not None:
+            for attr in content:
+                yield attr
+            return
+        if page_size <= 0:
+            page_size = 1000
+        async def fetch(page: int, refresh: bool = False, /) -> dict:
+            resp = await self.fs_list(
+                path, 
+                password, 
+                refresh=refresh, 
+                page=page, 
+                per_page=page_size, 
+                async_=True, 
+                _check=False, 
+            )
+            return resp["data"]
+        data = await fetch(1, cast(bool, refresh))
+        for attr in self._normalize_listed(data["content"], path, password):
+            yield attr
+        pages = -(-(data["total"] or 0) // page_size)
+        tasks: deque = deque()
+        next_page = 2
+        try:
+            while tasks or next_page <= pages:
+                while next_page <= pages and len(tasks) < max_workers:
+                    tasks.append(ensure_future(fetch(next_page)))
+                    next_page += 1
+                data = await tasks.popleft()
+                for attr in self._normalize_listed(data["content"], path, password):
+                    yield attr
+        finally:
+            for task in tasks:
+                task.cancel()
+
     def list_storage(self, /) -> list[dict]:
         return self.fs_list_storage()["data"]["content"] or []
 
@@ -4304,6 +4803,11 @@ class AlistFileSystem:
             refresh = self.refresh
         path = cast(str, path)
         refresh = cast(bool, refresh)
+        cache = self.cache
+        # NOTE: Only the complete listing is cached, and `refresh` bypasses (and then updates) the cache
+        use_cache = cache is not None and page == 1 and per_page <= 0
+        if use_cache and not refresh and (content := cache.get_children(path)) is not None: # type: ignore
+            return content
         if not self.attr(path, password, _check=False)["is_dir"]:
             raise NotADirectoryError(errno.ENOTDIR, path)
         data = self.fs_list(
@@ -4314,17 +4818,9 @@ class AlistFileSystem:
             per_page=per_page, 
             _check=False, 
         )["data"]
-        last_update = time()
-        content = data["content"]
-        if not content:
-            return []
-        for attr in content:
-            attr["ctime"] = int(parse_as_timestamp(attr.get("created")))
-            attr["mtime"] = int(parse_as_timestamp(attr.get("modified")))
-            attr["atime"] = int(last_update)
-            attr["path"] = joinpath(path, attr["name"])
-            attr["password"] = password
-            attr["last_update"] = last_update
+        content = self._normalize_listed(data["content"], path, password)
+        if use_cache:
+            cache.set_children(path, [dict(attr) for attr in content]) # type: ignore
         return content
 
     def listdir_path(
@@ -4696,6 +5192,8 @@ class AlistFileSystem:
                     if src_path == storage["mount_path"]:
                         storage["mount_path"] = dst_path
                         self.client.admin_storage_update(storage)
+                        if self.cache is not None:
+                            self.cache.clear()
                         break
                 return dst_path
             elif src_dir == dst_dir:
@@ -4798,15 +5296,36 @@ class AlistFileSystem:
         dirname: str | PathLike[str] = "", 
         ignore_case: bool = False, 
         password: str = "", 
+        max_readdir_workers: int = 1, 
+        max_storage_workers: Optional[int | Mapping[str, int]] = None, 
+        use_index: Optional[bool] = None, 
+        index_max_age: Optional[float] = 86400, 
         _check: bool = True, 
     ) -> Iterator[AlistPath]:
         if not pattern:
-            return self.iter(dirname, password=password, max_depth=-1, _check=_check)
+            return self.iter(
+                dirname, 
+                password=password, 
+                max_depth=-1, 
+                max_readdir_workers=max_readdir_workers, 
+                max_storage_workers=max_storage_workers, 
+                _check=_check, 
+            )
         if pattern.startswith("/"):
             pattern = joinpath("/", "**", pattern.lstrip("/"))
         else:
             pattern = joinpath("**", pattern)
-        return self.glob(pattern, dirname, password=password, ignore_case=ignore_case, _check=_check)
+        return self.glob(
+            pattern, 
+            dirname, 
+            password=password, 
+            ignore_case=ignore_case, 
+            max_readdir_workers=max_readdir_workers, 
+            max_storage_workers=max_storage_workers, 
+            use_index=use_index, 
+            index_max_age=index_max_age, 
+            _check=_check, 
+        )
 
     def rmdir(
         self, 
@@ -4857,6 +5376,61 @@ class AlistFileSystem:
         ):
             yield AlistPath(self, **item)
 
+    def search(
+        self, 
+        /, 
+        keywords: str, 
+        src_dir: str | PathLike[str] = "", 
+        scope: Literal[0, 1, 2] = 0, 
+        page_size: int = 1000, 
+        password: str = "", 
+        _check: bool = True, 
+    ) -> Iterator[AlistPath]:
+        """Query the AList search index for names containing `keywords` under `src_dir`, and stream 
+        the results page by page.
+
+        :param scope: 0 for all, 1 for directories only, 2 for files only
+        """
+        if isinstance(src_dir, AlistPath):
+            if not password:
+                password = src_dir.password
+            src_dir = src_dir.path
+        elif _check:
+            src_dir = self.abspath(src_dir)
+        src_dir = cast(str, src_dir)
+        page = 1
+        while True:
+            data = self.fs_search(
+                keywords, 
+                src_dir, 
+                scope=scope, 
+                page=page, 
+                per_page=page_size, 
+                password=password, 
+                _check=False, 
+            )["data"]
+            content = data["content"] or ()
+            for attr in content:
+                # NOTE: Search results only have "parent", "name", "is_dir", "size" and "type", 
+                #       other attributes will be loaded on demand
+                yield AlistPath(self, joinpath(attr["parent"], attr["name"]), password, **attr)
+            if len(content) < page_size or page * page_size >= data["total"]:
+                break
+            page += 1
+
+    def _search_index_ready(self, /, max_age: Optional[float] = None) -> bool:
+        """Whether the AList search index has been built without errors, and its last build finished 
+        within `max_age` seconds, if given (needs admin permission)."""
+        try:
+            data = check_response(self.client.admin_index_progress(**self.request_kwargs))["data"]
+        except OSError:
+            return False
+        if not data.get("is_done") or data.get("error"):
+            return False
+        if max_age is None:
+            return True
+        return time() - parse_as_timestamp(data.get("last_done_time")) <= max_age
+
     def stat(
         self, 
         /, 
@@ -4922,6 +5496,95 @@ class AlistFileSystem:
                     storage = mount_path
             return storage
 
+    def _traverse_concurrent(
+        self, 
+        /, 
+        top: str, 
+        password: str = "", 
+        refresh: Optional[bool] = None, 
+        onerror: None | bool | Callable = None, 
+        max_workers: int = 8, 
+        max_storage_workers: Optional[int | Mapping[str, int]] = None, 
+    ) -> Iterator[tuple[int, str, list[dict]]]:
+        """List the directory tree under `top` with a pool of `max_workers` threads, and yield 
+        (depth, path, attrs) for every directory as soon as its listing arrives (the listing of `top` 
+        has depth 1). After each yield, the directories that are still in `attrs` get listed next, 
+        so the consumer prunes the traversal by removing items from `attrs` in place.
+
+        `max_storage_workers` caps the concurrent listings per storage (an int for all storages, or 
+        a mapping of mount path → limit, storages not in it are only capped by `max_workers`), 
+        because different drivers tolerate very different request rates."""
+        max_workers = max(1, max_workers)
+        mount_paths: list[str] = []
+        if max_storage_workers is not None:
+            try:
+                mount_paths = sorted(
+                    (s["mount_path"] for s in self.list_storage()), 
+                    key=len, 
+                    reverse=True, 
+                )
+            except PermissionError:
+                # NOTE: Without admin permission, the top level directories are taken as the storages
+                pass
+        def storage_of(path: str, /) -> str:
+            for mount_path in mount_paths:
+                if path == mount_path or path.startswith(mount_path.rstrip("/") + "/"):
+                    return mount_path
+            return "/" + path[1:].partition("/")[0]
+        def limit_of(storage: str, /) -> int:
+            if max_storage_workers is None:
+                return max_workers
+            elif isinstance(max_storage_workers, int):
+                return max(1, max_storage_workers)
+            return max(1, max_storage_workers.get(storage, max_workers))
+        def listdir(path: str, /) -> list[dict]:
+            return self.listdir_attr(path, password, refresh=refresh, _check=False)
+        # NOTE: Scheduling happens in the consuming thread, so a busy storage waits in its own queue 
+        #       instead of occupying the workers that other storages could use
+        waiting: dict[str, deque[tuple[int, str]]] = {}
+        running: dict[str, int] = {}
+        results: SimpleQueue[tuple[int, str, str, Future]] = SimpleQueue()
+        total = 0
+        def schedule():
+            nonlocal total
+            for storage, dq in waiting.items():
+                limit = limit_of(storage)
+                while dq and total < max_workers and running.get(storage, 0) < limit:
+                    depth, path = dq.popleft()
+                    running[storage] = running.get(storage, 0) + 1
+                    total += 1
+                    executor.submit(listdir, path).add_done_callback(
+                        lambda fu, depth=depth, path=path, storage=storage: results.put((depth, path, storage, fu)))
+        def push(depth: int, path: str, /):
+            storage = storage_of(path)
+            try:
+                waiting[storage].append((depth, path))
+            except KeyError:
+                waiting[storage] = deque(((depth, path),))
+        executor = ThreadPoolExecutor(max_workers)
+        try:
+            push(1, top)
+            schedule()
+            while total:
+                depth, path, storage, fu = results.get()
+                total -= 1
+                running[storage] -= 1
+                try:
+                    attrs = fu.result()
+                except OSError as e:
+                    if callable(onerror):
+                        onerror(e)
+                    elif onerror:
+                        raise
+                else:
+                    yield depth, path, attrs
+                    for attr in attrs:
+                        if attr["is_dir"]:
+                            push(depth + 1, attr["path"])
+                schedule()
+        finally:
+            executor.shutdown(False, cancel_futures=True)
+
     def touch(
         self, 
         /, 
@@ -5111,6 +5774,48 @@ class AlistFileSystem:
                 elif onerror:
                     raise
 
+    def _walk_concurrent(
+        self, 
+        /, 
+        top: str | PathLike[str] = "", 
+        min_depth: int = 0, 
+        max_depth: int = -1, 
+        onerror: None | bool | Callable = None, 
+        password: str = "", 
+        refresh: Optional[bool] = None, 
+        max_readdir_workers: int = 8, 
+        max_storage_workers: Optional[int | Mapping[str, int]] = None, 
+        _check: bool = True, 
+    ) -> Iterator[tuple[str, list[dict], list[dict]]]:
+        if isinstance(top, AlistPath):
+            if not password:
+                password = top.password
+            top = top.path
+        elif _check:
+            top = self.abspath(top)
+        top = cast(str, top)
+        if not max_depth:
+            return
+        for depth, parent, attrs in self._traverse_concurrent(
+            top, 
+            password, 
+            refresh=refresh, 
+            onerror=onerror, 
+            max_workers=max_readdir_workers, 
+            max_storage_workers=max_storage_workers, 
+        ):
+            dirs: list[dict] = []
+            files: list[dict] = []
+            for attr in attrs:
+                if attr["is_dir"]:
+                    dirs.append(attr)
+                else:
+                    files.append(attr)
+            if min_depth <= 0 or depth >= min_depth:
+                yield parent, dirs, files
+            # NOTE: Like `os.walk`, the caller can prune `dirs` in place
+            attrs[:] = dirs if max_depth < 0 or depth < max_depth else ()
+
     def _walk_dfs(
         self, 
         /, 
@@ -5178,6 +5883,8 @@ class AlistFileSystem:
         onerror: None | bool | Callable = None, 
         password: str = "", 
         refresh: Optional[bool] = None, 
+        max_readdir_workers: int = 1, 
+        max_storage_workers: Optional[int | Mapping[str, int]] = None, 
         _check: bool = True, 
     ) -> Iterator[tuple[str, list[str], list[str]]]:
         for path, dirs, files in self.walk_attr(
@@ -5188,6 +5895,8 @@ class AlistFileSystem:
             onerror=onerror, 
             password=password, 
             refresh=refresh, 
+            max_readdir_workers=max_readdir_workers, 
+            max_storage_workers=max_storage_workers, 
             _check=_check, 
         ):
             yield path, [a["name"] for a in dirs], [a["name"] for a in files]
@@ -5202,9 +5911,32 @@ class AlistFileSystem:
         onerror: None | bool | Callable = None, 
         password: str = "", 
         refresh: Optional[bool] = None, 
+        max_readdir_workers: int = 1, 
+        max_storage_workers: Optional[int | Mapping[str, int]] = None, 
         _check: bool = True, 
     ) -> Iterator[tuple[str, list[dict], list[dict]]]:
-        if topdown is None:
+        """Walk the directory tree, like `os.walk`.
+
+        :param topdown: True for pre-order depth-first, False for post-order depth-first, None for breadth-first
+        :param max_readdir_workers: If greater than 1 (and `topdown` is not False), list this many directories 
+            concurrently, directories are yielded in the order their listings arrive, and pruning `dirs` 
+            in place skips them
+        :param max_storage_workers: The maximum concurrent listings per storage, an int for every storage, 
+            or a mapping of mount path → limit
+        """
+        if topdown is not False and max_readdir_workers > 1:
+            return self._walk_concurrent(
+                top, 
+                min_depth=min_depth, 
+                max_depth=max_depth, 
+                onerror=onerror, 
+                password=password, 
+                refresh=refresh, 
+                max_readdir_workers=max_readdir_workers, 
+                max_storage_workers=max_storage_workers, 
+                _check=_check, 
+            )
+        elif topdown is None:
             return self._walk_bfs(
                 top, 
                 min_depth=min_depth, 
@@ -5236,6 +5968,8 @@ class AlistFileSystem:
         onerror: None | bool | Callable = None, 
         password: str = "", 
         refresh: Optional[bool] = None, 
+        max_readdir_workers: int = 1, 
+        max_storage_workers: Optional[int | Mapping[str, int]] = None, 
         _check: bool = True, 
     ) -> Iterator[tuple[str, list[AlistPath], list[AlistPath]]]:
         for path, dirs, files in self.walk_attr(
@@ -5246,6 +5980,8 @@ class AlistFileSystem:
             onerror=onerror, 
             password=password, 
             refresh=refresh, 
+            max_readdir_workers=max_readdir_workers, 
+            max_storage_workers=max_storage_workers, 
             _check=_check, 
         ):
             yield (
@@ -119,6 +119,16 @@ def main(args):
         if names:
             direct_open_exes = exes.__contains__
 
+    block_cache = None
+    if args.cache_memory > 0:
+        from httpfile import BlockCache
+        block_cache = BlockCache(
+            block_size=args.block_size << 10, 
+            max_memory=args.cache_memory << 20, 
+            disk_dir=args.cache_dir, 
+            max_disk=args.cache_disk << 20, 
+        )
+
     from os.path import exists, abspath
 
     print(f"""
@@ -143,6 +153,9 @@ def main(args):
         max_readdir_workers=args.max_readdir_workers, 
         direct_open_names=direct_open_names, 
         direct_open_exes=direct_open_exes, 
+        block_cache=block_cache, 
+        readahead=args.readahead, 
+        prefetch_workers=args.prefetch_workers, 
     ).run(
         mountpoint=mount_point, 
         ro=True, 
@@ -231,6 +244,15 @@ Reference:
     - https://docs.python.org/3/library/collections.abc.html#collections.abc.MutableMapping
     - https://docs.python.org/3/library/collections.abc.html#collections-abstract-base-classes
 """)
+parser.add_argument(
+    "--cache-memory", default=128, type=int, 
+    help="文件数据块缓存在内存中的最大 MB 数，所有打开的文件共享（按路径和修改时间区分），默认值是 128，小于等于 0 则不缓存", 
+)
+parser.add_argument("--block-size", default=1024, type=int, help="文件数据块的 KB 数，默认值是 1024")
+parser.add_argument("--cache-dir", help="从内存中淘汰的数据块会写入这个目录，作为第 2 层缓存，默认不写入磁盘")
+parser.add_argument("--cache-disk", default=1024, type=int, help="数据块缓存在磁盘上的最大 MB 数，默认值是 1024")
+parser.add_argument("--readahead", default=8, type=int, help="顺序读取时最多预读的块数，默认值是 8，等于 0 则不预读")
+parser.add_argument("--prefetch-workers", default=2, type=int, help="每个打开的文件在后台预读的并发请求数，默认值是 2，等于 0 则预读在读取时同步进行")
 parser.add_argument("-d", "--debug", action="store_true", help="调试模式，输出更多信息")
 parser.add_argument("-l", "--log-level", default=0, help=f"指定日志级别，可以是数字或名称，不传此参数则不输出日志，默认值: 0 (NOTSET)")
 parser.add_argument("-b", "--background", action="store_true", help="后台运行")
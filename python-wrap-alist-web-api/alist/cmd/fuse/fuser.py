@@ -37,6 +37,7 @@ from typing import cast, BinaryIO, Final, Optional
 from unicodedata import normalize
 
 from alist import AlistFileSystem, AlistPath
+from httpfile import BlockCache, HTTPFileReader
 
 try:
     from .util.log import logger
@@ -128,6 +129,9 @@ class AlistFuseOperations(Operations):
         max_readdir_workers: int = -1, 
         direct_open_names: Optional[Callable[[str], bool]] = None, 
         direct_open_exes: Optional[Callable[[str], bool]] = None, 
+        block_cache: Optional[BlockCache] = None, 
+        readahead: int = 8, 
+        prefetch_workers: int = 2, 
     ):
         self.__finalizer__: list[Callable] = []
         self._log = partial(logger.log, extra={"instance": repr(self)})
@@ -147,6 +151,17 @@ class AlistFuseOperations(Operations):
         self.cache = cache
         # cache all opened files (except in zipfile)
         self._fh_to_file: dict[int, tuple[BinaryIO, bytes]] = {}
+        # reads (and the release) of the same file handler are serialized by its lock
+        self._fh_to_lock: dict[int, Lock] = {}
+        # blocks of file data, shared by all file handlers (keyed by path and mtime), 
+        # if it is None, every file handler reads its own stream
+        self.block_cache = block_cache
+        # the maximum number of blocks to read ahead when a file handler reads sequentially
+        self.readahead = readahead
+        # the number of background range requests per file handler to fetch read-ahead blocks
+        self.prefetch_workers = prefetch_workers
+        if block_cache is not None:
+            register(lambda: self._log(logging.INFO, "block cache stats: %r", block_cache.stats))
         def close_all():
             popitem = self._fh_to_file.popitem
             while True:
@@ -235,6 +250,16 @@ class AlistFuseOperations(Operations):
             return None, attr["_data"]
         if attr["st_size"] <= 2048:
             return None, self.fs.as_path(path).read_bytes()
+        if self.block_cache is not None:
+            file = HTTPFileReader(
+                self.fs.as_path(path).url, 
+                cache=self.block_cache, 
+                cache_key=(path, attr["st_mtime"]), 
+                readahead=self.readahead, 
+                prefetch_workers=self.prefetch_workers, 
+            )
+            # NOTE: In cache mode, seeks are free and the first blocks are cached anyway
+            return file, b""
         file = cast(BinaryIO, self.fs.as_path(path).open("rb"))
         if start == 0:
             # cache 2048 in bytes (2 KB)
@@ -247,20 +272,23 @@ class AlistFuseOperations(Operations):
         self._log(logging.DEBUG, "read(path=\x1b[4;34m%r\x1b[0m, size=%r, offset=%r, fh=%r) by \x1b[3;4m%s\x1b[0m", path, size, offset, fh, PROCESS_STR)
         if not fh:
             return b""
+        # NOTE: `dict.setdefault` is atomic, so concurrent reads of a new file handler get the same lock
+        lock = self._fh_to_lock.setdefault(fh, Lock())
         try:
-            try:
-                file, preread = self._fh_to_file[fh]
-            except KeyError:
-                file, preread = self._fh_to_file[fh] = self._open(path, offset)
-            cache_size = len(preread)
-            if offset < cache_size:
-                if offset + size <= cache_size:
-                    return preread[offset:offset+size]
-                elif file is not None:
-                    file.seek(cache_size)
-                    return preread[offset:] + file.read(offset+size-cache_size)
-            file.seek(offset)
-            return file.read(size)
+            with lock:
+                try:
+                    file, preread = self._fh_to_file[fh]
+                except KeyError:
+                    file, preread = self._fh_to_file[fh] = self._open(path, offset)
+                cache_size = len(preread)
+                if offset < cache_size:
+                    if offset + size <= cache_size:
+                        return preread[offset:offset+size]
+                    elif file is not None:
+                        file.seek(cache_size)
+                        return preread[offset:] + file.read(offset+size-cache_size)
+                file.seek(offset)
+                return file.read(size)
         except BaseException as e:
             self._log(
                 logging.ERROR, 
@@ -319,7 +347,8 @@ class AlistFuseOperations(Operations):
         if not fh:
             return
         try:
-            file, _ = self._fh_to_file.pop(fh)
+            with self._fh_to_lock.pop(fh, None) or Lock():
+                file, _ = self._fh_to_file.pop(fh)
             if file is not None:
                 file.close()
         except KeyError: